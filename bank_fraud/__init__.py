@@ -0,0 +1,58 @@
+# Paket nad modulima iz checkpoint direktorija (nazivi s razmakom nisu uvozivi kao paketi).
+# Uvoz paketa ne uvozi pandas, NumPy ni SQLAlchemy i ne otvara vezu prema bazi: modul se učitava tek pri
+# prvom pristupu atributu (npr. bank_fraud.punjenje_skladista), a naredbe su u bank_fraud.cli.
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINT_DIRS = [os.path.join(ROOT, f'checkpoint {number}') for number in (1, 2, 3)]
+
+# Modul -> checkpoint u kojem se nalazi
+MODULES = {
+    'profiliranje_skupa': 1,
+    'citanje_izvora': 2,
+    'instrumentacija': 2,
+    'kodiranje_nizova': 2,
+    'kvaliteta_podataka': 2,
+    'pravila_prijevara': 2,
+    'predprocesiranje_skupa': 2,
+    'servis_unosa': 2,
+    'stvaranje_i_popunjavanje_baze': 2,
+    'test_importa': 2,
+    'uskladivanje': 2,
+    'agregacije': 3,
+    'dimenzijski_model': 3,
+    'kljucevi_dimenzija': 3,
+    'olap_motor': 3,
+    'particije': 3,
+    'predmemorija_upita': 3,
+    'punjenje_skladista': 3,
+    'znacajke_brzine': 3,
+}
+
+
+# Moduli se međusobno uvoze kao moduli najviše razine, pa checkpoint direktoriji moraju biti na sys.path
+def add_checkpoint_paths():
+    for path in CHECKPOINT_DIRS:
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+def load(name):
+    if name not in MODULES:
+        raise ValueError(f"Unknown module {name!r}; expected one of {', '.join(MODULES)}")
+    add_checkpoint_paths()
+    return importlib.import_module(name)
+
+
+def __getattr__(name):
+    if name in MODULES:
+        module = load(name)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(MODULES))
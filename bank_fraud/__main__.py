@@ -0,0 +1,5 @@
+import sys
+
+from bank_fraud.cli import main
+
+sys.exit(main())
@@ -0,0 +1,56 @@
+# Jedinstveni naredbeni redak s podnaredbama (python -m bank_fraud <naredba> [opcije naredbe]).
+# Uvozi se samo standardna biblioteka; modul naredbe (a time i pandas/SQLAlchemy) učitava se tek kad se
+# naredba pokrene, pa --help i popis naredbi ne plaćaju uvoz teških ovisnosti ni vezu prema bazi.
+import argparse
+import sys
+
+from bank_fraud import load
+from bank_fraud.postavke import CONFIG_PATH, CONFIG_VARIABLE, DW_URL_VARIABLE, OLTP_URL_VARIABLE, apply_config
+
+# Naredba -> (modul, opis); opcije iza naredbe prosljeđuju se main(argv) modula (vidi <naredba> --help)
+COMMANDS = {
+    'profile': ('profiliranje_skupa', "Profile the source CSV in one chunked pass"),
+    'preprocess': ('predprocesiranje_skupa', "Clean the source CSV into the processed CSV/Parquet dataset"),
+    'load-oltp': ('stvaranje_i_popunjavanje_baze', "Create and populate the bank_fraud_db OLTP schema"),
+    'build-dw': ('punjenje_skladista', "Incremental ETL from bank_fraud_db into the bank_fraud_dw star schema"),
+    'verify': ('test_importa', "Reconcile the processed dataset with bank_fraud_db (unittest options apply)"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='bank_fraud', description="Bank transaction fraud detection pipeline.",
+                                     allow_abbrev=False)
+    parser.add_argument('--config', default=None,
+                        help=f"INI file with a [bank_fraud] section (default: ${CONFIG_VARIABLE} or ./{CONFIG_PATH})")
+    parser.add_argument('--oltp-url', default=None, help=f"SQLAlchemy URL of bank_fraud_db (sets ${OLTP_URL_VARIABLE})")
+    parser.add_argument('--dw-url', default=None, help=f"SQLAlchemy URL of bank_fraud_dw (sets ${DW_URL_VARIABLE})")
+    parser.add_argument('--processed', default=None, help="Processed CSV file or Parquet directory")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+    for name, (_, description) in COMMANDS.items():
+        commands.add_parser(name, help=description, description=description, add_help=False)
+    return parser
+
+
+def run_verification(module, argv):
+    import unittest
+    program = unittest.main(module=module, argv=['bank_fraud verify', *argv], exit=False)
+    return 0 if program.result.wasSuccessful() else 1
+
+
+def main(argv=None):
+    args, command_argv = build_parser().parse_known_args(argv)
+    apply_config(args.config, oltp_url=args.oltp_url, dw_url=args.dw_url, processed_path=args.processed)
+    module = load(COMMANDS[args.command][0])
+    if args.command == 'verify':
+        return run_verification(module, command_argv)
+    # Parser modula ime programa uzima iz sys.argv[0]; u pomoći i porukama o greškama ispisuje se naredba
+    program = sys.argv[0]
+    sys.argv[0] = f'bank_fraud {args.command}'
+    try:
+        return module.main(command_argv) or 0
+    finally:
+        sys.argv[0] = program
+
+
+if __name__ == '__main__':
+    sys.exit(main())
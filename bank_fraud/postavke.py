@@ -0,0 +1,46 @@
+# Postavke okruženja: URL-ovi baza i putanja predprocesiranog skupa. Moduli čitaju zadane vrijednosti iz
+# varijabli okruženja pri uvozu, pa se postavke primjenjuju prije nego što se modul prvi put učita.
+# Prednost: opcija naredbenog retka > varijabla okruženja > konfiguracijska datoteka > vrijednost u modulu.
+import configparser
+import os
+
+OLTP_URL_VARIABLE = 'BANK_FRAUD_OLTP_URL'
+DW_URL_VARIABLE = 'BANK_FRAUD_DW_URL'
+PROCESSED_PATH_VARIABLE = 'BANK_FRAUD_PROCESSED_PATH'
+CONFIG_VARIABLE = 'BANK_FRAUD_CONFIG'
+
+CONFIG_PATH = 'bank_fraud.ini'
+CONFIG_SECTION = 'bank_fraud'
+# Ključ u konfiguracijskoj datoteci -> varijabla okruženja
+CONFIG_KEYS = {
+    'oltp_url': OLTP_URL_VARIABLE,
+    'dw_url': DW_URL_VARIABLE,
+    'processed_path': PROCESSED_PATH_VARIABLE,
+}
+
+
+# Odjeljak [bank_fraud] iz INI datoteke; izričito zadana datoteka mora postojati, zadana (bank_fraud.ini) ne mora
+def read_config(path=None):
+    explicit = path or os.environ.get(CONFIG_VARIABLE)
+    path = explicit or CONFIG_PATH
+    if not os.path.exists(path):
+        if explicit:
+            raise FileNotFoundError(f"Config file not found: {path}")
+        return {}
+    parser = configparser.ConfigParser()
+    parser.read(path, encoding='utf-8')
+    if not parser.has_section(CONFIG_SECTION):
+        return {}
+    values = dict(parser.items(CONFIG_SECTION))
+    unknown = sorted(set(values) - set(CONFIG_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown keys in [{CONFIG_SECTION}] of {path}: {', '.join(unknown)}")
+    return values
+
+
+def apply_config(path=None, **overrides):
+    for key, value in read_config(path).items():
+        os.environ.setdefault(CONFIG_KEYS[key], value)
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[CONFIG_KEYS[key]] = value
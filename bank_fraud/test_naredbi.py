@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import bank_fraud
+from bank_fraud.postavke import OLTP_URL_VARIABLE, PROCESSED_PATH_VARIABLE, apply_config
+
+sys.path.append(os.path.join(bank_fraud.ROOT, 'checkpoint 2'))
+from test_bulk_unosa import make_processed_df  # noqa: E402
+
+HEAVY_MODULES = ['numpy', 'pandas', 'pyarrow', 'sqlalchemy']
+
+
+# Naredba u zasebnom procesu, da postavke i uvezeni moduli jednog pokretanja ne utječu na druga
+def run(*args, cwd):
+    env = dict(os.environ, PYTHONPATH=bank_fraud.ROOT)
+    for variable in (OLTP_URL_VARIABLE, PROCESSED_PATH_VARIABLE, 'BANK_FRAUD_DW_URL', 'BANK_FRAUD_CONFIG'):
+        env.pop(variable, None)
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True)
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def test_import_and_help_load_no_heavy_dependencies(self):
+        check = (f"import sys, bank_fraud, bank_fraud.cli; bank_fraud.cli.build_parser().format_help(); "
+                 f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])")
+        result = run('-c', check, cwd=self.tmp.name)
+        self.assertEqual(result.stdout.strip(), '[]', result.stderr)
+        result = run('-m', 'bank_fraud', '--help', cwd=self.tmp.name)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn('load-oltp', result.stdout)
+
+    def test_pipeline_from_config(self):
+        # Brojevi telefona bez '+' bi se iz CSV-a pročitali kao brojevi, pa se ovdje koriste tekstualni
+        make_processed_df().assign(Customer_Contact=lambda df: 'tel' + df['Customer_Contact']).to_csv(
+            os.path.join(self.tmp.name, 'processed.csv'), index=False)
+        with open(os.path.join(self.tmp.name, 'bank_fraud.ini'), 'w', encoding='utf-8') as config:
+            config.write("[bank_fraud]\noltp_url = sqlite:///oltp.db\ndw_url = sqlite:///dw.db\n"
+                         "processed_path = processed.csv\n")
+        outputs = {}
+        for command in (['load-oltp', '--mode', 'bulk'], ['build-dw'], ['verify']):
+            result = run('-m', 'bank_fraud', *command, cwd=self.tmp.name)
+            self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+            outputs[command[0]] = result.stdout + result.stderr
+        self.assertIn('4 facts loaded', outputs['build-dw'])
+        self.assertIn('Ran 5 tests', outputs['verify'])
+        # Opcija naredbenog retka ima prednost pred datotekom: prazno skladište, pa ETL učitava sve ispočetka
+        result = run('-m', 'bank_fraud', '--dw-url', 'sqlite:///other_dw.db', 'build-dw', cwd=self.tmp.name)
+        self.assertIn('4 facts loaded', result.stdout)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'other_dw.db')))
+
+    def test_config_precedence(self):
+        path = os.path.join(self.tmp.name, 'custom.ini')
+        with open(path, 'w', encoding='utf-8') as config:
+            config.write("[bank_fraud]\noltp_url = sqlite:///from_file.db\nprocessed_path = from_file.csv\n")
+        saved = {variable: os.environ.pop(variable, None) for variable in (OLTP_URL_VARIABLE, PROCESSED_PATH_VARIABLE)}
+        try:
+            os.environ[PROCESSED_PATH_VARIABLE] = 'from_env.csv'
+            apply_config(path, oltp_url=None)
+            self.assertEqual((os.environ[OLTP_URL_VARIABLE], os.environ[PROCESSED_PATH_VARIABLE]),
+                             ('sqlite:///from_file.db', 'from_env.csv'))
+            apply_config(path, oltp_url='sqlite://')
+            self.assertEqual(os.environ[OLTP_URL_VARIABLE], 'sqlite://')
+            with self.assertRaises(FileNotFoundError):
+                apply_config(os.path.join(self.tmp.name, 'missing.ini'))
+        finally:
+            for variable, value in saved.items():
+                os.environ.pop(variable, None)
+                if value is not None:
+                    os.environ[variable] = value
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
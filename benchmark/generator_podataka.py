@@ -0,0 +1,192 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Veličine skupova za mjerenje skaliranja (broj redaka)
+SIZES = {'100k': 100_000, '1M': 1_000_000, '10M': 10_000_000, '50M': 50_000_000}
+
+DEFAULT_SEED = 42
+DEFAULT_FRAUD_RATE = 0.05
+# Broj redaka generiranih jednim generatorom slučajnih brojeva; izlaz ne ovisi o veličini dijela pri pisanju
+BLOCK_SIZE = 100_000
+
+# Kardinaliteti u odnosu na broj transakcija (kupac ima ~10 transakcija, trgovac ~200)
+TRANSACTIONS_PER_CUSTOMER = 10
+TRANSACTIONS_PER_MERCHANT = 200
+MAX_MERCHANTS = 250_000
+
+START_DATE = '2025-01-01'
+DAYS = 365
+
+# Stupci izvornog CSV-a (Bank_Transaction_Fraud_Detection.csv), istim redoslijedom
+SOURCE_COLUMNS = [
+    'Customer_ID', 'Customer_Name', 'Gender', 'Age', 'State', 'City', 'Bank_Branch', 'Account_Type',
+    'Transaction_ID', 'Transaction_Date', 'Transaction_Time', 'Transaction_Amount', 'Merchant_ID',
+    'Transaction_Type', 'Merchant_Category', 'Account_Balance', 'Transaction_Device', 'Transaction_Location',
+    'Device_Type', 'Is_Fraud', 'Transaction_Currency', 'Customer_Contact', 'Transaction_Description',
+    'Customer_Email',
+]
+
+# (grad, savezna država)
+CITIES = [
+    ('Mumbai', 'Maharashtra'), ('Pune', 'Maharashtra'), ('Nagpur', 'Maharashtra'), ('New Delhi', 'Delhi'),
+    ('Bengaluru', 'Karnataka'), ('Mysuru', 'Karnataka'), ('Chennai', 'Tamil Nadu'), ('Coimbatore', 'Tamil Nadu'),
+    ('Kolkata', 'West Bengal'), ('Hyderabad', 'Telangana'), ('Ahmedabad', 'Gujarat'), ('Surat', 'Gujarat'),
+    ('Jaipur', 'Rajasthan'), ('Udaipur', 'Rajasthan'), ('Lucknow', 'Uttar Pradesh'), ('Kanpur', 'Uttar Pradesh'),
+    ('Kochi', 'Kerala'), ('Thiruvananthapuram', 'Kerala'), ('Panaji', 'Goa'), ('Bhopal', 'Madhya Pradesh'),
+    ('Indore', 'Madhya Pradesh'), ('Patna', 'Bihar'), ('Chandigarh', 'Chandigarh'), ('Bhubaneswar', 'Odisha'),
+    ('Guwahati', 'Assam'), ('Ranchi', 'Jharkhand'), ('Dehradun', 'Uttarakhand'), ('Shimla', 'Himachal Pradesh'),
+    ('Srinagar', 'Jammu and Kashmir'), ('Raipur', 'Chhattisgarh'), ('Visakhapatnam', 'Andhra Pradesh'),
+    ('Amritsar', 'Punjab'),
+]
+FIRST_NAMES = {
+    'Male': ['Aarav', 'Vihaan', 'Arjun', 'Rohan', 'Kabir', 'Ishaan', 'Aditya', 'Rahul', 'Vikram', 'Sanjay'],
+    'Female': ['Ananya', 'Diya', 'Isha', 'Kavya', 'Meera', 'Priya', 'Riya', 'Saanvi', 'Nisha', 'Pooja'],
+}
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Nair', 'Iyer', 'Gupta', 'Singh', 'Kumar', 'Das', 'Mehta', 'Joshi', 'Rao']
+ACCOUNT_TYPES = ['Savings', 'Business', 'Checking']
+TRANSACTION_TYPES = ['Credit', 'Debit', 'Transfer', 'Withdrawal', 'Bill Payment']
+MERCHANT_CATEGORIES = {
+    'Restaurant': ['Dinner', 'Lunch order', 'Cafe'],
+    'Groceries': ['Supermarket purchase', 'Vegetables', 'Milk and bread'],
+    'Entertainment': ['Movie tickets', 'Concert', 'Streaming subscription'],
+    'Health': ['Pharmacy', 'Doctor consultation', 'Lab tests'],
+    'Clothing': ['Apparel', 'Shoes', 'Tailoring'],
+    'Electronics': ['Laptop', 'Mobile phone', 'Headphones'],
+}
+# Naziv uređaja -> tip uređaja (naziv jednoznačno određuje tip)
+DEVICES = {
+    'ATM': 'ATM', 'Self-service Banking Machine': 'ATM',
+    'POS Terminal': 'POS', 'Debit/Credit Card': 'POS', 'Payment Gateway Device': 'POS', 'Bank Branch': 'POS',
+    'Mobile Banking App': 'Mobile', 'Smartphone': 'Mobile', 'Tablet': 'Mobile', 'QR Code Scanner': 'Mobile',
+    'Wearable Device': 'Mobile', 'Voice Assistant': 'Mobile',
+    'Web Browser': 'Desktop', 'Desktop/Laptop': 'Desktop', 'Banking Chatbot': 'Desktop', 'Virtual Card': 'Desktop',
+}
+
+
+# Tekstualni oblici svih datuma i vremena u dana, izračunati jednom (brže od strftime po retku)
+DATE_STRINGS = pd.date_range(START_DATE, periods=DAYS, freq='D').strftime('%d-%m-%Y').to_numpy(dtype=object)
+TIME_STRINGS = (pd.Timestamp(START_DATE) + pd.to_timedelta(np.arange(86400), unit='s')).strftime('%H:%M:%S').to_numpy(dtype=object)
+
+
+def _pick(rng, values, size):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+# Atributi kupaca ovise samo o seedu i indeksu kupca, pa su isti u svakoj transakciji istog kupca
+def make_customers(count, seed=DEFAULT_SEED):
+    rng = np.random.default_rng([seed, 0])
+    gender = np.where(rng.random(count) < 0.5, 'Male', 'Female').astype(object)
+    first = np.where(gender == 'Male', _pick(rng, FIRST_NAMES['Male'], count), _pick(rng, FIRST_NAMES['Female'], count))
+    last = _pick(rng, LAST_NAMES, count)
+    home = rng.integers(0, len(CITIES), count)
+    city = np.asarray([city for city, _ in CITIES], dtype=object)[home]
+    index = pd.Series(np.arange(count)).astype(str).str.zfill(8)
+    name = pd.Series(first) + ' ' + pd.Series(last)
+    return pd.DataFrame({
+        'Customer_ID': 'C' + index,
+        'Customer_Name': name,
+        'Gender': gender,
+        'Age': rng.integers(18, 80, count),
+        'State': np.asarray([state for _, state in CITIES], dtype=object)[home],
+        'City': city,
+        'Bank_Branch': pd.Series(city) + ' Branch',
+        'Account_Type': _pick(rng, ACCOUNT_TYPES, count),
+        'Customer_Contact': '+91' + pd.Series(rng.integers(7_000_000_000, 9_999_999_999, count)).astype(str),
+        'Customer_Email': name.str.lower().str.replace(' ', '.', regex=False) + '.' + index + '@example.com',
+        'home': home,
+    })
+
+
+def make_merchants(count, seed=DEFAULT_SEED):
+    rng = np.random.default_rng([seed, 1])
+    category = rng.integers(0, len(MERCHANT_CATEGORIES), count)
+    return pd.DataFrame({
+        'Merchant_ID': 'M' + pd.Series(np.arange(count)).astype(str).str.zfill(7),
+        'Merchant_Category': np.asarray(list(MERCHANT_CATEGORIES), dtype=object)[category],
+        'category': category,
+    })
+
+
+# Iskrivljena razdioba aktivnosti: mali broj kupaca/trgovaca ima velik udio transakcija
+def _skewed_index(rng, count, size):
+    return np.minimum((count * rng.random(size) ** 2).astype(np.int64), count - 1)
+
+
+def generate_block(block, rows, customers, merchants, seed=DEFAULT_SEED, fraud_rate=DEFAULT_FRAUD_RATE):
+    rng = np.random.default_rng([seed, 2, block])
+    first_row = block * BLOCK_SIZE
+    df = customers.iloc[_skewed_index(rng, len(customers), rows)].reset_index(drop=True)
+    merchant = merchants.iloc[_skewed_index(rng, len(merchants), rows)].reset_index(drop=True)
+    is_fraud = rng.random(rows) < fraud_rate
+
+    # Prijevare: češće noću, s većim iznosima i izvan matičnog grada kupca
+    seconds = rng.integers(0, DAYS * 86400, rows)
+    night = rng.integers(0, 5 * 3600, rows)
+    seconds = np.where(is_fraud & (rng.random(rows) < 0.6), seconds - seconds % 86400 + night, seconds)
+    amount = np.round(rng.lognormal(7.5, 1.2, rows) * np.where(is_fraud, 4.0, 1.0), 2)
+    location = np.where(is_fraud & (rng.random(rows) < 0.7), rng.integers(0, len(CITIES), rows), df['home'])
+    device = _pick(rng, list(DEVICES), rows)
+    descriptions = np.asarray(list(MERCHANT_CATEGORIES.values()), dtype=object)
+    description = descriptions[merchant['category'].to_numpy(), rng.integers(0, descriptions.shape[1], rows)]
+
+    df['Transaction_ID'] = 'T' + pd.Series(np.arange(first_row, first_row + rows)).astype(str).str.zfill(9)
+    df['Transaction_Date'] = DATE_STRINGS[seconds // 86400]
+    df['Transaction_Time'] = TIME_STRINGS[seconds % 86400]
+    df['Transaction_Amount'] = amount
+    df['Merchant_ID'] = merchant['Merchant_ID']
+    df['Transaction_Type'] = _pick(rng, TRANSACTION_TYPES, rows)
+    df['Merchant_Category'] = merchant['Merchant_Category']
+    df['Account_Balance'] = np.round(rng.uniform(0, 100_000, rows), 2)
+    df['Transaction_Device'] = device
+    df['Transaction_Location'] = np.asarray([f"{city}, {state}" for city, state in CITIES], dtype=object)[location]
+    df['Device_Type'] = pd.Series(device).map(DEVICES).to_numpy()
+    df['Is_Fraud'] = is_fraud.astype(int)
+    df['Transaction_Currency'] = 'INR'
+    df['Transaction_Description'] = description
+    return df[SOURCE_COLUMNS]
+
+
+# Piše CSV s točnom shemom izvornog skupa, blok po blok (ograničena memorija i za 50M redaka)
+def generate_csv(path, rows, seed=DEFAULT_SEED, fraud_rate=DEFAULT_FRAUD_RATE):
+    start = time.perf_counter()
+    customers = make_customers(max(1, rows // TRANSACTIONS_PER_CUSTOMER), seed)
+    merchants = make_merchants(min(MAX_MERCHANTS, max(1, rows // TRANSACTIONS_PER_MERCHANT)), seed)
+    blocks = (rows + BLOCK_SIZE - 1) // BLOCK_SIZE
+    for block in range(blocks):
+        block_rows = min(BLOCK_SIZE, rows - block * BLOCK_SIZE)
+        df = generate_block(block, block_rows, customers, merchants, seed, fraud_rate)
+        df.to_csv(path, index=False, mode='w' if block == 0 else 'a', header=(block == 0))
+    elapsed = time.perf_counter() - start
+    print(f"Generated {rows} rows ({len(customers)} customers, {len(merchants)} merchants) "
+          f"into {path} in {elapsed:.2f}s")
+    return path
+
+
+def parse_size(size):
+    if size in SIZES:
+        return SIZES[size]
+    multipliers = {'k': 1_000, 'M': 1_000_000}
+    if size[-1] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Bank_Transaction_Fraud_Detection.csv.")
+    parser.add_argument('--rows', default='100k', help=f"Row count or one of {', '.join(SIZES)} (e.g. 250k, 2M)")
+    parser.add_argument('--output', default=None, help="Output CSV (default: synthetic_<rows>_seed<seed>.csv)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Random seed; same seed gives the same file")
+    parser.add_argument('--fraud-rate', type=float, default=DEFAULT_FRAUD_RATE, help="Share of fraudulent transactions")
+    args = parser.parse_args(argv)
+
+    output = args.output or f"synthetic_{args.rows}_seed{args.seed}.csv"
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    generate_csv(output, parse_size(args.rows), args.seed, args.fraud_rate)
+
+
+if __name__ == '__main__':
+    main()
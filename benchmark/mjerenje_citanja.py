@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import sys
+import time
+import pyarrow as pa
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'checkpoint 2')]
+
+from citanje_izvora import infer_schema
+from generator_podataka import DEFAULT_FRAUD_RATE, DEFAULT_SEED, generate_csv, parse_size
+from predprocesiranje_skupa import CHUNK_SIZE, iter_source
+
+WORK_DIR = 'benchmark_data'
+# Kompresije izvora koje se uspoređuju; 'none' je nekomprimirani CSV
+COMPRESSIONS = {'none': '.csv', 'gzip': '.csv.gz', 'zstd': '.csv.zst'}
+
+
+def default_threads():
+    threads = []
+    count = 1
+    while count < pa.cpu_count():
+        threads.append(count)
+        count *= 2
+    return threads + [pa.cpu_count()]
+
+
+# Komprimirana kopija generiranog CSV-a (stvara se jednom i ponovno koristi)
+def compressed_copy(raw_path, compression):
+    path = raw_path[:-len('.csv')] + COMPRESSIONS[compression]
+    if compression != 'none' and not os.path.exists(path):
+        with open(raw_path, 'rb') as source, pa.output_stream(path, compression=compression) as target:
+            while block := source.read(1 << 24):
+                target.write(block)
+    return path
+
+
+def time_read(chunks, repeat):
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = sum(len(chunk) for chunk in chunks())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+# Najbolje od repeat prolaza po izvoru: pandas (jedna dretva) i Arrow čitač sa svakim brojem dretvi, oba s tipovima
+# stupaca iz predprocesiranja. MB/s se računa prema veličini nekomprimiranog CSV-a, pa su izvori usporedivi.
+def run_benchmark(raw_path, compressions, threads, chunksize=CHUNK_SIZE, repeat=3):
+    raw_mb = os.path.getsize(raw_path) / 1e6
+    results = []
+    for compression in compressions:
+        path = compressed_copy(raw_path, compression)
+        infer_schema(path)
+        runs = [('pandas', 1, lambda: iter_source(path, chunksize))]
+        runs += [('arrow', count, lambda count=count: iter_source(path, chunksize, 'arrow', count)) for count in threads]
+        for reader, count, chunks in runs:
+            rows, seconds = time_read(chunks, repeat)
+            results.append({
+                'compression': compression,
+                'file_mb': round(os.path.getsize(path) / 1e6, 2),
+                'reader': reader,
+                'threads': count,
+                'rows': rows,
+                'seconds': round(seconds, 4),
+                'rows_per_second': round(rows / seconds),
+                'mb_per_second': round(raw_mb / seconds, 1),
+            })
+    return results
+
+
+def print_results(results):
+    print(f"\n{'Compression':<12}{'File MB':>9}{'Reader':>8}{'Threads':>9}{'Seconds':>10}{'Rows/s':>12}{'MB/s':>8}{'Speedup':>9}")
+    baseline = {result['compression']: result['seconds'] for result in results if result['reader'] == 'pandas'}
+    for result in results:
+        speedup = baseline[result['compression']] / result['seconds']
+        print(f"{result['compression']:<12}{result['file_mb']:>9}{result['reader']:>8}{result['threads']:>9}"
+              f"{result['seconds']:>10.3f}{result['rows_per_second']:>12}{result['mb_per_second']:>8}{speedup:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare source CSV parse throughput: pandas vs. the multithreaded "
+                                                 "Arrow reader, uncompressed vs. gzip/zstd.")
+    parser.add_argument('--size', default='1M', help="Generated rows, e.g. 100k 1M 10M")
+    parser.add_argument('--input', default=None, help="Existing uncompressed source CSV instead of generated data")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Generator seed")
+    parser.add_argument('--work-dir', default=WORK_DIR, help="Directory for generated and compressed CSVs")
+    parser.add_argument('--compressions', nargs='+', choices=list(COMPRESSIONS), default=list(COMPRESSIONS))
+    parser.add_argument('--threads', nargs='+', type=int, default=None,
+                        help="Arrow reader thread counts (default: 1, 2, 4, ... up to all cores)")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Rows per chunk handed to preprocessing")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per configuration; the fastest is reported")
+    parser.add_argument('--report', default=None, help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    raw_path = args.input
+    if raw_path is None:
+        os.makedirs(args.work_dir, exist_ok=True)
+        raw_path = os.path.join(args.work_dir, f"synthetic_{args.size}_seed{args.seed}_fraud{DEFAULT_FRAUD_RATE}.csv")
+        if not os.path.exists(raw_path):
+            generate_csv(raw_path, parse_size(args.size), args.seed, DEFAULT_FRAUD_RATE)
+
+    results = run_benchmark(raw_path, args.compressions, args.threads or default_threads(), args.chunksize, args.repeat)
+    print_results(results)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump({'source': raw_path, 'cpu_count': os.cpu_count(), 'results': results}, report_file, indent=2)
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
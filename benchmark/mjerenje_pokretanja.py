@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT]
+
+from bank_fraud import CHECKPOINT_DIRS, MODULES
+from bank_fraud.cli import COMMANDS
+
+# Teške ovisnosti čiji se uvoz prati za svaki mjereni cilj
+HEAVY_MODULES = ['numpy', 'pandas', 'pyarrow', 'sqlalchemy']
+
+
+# Mjereni ciljevi: (naziv, argumenti interpretera). Svaki se pokreće u novom procesu, pa se mjeri hladan uvoz.
+def targets(modules):
+    runs = [('python (baseline)', ['-c', 'pass']),
+            ('import bank_fraud', ['-c', 'import bank_fraud']),
+            ('import bank_fraud.cli', ['-c', 'import bank_fraud.cli']),
+            ('bank_fraud --help', ['-m', 'bank_fraud', '--help'])]
+    runs += [(f'bank_fraud {command} --help', ['-m', 'bank_fraud', command, '--help'])
+             for command in COMMANDS if command != 'verify']
+    runs += [(f'import {module}', ['-c', f'import {module}']) for module in modules]
+    return runs
+
+
+def environment():
+    return dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, *CHECKPOINT_DIRS]))
+
+
+def time_run(args, repeat, env):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# Teške ovisnosti koje cilj uvede (jedno dodatno pokretanje koje se ne mjeri)
+def heavy_imports(args, env):
+    code = args[1]
+    if args[0] == '-m':
+        code = f"import runpy, sys; sys.argv = {args[1:]!r}; runpy.run_module({args[1]!r}, run_name='__main__')"
+    # Naredbe s --help završavaju sa SystemExit, pa se popis ispisuje u finally
+    probe = (f"try:\n    exec({code!r})\nfinally:\n    import sys\n"
+             f"    print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules), file=sys.stderr)")
+    result = subprocess.run([sys.executable, '-c', probe], env=env, capture_output=True, text=True)
+    lines = result.stderr.strip().splitlines()
+    return lines[-1].split(',') if lines and lines[-1] else []
+
+
+def run_benchmark(modules, repeat=5):
+    env = environment()
+    results = []
+    for name, args in targets(modules):
+        timings = time_run(args, repeat, env)
+        results.append({
+            'target': name,
+            'best_ms': round(min(timings) * 1000, 1),
+            'median_ms': round(statistics.median(timings) * 1000, 1),
+            'heavy_imports': heavy_imports(args, env),
+        })
+    baseline = results[0]['best_ms']
+    for result in results:
+        result['over_baseline_ms'] = round(result['best_ms'] - baseline, 1)
+    return results
+
+
+def print_results(results):
+    print(f"\n{'Target':<45}{'Best ms':>9}{'Median ms':>11}{'+Python ms':>12}  Heavy imports")
+    for result in results:
+        print(f"{result['target']:<45}{result['best_ms']:>9}{result['median_ms']:>11}{result['over_baseline_ms']:>12}"
+              f"  {', '.join(result['heavy_imports']) or '-'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold start-up time of the bank_fraud CLI and of importing "
+                                                 "each pipeline module, each in a fresh interpreter.")
+    parser.add_argument('--modules', nargs='+', choices=list(MODULES), default=list(MODULES),
+                        help="Modules whose import time is measured (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per target; best and median are reported")
+    parser.add_argument('--report', default=None, help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.modules, args.repeat)
+    print_results(results)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results}, report_file,
+                      indent=2)
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import uuid
+from datetime import datetime
+from sqlalchemy import create_engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'checkpoint 2'), os.path.join(ROOT, 'checkpoint 3')]
+
+import dimenzijski_model
+import stvaranje_i_popunjavanje_baze as oltp
+from generator_podataka import DEFAULT_FRAUD_RATE, DEFAULT_SEED, generate_csv, parse_size
+from instrumentacija import PipelineMetrics
+from predprocesiranje_skupa import CHUNK_SIZE, preprocess_streaming
+from punjenje_skladista import run_etl
+from uskladivanje import mismatched_partitions, partition_checksums, stream_database, stream_processed
+
+# Rezultati svih pokretanja (jedan JSON zapis po veličini skupa), za usporedbu kroz vrijeme
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results.jsonl')
+WORK_DIR = 'benchmark_data'
+# Glavne faze cjevovoda koje se uspoređuju s prethodnim pokretanjem
+PIPELINE_STAGES = ['preprocess', 'oltp_populate', 'dw_load', 'reconcile']
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _sqlite_url(work_dir, name):
+    path = os.path.join(work_dir, name)
+    if os.path.exists(path):
+        os.remove(path)
+    return 'sqlite:///' + os.path.abspath(path)
+
+
+def run_size(label, rows, args):
+    metrics = PipelineMetrics(f"benchmark_{label}")
+    prefix = os.path.join(args.work_dir, f"synthetic_{label}_seed{args.seed}_fraud{args.fraud_rate}")
+
+    # Generirani CSV se ponovno koristi između pokretanja (isti seed daje istu datoteku)
+    raw_path = prefix + '.csv'
+    if not os.path.exists(raw_path):
+        with metrics.stage('generate', rows=rows):
+            generate_csv(raw_path, rows, args.seed, args.fraud_rate)
+
+    processed_path = prefix + ('_PROCESSED.parquet' if args.format == 'parquet' else '_PROCESSED.csv')
+    with metrics.stage('preprocess') as stage:
+        stage.rows = preprocess_streaming(raw_path, processed_path, args.chunksize, args.format, metrics)
+
+    oltp_url = args.oltp_url or _sqlite_url(args.work_dir, f"bank_fraud_db_{label}.db")
+    dw_url = args.dw_url or _sqlite_url(args.work_dir, f"bank_fraud_dw_{label}.db")
+    oltp_engine = metrics.track_engine(create_engine(oltp_url))
+    dw_engine = metrics.track_engine(create_engine(dw_url))
+    oltp.Base.metadata.drop_all(oltp_engine)
+    oltp.Base.metadata.create_all(oltp_engine)
+    dimenzijski_model.Base.metadata.drop_all(dw_engine)
+
+    with metrics.stage('oltp_populate') as stage:
+        df = oltp.load_processed_data(processed_path, metrics)
+        if args.load_mode == 'parallel':
+            stage.rows = oltp.populate_parallel(oltp_url, df, args.workers, metrics=metrics)
+        else:
+            stage.rows = oltp.populate_bulk(oltp_engine, df, metrics=metrics)
+        del df
+
+    with metrics.stage('dw_load') as stage:
+        stage.rows = run_etl(oltp_engine, dw_engine, workers=args.workers if args.load_mode == 'parallel' else 1)
+
+    with metrics.stage('reconcile') as stage, oltp_engine.connect() as conn:
+        csv_checksums = partition_checksums(stream_processed(processed_path))
+        db_checksums = partition_checksums(stream_database(conn))
+        stage.rows = int(csv_checksums[0].sum()) + int(db_checksums[0].sum())
+        reconciled = len(mismatched_partitions(csv_checksums, db_checksums)) == 0
+
+    oltp_engine.dispose()
+    dw_engine.dispose()
+    if not args.keep_data:
+        for path in [processed_path] + [url[len('sqlite:///'):] for url in (oltp_url, dw_url) if url.startswith('sqlite:///')]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    metrics.print_summary()
+    return metrics, reconciled, oltp_engine.dialect.name
+
+
+def load_results(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+
+def append_result(record, path=RESULTS_PATH):
+    with open(path, 'a', encoding='utf-8') as results_file:
+        results_file.write(json.dumps(record) + '\n')
+
+
+# Usporedba glavnih faza s posljednjim ranijim ispravnim pokretanjem iste veličine, baze i načina punjenja;
+# pokretanja čiji se podaci nisu uskladili ne služe kao usporedba
+def compare_with_previous(record, history):
+    previous = [old for old in history if old.get('reconciled', True)
+                and (old['size'], old['database'], old['load_mode']) == (record['size'], record['database'], record['load_mode'])]
+    if not previous:
+        print(f"No earlier run for size {record['size']} to compare with.")
+        return
+    before = {stage['stage']: stage for stage in previous[-1]['metrics']['stages']}
+    now = {stage['stage']: stage for stage in record['metrics']['stages']}
+    print(f"\nSize {record['size']}: compared with run {previous[-1]['run_id']} ({previous[-1]['timestamp']}, "
+          f"commit {previous[-1]['git_commit']})")
+    for name in PIPELINE_STAGES:
+        if name in before and name in now and before[name]['wall_seconds'] > 0:
+            change = now[name]['wall_seconds'] / before[name]['wall_seconds'] - 1
+            print(f"  {name:<15}{before[name]['wall_seconds']:>10.2f}s -> {now[name]['wall_seconds']:>10.2f}s ({change:+.1%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time preprocessing, OLTP population, DW load and reconciliation "
+                                                 "on synthetic data of increasing size.")
+    parser.add_argument('--sizes', nargs='+', default=['100k'], help="Sizes to run, e.g. 100k 1M 10M 50M")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Generator seed")
+    parser.add_argument('--fraud-rate', type=float, default=DEFAULT_FRAUD_RATE, help="Share of fraudulent transactions")
+    parser.add_argument('--work-dir', default=WORK_DIR, help="Directory for generated CSVs and SQLite databases")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Preprocessed output format")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Rows per chunk in preprocessing")
+    parser.add_argument('--load-mode', choices=['bulk', 'parallel'], default='bulk', help="OLTP population mode")
+    parser.add_argument('--workers', type=int, default=4, help="Worker processes in parallel mode")
+    parser.add_argument('--oltp-url', default=None, help="OLTP database URL (default: SQLite file in --work-dir)")
+    parser.add_argument('--dw-url', default=None, help="DW database URL (default: SQLite file in --work-dir)")
+    parser.add_argument('--results', default=RESULTS_PATH, help="JSON Lines file that accumulates results")
+    parser.add_argument('--keep-data', action='store_true', help="Keep processed files and databases after each size")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    history = load_results(args.results)
+    run_id = uuid.uuid4().hex[:12]
+    commit = git_commit()
+    failed = []
+    for label in args.sizes:
+        metrics, reconciled, database = run_size(label, parse_size(label), args)
+        record = {
+            'run_id': run_id,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': commit,
+            'size': label,
+            'rows': parse_size(label),
+            'seed': args.seed,
+            'fraud_rate': args.fraud_rate,
+            'database': database,
+            'load_mode': args.load_mode,
+            'workers': args.workers if args.load_mode == 'parallel' else 1,
+            'format': args.format,
+            'reconciled': reconciled,
+            'metrics': metrics.report(),
+        }
+        # Zapis se sprema i kad se podaci ne usklade (reconciled: false), ali se vrijeme ne uspoređuje,
+        # a pokretanje završava greškom
+        append_result(record, args.results)
+        if reconciled:
+            compare_with_previous(record, history)
+        else:
+            failed.append(label)
+            print(f"ERROR: size {label}: processed file and OLTP database do not reconcile; "
+                  f"the run is recorded as invalid.")
+    print(f"Results appended to {args.results}")
+    if failed:
+        raise SystemExit(f"Benchmark failed: data did not reconcile for size(s) {', '.join(failed)}.")
+
+
+if __name__ == '__main__':
+    main()
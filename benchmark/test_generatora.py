@@ -0,0 +1,50 @@
+import filecmp
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from generator_podataka import DEVICES, SOURCE_COLUMNS, generate_csv, parse_size
+
+
+class TestGenerator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'a.csv')
+        generate_csv(cls.path, 3000, seed=7, fraud_rate=0.1)
+        cls.df = pd.read_csv(cls.path)
+
+    def test_same_seed_same_file(self):
+        other = os.path.join(self.tmp.name, 'b.csv')
+        generate_csv(other, 3000, seed=7, fraud_rate=0.1)
+        self.assertTrue(filecmp.cmp(self.path, other, shallow=False))
+        generate_csv(other, 3000, seed=8, fraud_rate=0.1)
+        self.assertFalse(filecmp.cmp(self.path, other, shallow=False))
+
+    def test_source_schema(self):
+        self.assertListEqual(list(self.df.columns), SOURCE_COLUMNS)
+        self.assertEqual(len(self.df), 3000)
+        self.assertTrue(self.df['Transaction_ID'].is_unique)
+        self.assertFalse(self.df.isnull().any().any())
+        pd.to_datetime(self.df['Transaction_Date'] + ' ' + self.df['Transaction_Time'], format="%d-%m-%Y %H:%M:%S")
+
+    def test_cardinalities(self):
+        # Atributi kupca i kategorija trgovca isti su u svim transakcijama; naziv uređaja određuje tip
+        customer_attributes = ['Customer_Name', 'Gender', 'Age', 'City', 'State', 'Account_Type', 'Customer_Email']
+        self.assertEqual(self.df.groupby('Customer_ID')[customer_attributes].nunique().max().max(), 1)
+        self.assertEqual(self.df.groupby('Merchant_ID')['Merchant_Category'].nunique().max(), 1)
+        self.assertTrue((self.df['Transaction_Device'].map(DEVICES) == self.df['Device_Type']).all())
+        self.assertLessEqual(self.df['Customer_ID'].nunique(), 300)
+        self.assertAlmostEqual(self.df['Is_Fraud'].mean(), 0.1, delta=0.03)
+
+    def test_parse_size(self):
+        self.assertEqual([parse_size(size) for size in ['100k', '50M', '250k', '1500']], [100_000, 50_000_000, 250_000, 1500])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
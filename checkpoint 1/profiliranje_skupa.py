@@ -0,0 +1,258 @@
+import argparse
+import html
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'checkpoint 2'))
+from citanje_izvora import READERS, iter_csv_arrow, open_source
+
+PATH = "C:\\Users\\Petra\\Desktop\\FIPU\\3\\SRP\\Bank_Transaction_Fraud_Detection.csv"
+PROFILE_JSON_PATH = "Bank_Transaction_Fraud_Detection_PROFILE.json"
+PROFILE_HTML_PATH = "Bank_Transaction_Fraud_Detection_PROFILE.html"
+
+# Broj redaka po dijelu; memorija ovisi o dijelu i fiksnom stanju po stupcu, ne o veličini datoteke
+CHUNK_SIZE = 100000
+TOP_K = 10
+# Broj brojača po stupcu za najčešće vrijednosti (Misra-Gries); točni su dok stupac ima manje različitih vrijednosti
+FREQUENCY_COUNTERS = 1000
+# HyperLogLog: 2^14 registara, standardna pogreška ~1.04 / sqrt(2^14) ≈ 0.8 %
+HLL_PRECISION = 14
+
+
+# Približan broj različitih vrijednosti (HyperLogLog nad 64-bitnim hashom vrijednosti)
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest_bits = 64 - self.precision
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # Položaj najljevijeg postavljenog bita u preostalih rest_bits bitova (1 = najviši bit)
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest > 0
+        exponent = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64)
+        # Zaokruživanje u float64 može precijeniti eksponent za vrijednosti tik ispod potencije broja 2
+        exponent -= (np.left_shift(np.uint64(1), exponent.astype(np.uint64)) > rest[nonzero]).astype(np.int64)
+        bit_length[nonzero] = exponent + 1
+        rank = (rest_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            # Linearno brojanje za mali broj vrijednosti
+            return m * math.log(m / zeros)
+        return raw
+
+
+# Najčešće vrijednosti s ograničenim brojem brojača (spojivi Misra-Gries sažetak, po jedan dio odjednom)
+class FrequentValues:
+    def __init__(self, capacity=FREQUENCY_COUNTERS):
+        self.capacity = capacity
+        self.counters = pd.Series(dtype=np.int64)
+        # Zbroj oduzimanja: stvarna frekvencija je između procjene i procjene + error_bound
+        self.error_bound = 0
+
+    def add(self, values):
+        counts = values.value_counts(sort=False)
+        counts.index = counts.index.astype(object)
+        self.counters = counts if self.counters.empty else self.counters.add(counts, fill_value=0).astype(np.int64)
+        if len(self.counters) > self.capacity:
+            threshold = int(self.counters.nlargest(self.capacity + 1).iloc[-1])
+            self.counters = self.counters[self.counters > threshold] - threshold
+            self.error_bound += threshold
+
+    def top(self, k=TOP_K):
+        return self.counters.nlargest(k)
+
+
+def _merge_dtype(current, new):
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new) \
+            and not pd.api.types.is_bool_dtype(current) and not pd.api.types.is_bool_dtype(new):
+        return np.result_type(current, new)
+    return np.dtype(object)
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class ColumnProfile:
+    def __init__(self, name, top_k=TOP_K, hll_precision=HLL_PRECISION):
+        self.name = name
+        self.top_k = top_k
+        self.dtype = None
+        self.count = 0
+        self.nulls = 0
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.min_length = None
+        self.max_length = None
+        self.distinct = HyperLogLog(hll_precision)
+        self.frequent = FrequentValues(max(FREQUENCY_COUNTERS, top_k))
+
+    @property
+    def is_numeric(self):
+        return pd.api.types.is_numeric_dtype(self.dtype) and not pd.api.types.is_bool_dtype(self.dtype)
+
+    def add(self, series):
+        self.dtype = _merge_dtype(self.dtype, series.dtype)
+        self.count += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.distinct.add(values.to_numpy())
+        self.frequent.add(values)
+        if not len(values):
+            return
+        if self.is_numeric:
+            low, high = values.min(), values.max()
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+            self.total += float(values.sum())
+        else:
+            lengths = values.astype(str).str.len()
+            self.min_length = int(lengths.min()) if self.min_length is None else min(self.min_length, int(lengths.min()))
+            self.max_length = int(lengths.max()) if self.max_length is None else max(self.max_length, int(lengths.max()))
+
+    def as_dict(self):
+        non_null = self.count - self.nulls
+        profile = {
+            'column': self.name,
+            'dtype': str(self.dtype),
+            'count': self.count,
+            'nulls': self.nulls,
+            'null_ratio': self.nulls / self.count if self.count else 0.0,
+            'approx_distinct': int(round(min(self.distinct.estimate(), non_null))),
+        }
+        if self.is_numeric:
+            profile.update({
+                'min': _json_value(self.minimum),
+                'max': _json_value(self.maximum),
+                'mean': self.total / non_null if non_null else None,
+            })
+        else:
+            profile.update({'min_length': self.min_length, 'max_length': self.max_length})
+        profile['top_values'] = [{'value': _json_value(value), 'count': int(count)}
+                                 for value, count in self.frequent.top(self.top_k).items()]
+        profile['top_values_error_bound'] = self.frequent.error_bound
+        return profile
+
+
+# Jedan prolaz kroz datoteku u dijelovima; svi pokazatelji svih stupaca računaju se iz istog dijela.
+# reader='arrow' parsira blokove višedretveno (tipovi iz jednom zaključene sheme); .gz/.zst se raspakiravaju u hodu.
+def profile_csv(path=PATH, chunksize=CHUNK_SIZE, top_k=TOP_K, hll_precision=HLL_PRECISION, reader='pandas',
+                threads=None):
+    start = time.perf_counter()
+    columns = {}
+    rows = 0
+    head = None
+    if reader == 'arrow':
+        chunks = iter_csv_arrow(path, chunksize, threads=threads)
+    else:
+        chunks = pd.read_csv(open_source(path), delimiter=',', chunksize=chunksize)
+    for chunk in chunks:
+        if head is None:
+            head = chunk.head()
+        rows += len(chunk)
+        for name in chunk.columns:
+            if name not in columns:
+                columns[name] = ColumnProfile(name, top_k, hll_precision)
+            columns[name].add(chunk[name])
+    elapsed = time.perf_counter() - start
+    return {
+        'source': path,
+        'reader': reader,
+        'rows': rows,
+        'columns': len(columns),
+        'column_names': list(columns),
+        'seconds': round(elapsed, 3),
+        'head': json.loads(head.to_json(orient='records')) if head is not None else [],
+        'profile': [column.as_dict() for column in columns.values()],
+    }
+
+
+def write_json(profile, path=PROFILE_JSON_PATH):
+    with open(path, 'w', encoding='utf-8') as profile_file:
+        json.dump(profile, profile_file, indent=2, ensure_ascii=False)
+    print(f"Profile saved to {path}")
+
+
+def render_html(profile):
+    def cell(value):
+        if isinstance(value, float):
+            value = f"{value:.4g}"
+        return f"<td>{html.escape('' if value is None else str(value))}</td>"
+
+    headers = ['column', 'dtype', 'count', 'nulls', 'approx_distinct', 'min', 'max', 'mean', 'min_length', 'max_length']
+    rows = []
+    for column in profile['profile']:
+        top = ', '.join(f"{item['value']} ({item['count']})" for item in column['top_values'])
+        rows.append('<tr>' + ''.join(cell(column.get(header)) for header in headers) + cell(top) + '</tr>')
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Profile</title>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}</style></head><body>\n"
+        f"<h1>{html.escape(profile['source'])}</h1>\n"
+        f"<p>{profile['rows']} rows, {profile['columns']} columns, profiled in {profile['seconds']}s</p>\n"
+        "<table><tr>" + ''.join(f"<th>{header}</th>" for header in headers) + "<th>top values</th></tr>\n"
+        + '\n'.join(rows) + "\n</table></body></html>\n"
+    )
+
+
+def write_html(profile, path=PROFILE_HTML_PATH):
+    with open(path, 'w', encoding='utf-8') as profile_file:
+        profile_file.write(render_html(profile))
+    print(f"Profile saved to {path}")
+
+
+def print_summary(profile):
+    print(f"Shape: ({profile['rows']}, {profile['columns']})")
+    print(f"Columns: {profile['column_names']}")
+    print(f"\n{'Column':<26}{'dtype':<10}{'Nulls':>8}{'~Distinct':>12}  Top values")
+    for column in profile['profile']:
+        top = ', '.join(f"{item['value']} ({item['count']})" for item in column['top_values'][:3])
+        print(f"{column['column']:<26}{column['dtype']:<10}{column['nulls']:>8}{column['approx_distinct']:>12}  {top}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the Bank Transaction Fraud Detection CSV in one chunked pass.")
+    parser.add_argument('--input', default=PATH, help="CSV file to profile")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument('--top-k', type=int, default=TOP_K, help="Most frequent values reported per column")
+    parser.add_argument('--hll-precision', type=int, default=HLL_PRECISION,
+                        help="HyperLogLog precision p (2^p registers per column)")
+    parser.add_argument('--reader', choices=READERS, default='pandas',
+                        help="pandas: single-threaded pd.read_csv; arrow: multithreaded block parser")
+    parser.add_argument('--threads', type=int, default=None, help="Parser threads for the arrow reader (default: all cores)")
+    parser.add_argument('--json', default=PROFILE_JSON_PATH, help="JSON profile output")
+    parser.add_argument('--html', default=PROFILE_HTML_PATH, help="HTML profile output")
+    args = parser.parse_args(argv)
+
+    profile = profile_csv(args.input, args.chunksize, args.top_k, args.hll_precision, args.reader, args.threads)
+    print_summary(profile)
+    write_json(profile, args.json)
+    write_html(profile, args.html)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from profiliranje_skupa import FrequentValues, HyperLogLog, profile_csv
+
+
+class TestSketches(unittest.TestCase):
+    def test_hyperloglog(self):
+        hll = HyperLogLog()
+        values = np.array([f"T{i}" for i in range(200000)], dtype=object)
+        # Duplikati i redoslijed dijelova ne mijenjaju procjenu
+        for part in np.array_split(np.concatenate([values, values[:50000]]), 7):
+            hll.add(part)
+        self.assertAlmostEqual(hll.estimate() / 200000, 1.0, delta=0.03)
+        small = HyperLogLog()
+        small.add(np.array(['a', 'b', 'c', 'a']))
+        self.assertEqual(round(small.estimate()), 3)
+
+    def test_frequent_values(self):
+        rng = np.random.default_rng(0)
+        values = pd.Series(np.concatenate([np.repeat(['x', 'y'], [5000, 3000]), rng.integers(0, 100000, 20000).astype(str)]))
+        values = values.sample(frac=1, random_state=0)
+        frequent = FrequentValues(capacity=50)
+        for start in range(0, len(values), 2800):
+            frequent.add(values.iloc[start:start + 2800])
+        top = frequent.top(2)
+        self.assertListEqual(list(top.index), ['x', 'y'])
+        exact = values.value_counts()
+        # Procjena je donja granica, najviše error_bound ispod stvarne frekvencije
+        for value, count in top.items():
+            self.assertLessEqual(count, exact[value])
+            self.assertGreaterEqual(count + frequent.error_bound, exact[value])
+
+
+class TestProfile(unittest.TestCase):
+    def test_profile_csv(self):
+        df = pd.DataFrame({
+            'Customer_ID': ['C1', 'C2', 'C1', None, 'C3', 'C1'],
+            'Age': [34, 51, 34, 27, 40, 34],
+            'Transaction_Amount': [10.5, None, 3.5, 100.0, 6.0, 0.0],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.csv')
+            df.to_csv(path, index=False)
+            profile = profile_csv(path, chunksize=4)
+        self.assertEqual(profile['rows'], 6)
+        columns = {column['column']: column for column in profile['profile']}
+        self.assertEqual(columns['Customer_ID']['nulls'], 1)
+        self.assertEqual(columns['Customer_ID']['approx_distinct'], 3)
+        self.assertEqual(columns['Customer_ID']['top_values'][0], {'value': 'C1', 'count': 3})
+        self.assertEqual((columns['Age']['min'], columns['Age']['max'], columns['Age']['dtype']), (27, 51, 'int64'))
+        self.assertAlmostEqual(columns['Transaction_Amount']['mean'], 24.0)
+        self.assertEqual(columns['Transaction_Amount']['nulls'], 1)
+
+    def test_arrow_reader_compressed(self):
+        df = pd.DataFrame({
+            'Customer_ID': [f"C{i % 5}" if i % 9 else None for i in range(500)],
+            'Age': [20 + i % 40 for i in range(500)],
+            'Transaction_Amount': [i / 4 for i in range(500)],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.csv.gz')
+            df.to_csv(path, index=False)
+            expected = profile_csv(path, chunksize=128)
+            profile = profile_csv(path, chunksize=128, reader='arrow', threads=2)
+        self.assertEqual(profile['rows'], 500)
+        self.assertEqual(profile['head'], expected['head'])
+        for column, arrow_column in zip(expected['profile'], profile['profile']):
+            self.assertEqual(arrow_column, column)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,162 @@
+import os
+import re
+import pyarrow as pa
+import pyarrow.csv as pv
+
+# Načini čitanja izvornog CSV-a: pandas (jedna dretva) ili Arrow (višedretveno parsiranje blokova)
+READERS = ['pandas', 'arrow']
+
+# Kompresija izvora prema nastavku datoteke; ostale datoteke čitaju se nekomprimirane
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.zst': 'zstd', '.zstd': 'zstd', '.bz2': 'bz2'}
+# Veličina bloka koji parsira jedna dretva; shema se zaključuje iz prvog bloka
+BLOCK_SIZE = 1 << 22
+# Zaključena shema sprema se uz izvor i vrijedi dok se veličina i vrijeme izmjene izvora ne promijene
+SCHEMA_SUFFIX = '.schema.arrow'
+
+# Sheme već zaključene u ovom procesu: (putanja, veličina, vrijeme izmjene) -> pa.Schema
+_schemas = {}
+# Indeks stupca (u zaglavlju datoteke) iz poruke o neuspjeloj pretvorbi vrijednosti u zaključeni tip
+CONVERSION_ERROR = re.compile(r"CSV column #(\d+): .*CSV conversion error", re.DOTALL)
+
+
+def detect_compression(path):
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(path)[1].lower())
+
+
+# Ulazni tok s dekompresijom u hodu (gzip/zstd se ne raspakiravaju u privremenu datoteku)
+def open_source(path, compression='detect'):
+    if compression == 'detect':
+        compression = detect_compression(path)
+    return pa.input_stream(path, compression=compression, buffer_size=BLOCK_SIZE)
+
+
+# Broj dretvi Arrowa za parsiranje i pretvorbu stupaca (globalna postavka procesa; None = sve jezgre)
+def set_threads(threads=None):
+    if threads:
+        pa.set_cpu_count(threads)
+    return pa.cpu_count()
+
+
+def _read_options(block_size, skip_rows=0):
+    return pv.ReadOptions(use_threads=True, block_size=block_size, skip_rows_after_names=skip_rows)
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}".encode()
+
+
+def _load_schema(schema_path, fingerprint):
+    try:
+        with open(schema_path, 'rb') as schema_file:
+            schema = pa.ipc.read_schema(pa.py_buffer(schema_file.read()))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if (schema.metadata or {}).get(b'source') != fingerprint:
+        return None
+    return schema.remove_metadata()
+
+
+def _save_schema(schema, schema_path, fingerprint):
+    try:
+        with open(schema_path, 'wb') as schema_file:
+            schema_file.write(schema.with_metadata({b'source': fingerprint}).serialize().to_pybytes())
+    except OSError:
+        # Direktorij izvora može biti samo za čitanje; shema tada ostaje samo u memoriji procesa
+        pass
+
+
+# Shema izvora zaključena jednom (iz prvog bloka) i zatim čitana iz memorije ili datoteke uz izvor
+def infer_schema(path, block_size=BLOCK_SIZE, schema_path=None):
+    fingerprint = _fingerprint(path)
+    key = (os.path.abspath(path), fingerprint)
+    if key in _schemas:
+        return _schemas[key]
+    schema_path = schema_path or path + SCHEMA_SUFFIX
+    schema = _load_schema(schema_path, fingerprint)
+    if schema is None:
+        with open_source(path) as source, pv.open_csv(source, read_options=_read_options(block_size),
+                                                      convert_options=pv.ConvertOptions(strings_can_be_null=True)) as reader:
+            schema = reader.schema
+        _save_schema(schema, schema_path, fingerprint)
+    _schemas[key] = schema
+    return schema
+
+
+# Vrijednost izvan prvog bloka koja ne odgovara zaključenom tipu (npr. 'abc' u stupcu int64): stupac iz poruke
+# o grešci se u shemi (i u memoriji i u datoteci uz izvor) mijenja u tekst, pa se čitanje može ponoviti
+def widen_schema(path, schema, error, schema_path=None):
+    match = CONVERSION_ERROR.search(str(error))
+    if match is None or int(match.group(1)) >= len(schema):
+        raise error
+    index = int(match.group(1))
+    if schema.field(index).type == pa.string():
+        raise error
+    schema = schema.set(index, schema.field(index).with_type(pa.string()))
+    fingerprint = _fingerprint(path)
+    _schemas[(os.path.abspath(path), fingerprint)] = schema
+    _save_schema(schema, schema_path or path + SCHEMA_SUFFIX, fingerprint)
+    return schema
+
+
+# Tipovi stupaca iz zaključene sheme; string_columns se čitaju kao tekst bez pretvorbe
+# (kao dtype 'object' u pd.read_csv), a prazne vrijednosti i 'NA'/'NULL' postaju nedostajuće kao u pandasu
+def _convert_options(schema, string_columns=(), columns=None):
+    column_types = {field.name: field.type for field in schema}
+    column_types.update({column: pa.string() for column in string_columns if column in column_types})
+    return pv.ConvertOptions(column_types=column_types, strings_can_be_null=True,
+                             include_columns=list(columns) if columns is not None else None)
+
+
+# Cijeli izvor odjednom; blokove parsira više dretvi usporedno
+def read_csv_arrow(path, string_columns=(), columns=None, threads=None, block_size=BLOCK_SIZE, schema_path=None):
+    set_threads(threads)
+    schema = infer_schema(path, block_size, schema_path)
+    while True:
+        try:
+            with open_source(path) as source:
+                table = pv.read_csv(source, read_options=_read_options(block_size),
+                                    convert_options=_convert_options(schema, string_columns, columns))
+            return table.to_pandas()
+        except pa.ArrowInvalid as error:
+            schema = widen_schema(path, schema, error, schema_path)
+
+
+# Izvor u dijelovima od točno chunksize redaka (zadnji može biti manji), uz ograničenu memoriju;
+# Arrow blokovi se spajaju i režu na granice dijelova, pa dijelovi odgovaraju pd.read_csv(chunksize=...).
+# Ako pretvorba nekog stupca ne uspije kasnije u datoteci, stupac se proširuje u tekst i čitanje se nastavlja
+# od prvog neisporučenog retka (raniji dijelovi zadržavaju zaključeni tip, kao kod pd.read_csv po dijelovima).
+def iter_csv_arrow(path, chunksize, string_columns=(), columns=None, threads=None, block_size=BLOCK_SIZE,
+                   schema_path=None):
+    set_threads(threads)
+    schema = infer_schema(path, block_size, schema_path)
+    delivered = 0
+    while True:
+        try:
+            for chunk in _iter_chunks(path, chunksize, _convert_options(schema, string_columns, columns), block_size,
+                                      delivered):
+                yield chunk
+                delivered += len(chunk)
+            return
+        except pa.ArrowInvalid as error:
+            schema = widen_schema(path, schema, error, schema_path)
+
+
+def _iter_chunks(path, chunksize, convert_options, block_size, skip_rows):
+    with open_source(path) as source, pv.open_csv(source, read_options=_read_options(block_size, skip_rows),
+                                                  convert_options=convert_options) as reader:
+        buffered = []
+        buffered_rows = 0
+        for batch in reader:
+            buffered.append(batch)
+            buffered_rows += batch.num_rows
+            if buffered_rows < chunksize:
+                continue
+            table = pa.Table.from_batches(buffered)
+            while len(table) >= chunksize:
+                yield table.slice(0, chunksize).to_pandas()
+                table = table.slice(chunksize)
+            buffered = table.to_batches()
+            buffered_rows = len(table)
+        if buffered_rows:
+            yield pa.Table.from_batches(buffered).to_pandas()
@@ -0,0 +1,153 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Najveći RSS procesa do sada (MB); resource na Linuxu/macOS-u, psutil (ako je instaliran) na Windowsima
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss je u bajtovima na macOS-u, a u KB na Linuxu
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class StageMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.rows = 0
+        self.db_round_trips = 0
+        self.peak_rss_mb = None
+        self.rss_growth_mb = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.wall_seconds if self.wall_seconds > 0 else None
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'rows': self.rows,
+            'rows_per_sec': round(self.rows_per_sec, 1) if self.rows_per_sec is not None else None,
+            'peak_rss_mb': round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            'rss_growth_mb': round(self.rss_growth_mb, 1),
+            'db_round_trips': self.db_round_trips,
+        }
+
+
+# Mjerenja po fazama cjevovoda. Ponovljena faza istog imena (npr. po dijelu skupa) zbraja se u isti zapis.
+# Povratni pozivi prema bazi broje se kao izvršavanja kursora na praćenim engine-ima (execute i executemany).
+class PipelineMetrics:
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.round_trips = 0
+        self._tracked = []
+
+    def track_engine(self, engine):
+        # SQLAlchemy se uvozi tek ovdje: mjerenja faza bez baze (profiliranje, predprocesiranje) ne plaćaju njegov uvoz
+        from sqlalchemy import event
+        if not any(tracked is engine for tracked in self._tracked):
+            event.listen(engine, 'before_cursor_execute', self._count_round_trip)
+            self._tracked.append(engine)
+        return engine
+
+    def _count_round_trip(self, *args):
+        self.round_trips += 1
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = StageMetrics(name)
+        return self.stages[name]
+
+    # Mjeri blok koda; stage.rows se može postaviti ili povećati unutar bloka
+    @contextmanager
+    def stage(self, name, rows=0):
+        stage = self._stage(name)
+        stage.rows += rows
+        rss_before = peak_rss_mb()
+        trips_before = self.round_trips
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.wall_seconds += time.perf_counter() - start
+            stage.db_round_trips += self.round_trips - trips_before
+            stage.calls += 1
+            self._record_rss(stage, rss_before)
+
+    # Mjeri dohvat svakog elementa iteratora (npr. čitanje dijela CSV-a); redaka = len(element)
+    def timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    stage.calls -= 1
+                    return
+                stage.rows += len(item)
+            yield item
+
+    # Rezultat izmjeren drugdje (npr. u radnom procesu) dodaje se fazi
+    def add(self, name, wall_seconds, rows, db_round_trips=0, peak_rss=None):
+        stage = self._stage(name)
+        stage.calls += 1
+        stage.wall_seconds += wall_seconds
+        stage.rows += rows
+        stage.db_round_trips += db_round_trips
+        if peak_rss is not None:
+            stage.peak_rss_mb = max(stage.peak_rss_mb or 0.0, peak_rss)
+
+    def _record_rss(self, stage, rss_before):
+        rss_after = peak_rss_mb()
+        if rss_after is None:
+            return
+        stage.peak_rss_mb = max(stage.peak_rss_mb or 0.0, rss_after)
+        stage.rss_growth_mb += rss_after - rss_before
+
+    def report(self):
+        return {
+            'pipeline': self.pipeline,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+            'db_round_trips': self.round_trips,
+            'stages': [stage.as_dict() for stage in self.stages.values()],
+        }
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+        print(f"Metrics report saved to {path}")
+
+    def print_summary(self):
+        print(f"\n{'Stage':<28}{'Seconds':>10}{'Rows':>12}{'Rows/sec':>12}{'Peak RSS MB':>13}{'DB trips':>10}")
+        for stage in self.stages.values():
+            values = stage.as_dict()
+            print(f"{stage.name:<28}{values['wall_seconds']:>10.3f}{values['rows']:>12}"
+                  f"{values['rows_per_sec'] or 0:>12.0f}{values['peak_rss_mb'] or 0:>13.1f}{values['db_round_trips']:>10}")
+
+
+# Kao metrics.stage, ali bez mjerenja kad metrics nije zadan (funkcije koje se pozivaju i bez instrumentacije)
+@contextmanager
+def measure(metrics, name, rows=0):
+    if metrics is None:
+        yield StageMetrics(name)
+    else:
+        with metrics.stage(name, rows) as stage:
+            yield stage
@@ -0,0 +1,88 @@
+from itertools import repeat
+import numpy as np
+import pandas as pd
+
+# Tekstualni stupci visokog kardinaliteta koji se u memoriji drže kao cjelobrojni kodovi u zajednički rječnik
+ENCODED_COLUMNS = [
+    'Customer_ID', 'Customer_Name', 'Customer_Email', 'Customer_Contact', 'Transaction_Description',
+    'Transaction_Location', 'Merchant_ID', 'Transaction_ID',
+]
+
+
+# Rječnik nizova (interning): svaka različita vrijednost sprema se jednom, a stupci sadrže samo int32 kodove.
+# Kodovi su stabilni (nove vrijednosti se dodaju na kraj), pa su jednake vrijednosti iz različitih
+# okvira ili serija kodirane istim kodom i uspoređuju se/grupiraju kao cijeli brojevi. -1 je nedostajuća vrijednost.
+class StringPool:
+    def __init__(self):
+        self.values = pd.Index([], dtype=object)
+        # Vrijednost -> kod; gradi se tek kad je potreban (prvo kodiranje u prazan rječnik ga ne treba)
+        self._lookup = None
+        self._dtype = None
+
+    def __len__(self):
+        return len(self.values)
+
+    # Kodovi za različite, nenedostajuće vrijednosti; nepoznate se dodaju u rječnik
+    def _intern(self, uniques):
+        if not len(self.values):
+            self.values = pd.Index(uniques)
+            return np.arange(len(uniques), dtype=np.int32)
+        if self._lookup is None:
+            self._lookup = dict(zip(self.values, range(len(self.values))))
+        uniques = np.asarray(uniques, dtype=object)
+        codes = np.fromiter(map(self._lookup.get, uniques, repeat(-1)), dtype=np.int64, count=len(uniques))
+        new = codes < 0
+        if new.any():
+            added = uniques[new]
+            codes[new] = np.arange(len(self.values), len(self.values) + len(added))
+            self._lookup.update(zip(added, codes[new].tolist()))
+            self.values = self.values.append(pd.Index(added, dtype=self.values.dtype))
+        return codes.astype(np.int32)
+
+    # Kodovi za Series/polje nizova ili za category stupac (tada se kodiraju samo kategorije)
+    def encode(self, values):
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            categorical = pd.Categorical(values)
+            local_codes, uniques = categorical.codes, categorical.categories
+        else:
+            local_codes, uniques = pd.factorize(values)
+        mapping = self._intern(uniques)
+        if not len(mapping):
+            return np.full(len(local_codes), -1, dtype=np.int32)
+        return np.where(local_codes >= 0, mapping[local_codes], -1).astype(np.int32)
+
+    def decode(self, codes):
+        codes = np.asarray(codes)
+        return np.where(codes >= 0, np.asarray(self.values.take(np.maximum(codes, 0)), dtype=object), None)
+
+    # Zajednički CategoricalDtype: kategorije su vrijednosti rječnika redom kodova
+    def dtype(self):
+        if self._dtype is None or len(self._dtype.categories) != len(self.values):
+            self._dtype = pd.CategoricalDtype(self.values)
+        return self._dtype
+
+    def categorical(self, values):
+        return pd.Categorical.from_codes(self.encode(values), dtype=self.dtype())
+
+
+# Zamjenjuje tekstualne stupce category stupcima nad rječnicima iz pools (naziv stupca -> StringPool).
+# Okviri kodirani istim pools imaju iste kodove; nakon kodiranja više okvira, with_pool_dtypes
+# izjednačava kategorije (kodovi se ne mijenjaju) pa su stupci izravno usporedivi.
+def encode_frame(df, pools=None, columns=ENCODED_COLUMNS):
+    pools = pools if pools is not None else {}
+    for column in columns:
+        if column in df.columns:
+            pool = pools.setdefault(column, StringPool())
+            df[column] = pool.categorical(df[column])
+    return df
+
+
+def with_pool_dtypes(df, pools):
+    for column, pool in pools.items():
+        if column in df.columns:
+            df[column] = pd.Categorical.from_codes(df[column].cat.codes, dtype=pool.dtype())
+    return df
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
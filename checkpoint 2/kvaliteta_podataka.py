@@ -0,0 +1,200 @@
+import json
+import numpy as np
+import pandas as pd
+from kodiranje_nizova import StringPool
+
+# Fiksni format spojenog datuma i vremena (isti kao u predprocesiranje_skupa)
+DATETIME_FORMAT = "%d-%m-%Y %H:%M:%S"
+
+KEY_COLUMNS = ['Customer_ID', 'Transaction_ID', 'Merchant_ID']
+# Stupci koji u OLTP shemi postaju strani ključevi prema šifarnicima (uređaj, lokacija, vrste...);
+# prazna vrijednost dala bi NULL ključ koji punjenje skladišta i usklađivanje ne mogu razriješiti
+LOOKUP_COLUMNS = ['Transaction_Device', 'Device_Type', 'Transaction_Location', 'Transaction_Type', 'Merchant_Category',
+                  'Account_Type', 'Bank_Branch', 'Transaction_Currency']
+REQUIRED_COLUMNS = KEY_COLUMNS + ['Transaction_Date', 'Transaction_Time', 'Age', 'Transaction_Amount',
+                                  'Account_Balance', 'Is_Fraud'] + LOOKUP_COLUMNS
+# Iznosi u izvoru mogu sadržavati znak valute i separator tisućica ("$1,234.50")
+AMOUNT_COLUMNS = ['Transaction_Amount', 'Account_Balance']
+NUMERIC_COLUMNS = ['Age', 'Is_Fraud'] + AMOUNT_COLUMNS
+MAX_AMOUNT = 1e9
+
+# Dopuštene vrijednosti stupaca koji u OLTP shemi postaju strani ključevi prema šifarnicima
+KNOWN_VALUES = {
+    'Gender': ['Male', 'Female'],
+    'Account_Type': ['Savings', 'Business', 'Checking'],
+    'Transaction_Type': ['Credit', 'Debit', 'Transfer', 'Withdrawal', 'Bill Payment'],
+    'Merchant_Category': ['Restaurant', 'Groceries', 'Entertainment', 'Health', 'Clothing', 'Electronics'],
+    'Device_Type': ['POS', 'Mobile', 'Desktop', 'ATM'],
+    'Transaction_Currency': ['INR'],
+}
+
+
+# Pravilo kvalitete: kod razloga (zapisuje se uz odbačeni redak), vrsta provjere, stupci i parametri.
+# Provjere (CHECKS) vraćaju masku redaka koji krše pravilo, za cijelu seriju odjednom.
+class Rule:
+    def __init__(self, code, kind, columns, **params):
+        self.code = code
+        self.kind = kind
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        self.params = params
+
+
+def default_rules(known_values=KNOWN_VALUES):
+    return [
+        Rule('missing_value', 'not_null', REQUIRED_COLUMNS),
+        Rule('bad_number', 'numeric', NUMERIC_COLUMNS),
+        Rule('bad_datetime', 'datetime', 'Transaction_DateTime'),
+        Rule('age_out_of_range', 'range', 'Age', low=0, high=120, integer=True),
+        Rule('amount_out_of_range', 'range', 'Transaction_Amount', low=0, high=MAX_AMOUNT),
+        Rule('balance_out_of_range', 'range', 'Account_Balance', low=0, high=MAX_AMOUNT),
+        Rule('bad_fraud_flag', 'range', 'Is_Fraud', low=0, high=1, integer=True),
+    ] + [
+        Rule(f"unknown_{column.lower()}", 'known', column, values=values) for column, values in known_values.items()
+    ] + [
+        Rule('duplicate_transaction_id', 'unique', 'Transaction_ID'),
+    ]
+
+
+# Tipizirani stupci serije: iznosi bez znaka valute i separatora, brojevi i datum/vrijeme
+# (neparsirane vrijednosti postaju NaN/NaT, a pravila ih razlikuju od nedostajućih po izvornom stupcu)
+def parse_columns(chunk):
+    typed = {}
+    for column in NUMERIC_COLUMNS:
+        values = chunk[column]
+        if column in AMOUNT_COLUMNS and not pd.api.types.is_numeric_dtype(values):
+            values = values.astype('string').str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+        typed[column] = pd.to_numeric(values, errors='coerce').astype('float64')
+    if 'Transaction_DateTime' in chunk.columns:
+        typed['Transaction_DateTime'] = pd.to_datetime(chunk['Transaction_DateTime'], errors='coerce')
+    else:
+        typed['Transaction_DateTime'] = pd.to_datetime(chunk['Transaction_Date'] + ' ' + chunk['Transaction_Time'],
+                                                       format=DATETIME_FORMAT, errors='coerce')
+    return typed
+
+
+def _not_null(chunk, typed, rule, stage):
+    failed = np.zeros(len(chunk), dtype=bool)
+    for column in rule.columns:
+        failed |= chunk[column].isna().to_numpy()
+    return failed
+
+
+def _numeric(chunk, typed, rule, stage):
+    failed = np.zeros(len(chunk), dtype=bool)
+    for column in rule.columns:
+        failed |= (chunk[column].notna() & typed[column].isna()).to_numpy()
+    return failed
+
+
+def _datetime(chunk, typed, rule, stage):
+    source = ['Transaction_DateTime'] if 'Transaction_DateTime' in chunk.columns else ['Transaction_Date', 'Transaction_Time']
+    present = np.logical_and.reduce([chunk[column].notna().to_numpy() for column in source])
+    return present & typed['Transaction_DateTime'].isna().to_numpy()
+
+
+def _range(chunk, typed, rule, stage):
+    values = typed[rule.columns[0]]
+    failed = (values < rule.params['low']) | (values > rule.params['high'])
+    if rule.params.get('integer'):
+        failed |= values % 1 != 0
+    return failed.fillna(False).to_numpy(dtype=bool)
+
+
+def _known(chunk, typed, rule, stage):
+    values = chunk[rule.columns[0]]
+    return (values.notna() & ~values.isin(rule.params['values'])).to_numpy()
+
+
+# Ponovljeni ključ unutar serije ili iz ranije serije iste faze (i kad je raniji redak odbačen);
+# prvo pojavljivanje se zadržava. Viđeni ključevi drže se u rječniku nizova (kod manji od veličine
+# rječnika prije serije znači da je ključ već viđen).
+def _unique(chunk, typed, rule, stage):
+    values = chunk[rule.columns[0]]
+    failed = values.duplicated().to_numpy() & values.notna().to_numpy()
+    if stage.track_duplicates:
+        pool = stage.seen.setdefault(rule.code, StringPool())
+        known = len(pool)
+        codes = pool.encode(values)
+        failed |= (codes >= 0) & (codes < known)
+    return failed
+
+
+CHECKS = {
+    'not_null': _not_null,
+    'numeric': _numeric,
+    'datetime': _datetime,
+    'range': _range,
+    'known': _known,
+    'unique': _unique,
+}
+
+
+# Faza provjere kvalitete: sva pravila se računaju kao maske nad cijelom serijom, odbačeni retci
+# (izvorne vrijednosti i kodovi svih prekršenih pravila) idu u karantenu, a po pravilu se broje odbacivanja.
+# track_duplicates pamti sve viđene Transaction_ID-eve između serija (memorija raste s brojem transakcija).
+class QualityStage:
+    def __init__(self, rules=None, quarantine_path=None, track_duplicates=True):
+        self.rules = rules if rules is not None else default_rules()
+        self.quarantine_path = quarantine_path
+        self.track_duplicates = track_duplicates
+        self.seen = {}
+        self.counts = {rule.code: 0 for rule in self.rules}
+        self.rows_in = 0
+        self.rows_rejected = 0
+        self._quarantine_started = False
+
+    # Vraća (ispravni retci s tipiziranim stupcima i Transaction_DateTime, odbačeni retci s Reject_Reason)
+    def apply(self, chunk):
+        typed = parse_columns(chunk)
+        rejected = np.zeros(len(chunk), dtype=bool)
+        failures = {}
+        for rule in self.rules:
+            failed = CHECKS[rule.kind](chunk, typed, rule, self)
+            failures[rule.code] = failed
+            self.counts[rule.code] += int(failed.sum())
+            rejected |= failed
+
+        bad = chunk[rejected].copy()
+        if len(bad):
+            reasons = pd.Series('', index=bad.index, dtype=object)
+            for code, failed in failures.items():
+                reasons = reasons + np.where(failed[rejected], code + ';', '')
+            bad['Reject_Reason'] = reasons.str.rstrip(';')
+            self._write_quarantine(bad)
+        self.rows_in += len(chunk)
+        self.rows_rejected += len(bad)
+
+        good = chunk[~rejected].copy()
+        for column in NUMERIC_COLUMNS:
+            good[column] = typed[column][~rejected]
+        good['Age'] = good['Age'].astype(int)
+        good['Is_Fraud'] = good['Is_Fraud'].astype(int)
+        good['Transaction_DateTime'] = typed['Transaction_DateTime'][~rejected]
+        return good, bad
+
+    def _write_quarantine(self, bad):
+        if self.quarantine_path is None:
+            return
+        bad.to_csv(self.quarantine_path, index=False, mode='a' if self._quarantine_started else 'w',
+                   header=not self._quarantine_started)
+        self._quarantine_started = True
+
+    def report(self):
+        return {
+            'rows_in': self.rows_in,
+            'rows_rejected': self.rows_rejected,
+            'quarantine_path': self.quarantine_path if self._quarantine_started else None,
+            'rules': dict(self.counts),
+        }
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+        print(f"Quality report saved to {path}")
+
+    def print_summary(self):
+        print(f"\nQuality checks: {self.rows_in} rows in, {self.rows_rejected} rejected"
+              + (f" (quarantine: {self.quarantine_path})" if self._quarantine_started else ""))
+        for code, count in self.counts.items():
+            if count:
+                print(f"  {code:<32}{count:>10}")
@@ -0,0 +1,355 @@
+import argparse
+import ast
+import json
+import time
+from datetime import datetime
+from functools import reduce
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from instrumentacija import PipelineMetrics
+from kodiranje_nizova import StringPool
+from stvaranje_i_popunjavanje_baze import BULK_BATCH_SIZE, DATABASE_URL, FraudRuleHit, _bulk_insert
+
+# Broj transakcija po seriji: jedno čitanje iz baze i jedna vektorska evaluacija svih pravila
+SCORE_BATCH_SIZE = 500000
+# Kašnjenje bodovanja izvještava se po ovoliko redaka
+LATENCY_ROWS = 100000
+# Pseudo-pravilo u izvještaju: transakcija je označena ako ju je označilo bilo koje pravilo
+ANY_RULE = 'any_rule'
+
+# Transakcije s poljima koja pravila mogu koristiti (nazivi iz šifarnika umjesto id-eva)
+SCORING_QUERY = """
+SELECT
+    t.transaction_id_pk,
+    t.transaction_datetime,
+    t.amount,
+    t.account_balance_after,
+    t.is_fraud,
+    c.age AS customer_age,
+    mcat.name AS merchant_category,
+    dev.name AS device,
+    dt.name AS device_type,
+    loc.description AS location,
+    tt.name AS transaction_type
+FROM {transaction} t
+LEFT JOIN customer c ON t.customer_id = c.customer_id_pk
+LEFT JOIN merchant m ON t.merchant_id = m.merchant_id_pk
+LEFT JOIN merchant_category mcat ON m.category_id = mcat.id
+LEFT JOIN device dev ON t.device_id = dev.id
+LEFT JOIN device_type dt ON dev.device_type_id = dt.id
+LEFT JOIN location loc ON t.location_id = loc.id
+LEFT JOIN transaction_type tt ON t.transaction_type_id = tt.id
+ORDER BY t.transaction_id_pk
+"""
+
+# Polja dostupna u izrazima pravila. Brojčana su float/int polja; amount_to_balance = amount / account_balance_after
+# (inf kad je stanje 0), hour i weekday (0 = ponedjeljak) izvode se iz vremena transakcije.
+NUMERIC_FIELDS = ['amount', 'balance', 'amount_to_balance', 'customer_age', 'hour', 'weekday']
+# Tekstualna polja se kodiraju u rječnik nizova; u pravilima se smiju samo uspoređivati (==, !=, in, not in)
+STRING_FIELDS = ['merchant_category', 'device', 'device_type', 'location', 'transaction_type']
+# Funkcije dostupne u izrazima (NumPy, rade nad cijelim stupcem)
+FUNCTIONS = {'abs': np.abs, 'log1p': np.log1p, 'sqrt': np.sqrt, 'minimum': np.minimum, 'maximum': np.maximum}
+_ISIN = '__isin'
+
+DEFAULT_RULES = [
+    ('drains_balance', "amount_to_balance > 0.9",
+     "Transaction takes almost everything left on the account"),
+    ('night_large_amount', "hour < 5 and amount > 20000",
+     "Large transaction between midnight and 5 am"),
+    ('atm_large_withdrawal', "device_type == 'ATM' and transaction_type == 'Withdrawal' and amount > 40000",
+     "Large cash withdrawal at an ATM"),
+    ('electronics_online_night', "merchant_category == 'Electronics' and device_type in ['Mobile', 'Desktop'] "
+                                 "and (hour < 6 or hour >= 23)",
+     "Online electronics purchase late at night"),
+]
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.UnaryOp, ast.BinOp, ast.Compare, ast.Call, ast.Name, ast.Constant, ast.Load,
+    ast.List, ast.Tuple, ast.Set, ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+)
+
+
+class FraudRule:
+    def __init__(self, name, expression, description=''):
+        self.name = name
+        self.expression = expression
+        self.description = description
+        self.code = None
+
+
+def default_rules():
+    return [FraudRule(name, expression, description) for name, expression, description in DEFAULT_RULES]
+
+
+# Pravila iz JSON datoteke: lista objekata {"name": ..., "expression": ..., "description": ...}
+def load_rules(path):
+    with open(path, encoding='utf-8') as rules_file:
+        return [FraudRule(rule['name'], rule['expression'], rule.get('description', '')) for rule in json.load(rules_file)]
+
+
+# Prevodi izraz pravila u izraz nad NumPy stupcima: and/or/not postaju &/|/~, lanac usporedbi postaje
+# konjunkcija usporedbi, a tekstualne konstante se zamjenjuju kodom iz rječnika nizova polja s kojim se uspoređuju
+# (usporedba teksta postaje usporedba cijelih brojeva). Sve ostalo (atributi, indeksiranje, nepoznata imena) se odbija.
+class _Vectorizer(ast.NodeTransformer):
+    def __init__(self, pools):
+        self.pools = pools
+
+    def generic_visit(self, node):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_BoolOp(self, node):
+        operator = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        return reduce(lambda left, right: ast.BinOp(left, operator, right), [self.visit(value) for value in node.values])
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(ast.Invert(), operand)
+        return ast.UnaryOp(self.visit(node.op), operand)
+
+    def visit_Compare(self, node):
+        terms = []
+        left = node.left
+        for operator, right in zip(node.ops, node.comparators):
+            terms.append(self._compare(left, operator, right))
+            left = right
+        return reduce(lambda first, second: ast.BinOp(first, ast.BitAnd(), second), terms)
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise ValueError(f"unsupported call: {ast.unparse(node)}")
+        return ast.Call(node.func, [self.visit(arg) for arg in node.args], [])
+
+    def visit_Name(self, node):
+        if node.id in STRING_FIELDS:
+            raise ValueError(f"text field {node.id} can only be compared with ==, !=, in, not in")
+        if node.id not in NUMERIC_FIELDS:
+            raise ValueError(f"unknown field: {node.id}")
+        return node
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (bool, int, float)):
+            raise ValueError(f"text constant {node.value!r} must be compared with a text field")
+        return node
+
+    def _string_field(self, node):
+        return node.id if isinstance(node, ast.Name) and node.id in STRING_FIELDS else None
+
+    def _constant(self, node, field):
+        if field is None:
+            return self.visit(node)
+        if not isinstance(node, ast.Constant) or not isinstance(node.value, str):
+            raise ValueError(f"text field {field} can only be compared with text constants")
+        return ast.Constant(int(self.pools[field].encode(pd.Series([node.value], dtype=object))[0]))
+
+    def _compare(self, left, operator, right):
+        if isinstance(operator, (ast.In, ast.NotIn)):
+            if not isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                raise ValueError("'in' needs a literal list of values")
+            field = self._string_field(left)
+            values = ast.List([self._constant(value, field) for value in right.elts], ast.Load())
+            test = ast.Call(ast.Name(_ISIN, ast.Load()), [left if field else self.visit(left), values], [])
+            return ast.UnaryOp(ast.Invert(), test) if isinstance(operator, ast.NotIn) else test
+        field = self._string_field(left) or self._string_field(right)
+        if field is None:
+            return ast.Compare(self.visit(left), [self.visit(operator)], [self.visit(right)])
+        if not isinstance(operator, (ast.Eq, ast.NotEq)):
+            raise ValueError(f"text field {field} can only be compared with ==, !=, in, not in")
+        operands = [node if self._string_field(node) else self._constant(node, field) for node in (left, right)]
+        return ast.Compare(operands[0], [operator], [operands[1]])
+
+
+# Izraz se parsira, provjerava i prevodi jednom; rezultat je Python code objekt koji se izvršava nad cijelom serijom
+def compile_rule(expression, pools, name='rule'):
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as error:
+        raise ValueError(f"rule {name}: {error.msg}") from error
+    try:
+        tree = ast.fix_missing_locations(_Vectorizer(pools).visit(tree))
+    except ValueError as error:
+        raise ValueError(f"rule {name}: {error}") from error
+    return compile(tree, f"<rule {name}>", 'eval')
+
+
+# Bodovanje transakcija skupom pravila. Tekstualna polja svih serija kodiraju se u iste rječnike kao i konstante
+# pravila, pa su kodovi konstanti stabilni između serija. Uz oznaku is_fraud broje se pogoci i točni pogoci po pravilu.
+class RuleEngine:
+    def __init__(self, rules=None):
+        self.rules = list(rules) if rules is not None else default_rules()
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names) or ANY_RULE in names:
+            raise ValueError(f"rule names must be unique and different from {ANY_RULE}")
+        self.pools = {field: StringPool() for field in STRING_FIELDS}
+        for rule in self.rules:
+            rule.code = compile_rule(rule.expression, self.pools, rule.name)
+        self.namespace = {'__builtins__': {}, _ISIN: np.isin, **FUNCTIONS}
+        self.rows = 0
+        self.frauds = 0
+        self.score_seconds = 0.0
+        self.hits = {name: 0 for name in names + [ANY_RULE]}
+        self.true_positives = dict(self.hits)
+
+    # Stupci serije kao NumPy polja: brojčana i izvedena polja te kodovi tekstualnih polja
+    def columns(self, batch):
+        datetimes = pd.to_datetime(batch['transaction_datetime'])
+        amount = pd.to_numeric(batch['amount']).to_numpy(dtype=np.float64)
+        balance = pd.to_numeric(batch['account_balance_after']).to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amount_to_balance = amount / balance
+        columns = {
+            'amount': amount,
+            'balance': balance,
+            'amount_to_balance': amount_to_balance,
+            'customer_age': pd.to_numeric(batch['customer_age']).to_numpy(dtype=np.float64),
+            'hour': datetimes.dt.hour.to_numpy(),
+            'weekday': datetimes.dt.weekday.to_numpy(),
+        }
+        for field in STRING_FIELDS:
+            columns[field] = self.pools[field].encode(batch[field])
+        return columns
+
+    def _evaluate(self, rule, columns, rows):
+        result = np.asarray(eval(rule.code, self.namespace, columns))
+        if result.dtype != np.bool_:
+            raise ValueError(f"rule {rule.name} does not evaluate to true/false")
+        return np.broadcast_to(result, rows)
+
+    # Pogoci svih pravila za seriju (naziv pravila -> bool polje)
+    def score(self, batch):
+        start = time.perf_counter()
+        columns = self.columns(batch)
+        results = {rule.name: self._evaluate(rule, columns, len(batch)) for rule in self.rules}
+        self.score_seconds += time.perf_counter() - start
+
+        any_hit = np.logical_or.reduce(list(results.values())) if results else np.zeros(len(batch), dtype=bool)
+        labels = batch['is_fraud'].to_numpy(dtype=bool) if 'is_fraud' in batch.columns else None
+        self.rows += len(batch)
+        self.frauds += int(labels.sum()) if labels is not None else 0
+        for name, hit in list(results.items()) + [(ANY_RULE, any_hit)]:
+            self.hits[name] += int(hit.sum())
+            if labels is not None:
+                self.true_positives[name] += int((hit & labels).sum())
+        return results
+
+    def report(self):
+        expressions = {rule.name: rule.expression for rule in self.rules}
+        rules = []
+        for name, hits in self.hits.items():
+            true_positives = self.true_positives[name]
+            rules.append({
+                'rule': name,
+                'expression': expressions.get(name),
+                'hits': hits,
+                'true_positives': true_positives,
+                'precision': true_positives / hits if hits else None,
+                'recall': true_positives / self.frauds if self.frauds else None,
+            })
+        return {
+            'rows': self.rows,
+            'frauds': self.frauds,
+            'score_seconds': round(self.score_seconds, 6),
+            'seconds_per_100k_rows': round(self.score_seconds / self.rows * LATENCY_ROWS, 6) if self.rows else None,
+            'rules': rules,
+        }
+
+    def print_summary(self):
+        report = self.report()
+        print(f"\nScored {report['rows']} transactions ({report['frauds']} labelled fraud) in {report['score_seconds']:.3f}s"
+              + (f", {report['seconds_per_100k_rows'] * 1000:.1f} ms per {LATENCY_ROWS} rows" if report['rows'] else ""))
+        print(f"{'Rule':<28}{'Hits':>10}{'TP':>10}{'Precision':>11}{'Recall':>9}")
+        for rule in report['rules']:
+            precision = f"{rule['precision']:.3f}" if rule['precision'] is not None else '-'
+            recall = f"{rule['recall']:.3f}" if rule['recall'] is not None else '-'
+            print(f"{rule['rule']:<28}{rule['hits']:>10}{rule['true_positives']:>10}{precision:>11}{recall:>9}")
+
+
+def read_transactions(conn, batch_size=SCORE_BATCH_SIZE):
+    # "transaction" je rezervirana riječ u nekim bazama (npr. SQLite), pa se navodi kroz dijalekt
+    transaction = conn.dialect.identifier_preparer.quote('transaction')
+    return pd.read_sql(text(SCORING_QUERY.format(transaction=transaction)), conn,
+                       parse_dates=['transaction_datetime'], chunksize=batch_size)
+
+
+# Pogoci serije u fraud_rule_hit: jedan redak (pravilo, transakcija) po pogotku
+def write_hits(conn, batch, results, scored_at, batch_size=BULK_BATCH_SIZE):
+    ids = batch['transaction_id_pk'].to_numpy(dtype=object)
+    names = [np.full(int(hit.sum()), name, dtype=object) for name, hit in results.items()]
+    rows = sum(len(part) for part in names)
+    if not rows:
+        return 0
+    return _bulk_insert(conn, FraudRuleHit.__table__, {
+        'rule_name': np.concatenate(names),
+        'transaction_id_pk': np.concatenate([ids[hit] for hit in results.values()]),
+        'scored_at': [scored_at] * rows,
+    }, batch_size, log=False)
+
+
+# Rezultati po transakciji u širokom obliku: transaction_id_pk, 0/1 stupac po pravilu i broj pogođenih pravila
+def write_results(batch, results, path, first):
+    frame = pd.DataFrame({'transaction_id_pk': batch['transaction_id_pk'].to_numpy()})
+    for name, hit in results.items():
+        frame[name] = hit.astype(np.int8)
+    frame['rules_hit'] = frame[list(results)].sum(axis=1) if results else 0
+    frame.to_csv(path, index=False, mode='w' if first else 'a', header=first)
+
+
+# Boduje sve transakcije iz OLTP baze u serijama. Prethodni pogoci istih pravila brišu se i zamjenjuju novima
+# u istoj transakciji baze, pa ponovno bodovanje ne ostavlja zastarjele pogotke.
+def run_scoring(engine, rules=None, batch_size=SCORE_BATCH_SIZE, write=True, output_path=None, metrics=None):
+    metrics = metrics if metrics is not None else PipelineMetrics('score_rules')
+    scorer = RuleEngine(rules)
+    scored_at = datetime.now()
+    FraudRuleHit.__table__.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        if write:
+            table = FraudRuleHit.__table__
+            conn.execute(table.delete().where(table.c.rule_name.in_([rule.name for rule in scorer.rules])))
+        first = True
+        for batch in metrics.timed_iter('extract', read_transactions(conn, batch_size)):
+            if batch.empty:
+                continue
+            with metrics.stage('score', rows=len(batch)):
+                results = scorer.score(batch)
+            if write:
+                with metrics.stage('write_hits') as stage:
+                    stage.rows = write_hits(conn, batch, results, scored_at)
+            if output_path:
+                with metrics.stage('write_results', rows=len(batch)):
+                    write_results(batch, results, output_path, first)
+            first = False
+    return scorer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score bank_fraud_db transactions with vectorized fraud rules.")
+    parser.add_argument('--db-url', default=DATABASE_URL, help="SQLAlchemy URL of the OLTP database")
+    parser.add_argument('--rules', default=None,
+                        help="JSON file with a list of {name, expression, description} (default: built-in rules)")
+    parser.add_argument('--batch-size', type=int, default=SCORE_BATCH_SIZE, help="Transactions scored per batch")
+    parser.add_argument('--no-write', action='store_true', help="Only report; do not write hits to fraud_rule_hit")
+    parser.add_argument('--output', default=None, help="Also write per-transaction rule results to this CSV")
+    parser.add_argument('--report', default=None, help="Write per-rule precision/recall and latency to this JSON file")
+    parser.add_argument('--metrics-report', default=None, help="Write per-stage timings and memory to this JSON file")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.rules) if args.rules else None
+    metrics = PipelineMetrics('score_rules')
+    engine = metrics.track_engine(create_engine(args.db_url))
+    scorer = run_scoring(engine, rules, args.batch_size, not args.no_write, args.output, metrics)
+    scorer.print_summary()
+    metrics.print_summary()
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump(scorer.report(), report_file, indent=2)
+        print(f"Rule report saved to {args.report}")
+    if args.metrics_report:
+        metrics.write_report(args.metrics_report)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,59 +1,243 @@
+import argparse
+import glob
+import os
 import pandas as pd
 from datetime import datetime
+from citanje_izvora import READERS, iter_csv_arrow, open_source, read_csv_arrow
+from instrumentacija import PipelineMetrics, measure
+from kvaliteta_podataka import DATETIME_FORMAT, NUMERIC_COLUMNS, QualityStage
 
 CSV_FILE_PATH = "C:\\Users\\Petra\\Desktop\\FIPU\\3\\SRP\\Bank_Transaction_Fraud_Detection.csv"
-
-# Učitavanje CSV datoteke
-df = pd.read_csv(CSV_FILE_PATH, delimiter=',')
-print(f"CSV size before: {df.shape}")
-
-# Osnovno čišćenje
-# Uklanjanje redaka s nedostajućim vrijednostima
-print("Missing values before dropna:\n", df.isnull().sum())
-df.dropna(inplace=True)
-print(f"CSV size after dropna: {df.shape}")
-
-# Konverzija datuma i vremena
-try:
-    # Spoji stringove datuma i vremena
-    datetime_str = df['Transaction_Date'] + ' ' + df['Transaction_Time']
-    df['Transaction_DateTime'] = pd.to_datetime(datetime_str, dayfirst=True)
-    print("Transaction_DateTime created successfully with dayfirst=True or explicit format.")
-except Exception as e:
-    print(f"Error combining date and time, attempting alternative parsing: {e}")
-    print("Keeping Transaction_Date and Transaction_Time separate for now if combination failed.")
-
-
-# Provjera tipova podataka
-print("\nData types before potential corrections:\n", df.dtypes)
-if df['Age'].dtype == 'object':
-    df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-    df.dropna(subset=['Age'], inplace=True)
-    df['Age'] = df['Age'].astype(int)
-
-if df['Transaction_Amount'].dtype == 'object':
-    # Ukloni znakove valute ili tisućice ako postoje
-    if isinstance(df['Transaction_Amount'].iloc[0], str):
-        df['Transaction_Amount'] = df['Transaction_Amount'].replace({'\$': '', ',': ''}, regex=True)
-    df['Transaction_Amount'] = pd.to_numeric(df['Transaction_Amount'], errors='coerce')
-    df.dropna(subset=['Transaction_Amount'], inplace=True)
-
-if df['Account_Balance'].dtype == 'object':
-    if isinstance(df['Account_Balance'].iloc[0], str):
-        df['Account_Balance'] = df['Account_Balance'].replace({'\$': '', ',': ''}, regex=True)
-    df['Account_Balance'] = pd.to_numeric(df['Account_Balance'], errors='coerce')
-    df.dropna(subset=['Account_Balance'], inplace=True)
-
-
-# Brisanje originalnih stupaca za datum i vrijeme ako je kombinacija uspjela
-if 'Transaction_DateTime' in df.columns:
-    df = df.drop(columns=['Transaction_Date', 'Transaction_Time'])
-
-# Ispis prvih redaka dataframe-a
-print("\nProcessed DataFrame head:\n", df.head())
-print(f"CSV size after processing: {df.shape}")
-
-# Spremanje predprocesiranog skupa podataka u novu CSV datoteku
 PROCESSED_CSV_PATH = "Bank_Transaction_Fraud_Detection_PROCESSED.csv"
-df.to_csv(PROCESSED_CSV_PATH, index=False)
-print(f"\nProcessed data saved to {PROCESSED_CSV_PATH}")
\ No newline at end of file
+# Stupčani (Parquet) oblik predprocesiranog skupa: direktorij s jednom datotekom po dijelu
+PROCESSED_PARQUET_PATH = "Bank_Transaction_Fraud_Detection_PROCESSED.parquet"
+PARQUET_COMPRESSION = 'zstd'
+
+# Stupci niskog kardinaliteta koji se u Parquet spremaju kao rječnički kodirani (category)
+DICTIONARY_COLUMNS = [
+    'Gender', 'State', 'City', 'Bank_Branch', 'Account_Type', 'Transaction_Type', 'Merchant_Category',
+    'Transaction_Device', 'Transaction_Location', 'Device_Type', 'Transaction_Currency',
+]
+
+# Broj redaka po dijelu (chunk) u streaming načinu rada
+CHUNK_SIZE = 100000
+
+# Zapis odbačenih redaka (izvorne vrijednosti i Reject_Reason), uz izlaznu datoteku
+QUARANTINE_SUFFIX = "_QUARANTINE.csv"
+
+# Eksplicitni tipovi stupaca izvornog CSV-a; numerički stupci koji se čiste čitaju se kao tekst
+# (neispravne vrijednosti odbacuju pravila kvalitete, ne čitanje)
+SOURCE_DTYPES = {
+    'Customer_ID': 'object',
+    'Customer_Name': 'object',
+    'Gender': 'object',
+    'Age': 'object',
+    'State': 'object',
+    'City': 'object',
+    'Bank_Branch': 'object',
+    'Account_Type': 'object',
+    'Transaction_ID': 'object',
+    'Transaction_Date': 'object',
+    'Transaction_Time': 'object',
+    'Transaction_Amount': 'object',
+    'Merchant_ID': 'object',
+    'Transaction_Type': 'object',
+    'Merchant_Category': 'object',
+    'Account_Balance': 'object',
+    'Transaction_Device': 'object',
+    'Transaction_Location': 'object',
+    'Device_Type': 'object',
+    'Is_Fraud': 'object',
+    'Transaction_Currency': 'object',
+    'Customer_Contact': 'object',
+    'Transaction_Description': 'object',
+    'Customer_Email': 'object',
+}
+# Arrow čitač tipizira numeričke stupce iz zaključene sheme (neispravne vrijednosti čita kao tekst, a pravila
+# kvalitete ih odbacuju); kao tekst se čitaju ključevi, datum i vrijeme i ostali stupci koji mogu izgledati
+# kao brojevi (npr. kontakt '+91...' bez '+')
+RAW_TEXT_COLUMNS = [column for column in SOURCE_DTYPES if column not in NUMERIC_COLUMNS]
+
+
+# Izvorni CSV odjednom: pandas ili višedretveni Arrow čitač; gzip/zstd izvor oba čitaju kroz isti tok
+# s dekompresijom u hodu (open_source)
+def read_source(input_path=CSV_FILE_PATH, reader='pandas', threads=None):
+    if reader == 'arrow':
+        return read_csv_arrow(input_path, string_columns=RAW_TEXT_COLUMNS, threads=threads)
+    with open_source(input_path) as source:
+        return pd.read_csv(source, delimiter=',', dtype=SOURCE_DTYPES)
+
+
+# Kao read_source, ali u dijelovima od chunksize redaka
+def iter_source(input_path=CSV_FILE_PATH, chunksize=CHUNK_SIZE, reader='pandas', threads=None):
+    if reader == 'arrow':
+        yield from iter_csv_arrow(input_path, chunksize, string_columns=RAW_TEXT_COLUMNS, threads=threads)
+        return
+    with open_source(input_path) as source:
+        yield from pd.read_csv(source, delimiter=',', dtype=SOURCE_DTYPES, chunksize=chunksize)
+
+
+def preprocess_full(input_path=CSV_FILE_PATH, output_path=PROCESSED_CSV_PATH, output_format='csv', metrics=None,
+                    quality=None, reader='pandas', threads=None):
+    metrics = metrics if metrics is not None else PipelineMetrics('preprocess_full')
+    quality = quality if quality is not None else QualityStage()
+
+    # Učitavanje CSV datoteke
+    with metrics.stage('read_csv') as stage:
+        df = read_source(input_path, reader, threads)
+        stage.rows = len(df)
+    print(f"CSV size before: {df.shape}")
+    print("Missing values:\n", df.isnull().sum())
+
+    # Pravila kvalitete nad cijelim skupom: tipovi, rasponi, datumi, ključevi i duplikati; odbačeni retci u karantenu
+    df = clean_chunk(df, metrics, quality)
+    quality.print_summary()
+
+    # Ispis prvih redaka dataframe-a
+    print("\nProcessed DataFrame head:\n", df.head())
+    print(f"CSV size after processing: {df.shape}")
+
+    # Spremanje predprocesiranog skupa podataka u novu CSV datoteku (ili Parquet direktorij)
+    with metrics.stage('write_output', rows=len(df)):
+        if output_format == 'parquet':
+            reset_parquet_dir(output_path)
+            write_parquet_part(df, output_path, 0)
+        else:
+            df.to_csv(output_path, index=False)
+    print(f"\nProcessed data saved to {output_path}")
+    metrics.print_summary()
+    return metrics
+
+
+# Priprema izlaznog Parquet direktorija (brisanje dijelova prethodnog pokretanja)
+def reset_parquet_dir(output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for old_part in glob.glob(os.path.join(output_dir, 'part-*.parquet')):
+        os.remove(old_part)
+
+
+def write_parquet_part(df, output_dir, part):
+    df = df.astype({column: 'category' for column in DICTIONARY_COLUMNS if column in df.columns})
+    df.to_parquet(os.path.join(output_dir, f"part-{part:05d}.parquet"), index=False, compression=PARQUET_COMPRESSION)
+
+
+def is_parquet_path(path):
+    return os.path.isdir(path) or path.endswith('.parquet')
+
+
+# Čitanje predprocesiranog skupa (CSV ili Parquet direktorij), samo traženih stupaca.
+# string_columns se iz CSV-a čitaju kao tekst bez pogađanja tipa (npr. kontakt "+9198..." ostaje niz, a ne broj).
+def read_processed(path=PROCESSED_CSV_PATH, columns=None, as_category=True, string_columns=()):
+    if is_parquet_path(path):
+        df = pd.read_parquet(path, columns=columns)
+        if not as_category:
+            df = df.astype({column: object for column in df.select_dtypes('category').columns})
+    else:
+        dtype = {column: str for column in string_columns if columns is None or column in columns}
+        df = pd.read_csv(path, delimiter=',', usecols=columns, dtype=dtype or None)
+        if 'Transaction_DateTime' in df.columns:
+            df['Transaction_DateTime'] = pd.to_datetime(df['Transaction_DateTime'])
+    return df
+
+
+# Kao read_processed, ali u dijelovima od najviše chunksize redaka (ograničena memorija); string_columns se
+# i ovdje čitaju kao tekst, inače bi dio s kontaktima koji izgledaju kao brojevi izgubio vodeći '+'
+def iter_processed(path=PROCESSED_CSV_PATH, chunksize=CHUNK_SIZE, columns=None, as_category=True, string_columns=()):
+    if is_parquet_path(path):
+        import pyarrow.parquet as pq
+        for part_path in sorted(glob.glob(os.path.join(path, 'part-*.parquet'))) if os.path.isdir(path) else [path]:
+            for batch in pq.ParquetFile(part_path).iter_batches(batch_size=chunksize, columns=columns):
+                chunk = batch.to_pandas()
+                if not as_category:
+                    chunk = chunk.astype({column: object for column in chunk.select_dtypes('category').columns})
+                yield chunk
+    else:
+        dtype = {column: str for column in string_columns if columns is None or column in columns}
+        for chunk in pd.read_csv(path, delimiter=',', usecols=columns, dtype=dtype or None, chunksize=chunksize):
+            if 'Transaction_DateTime' in chunk.columns:
+                chunk['Transaction_DateTime'] = pd.to_datetime(chunk['Transaction_DateTime'])
+            yield chunk
+
+
+# Pravila kvalitete (kvaliteta_podataka) nad jednim dijelom skupa: ispravni retci s tipiziranim iznosima, dobi,
+# Is_Fraud i Transaction_DateTime; odbačeni idu u karantenu faze quality (bez nje se duplikati traže samo u dijelu)
+def clean_chunk(chunk, metrics=None, quality=None):
+    quality = quality if quality is not None else QualityStage(track_duplicates=False)
+    with measure(metrics, 'validate', rows=len(chunk)):
+        cleaned, _ = quality.apply(chunk)
+    return cleaned.drop(columns=['Transaction_Date', 'Transaction_Time'])
+
+
+def preprocess_streaming(input_path=CSV_FILE_PATH, output_path=PROCESSED_CSV_PATH, chunksize=CHUNK_SIZE,
+                         output_format='csv', metrics=None, quality=None, reader='pandas', threads=None):
+    metrics = metrics if metrics is not None else PipelineMetrics('preprocess_streaming')
+    quality = quality if quality is not None else QualityStage()
+    if output_format == 'parquet':
+        reset_parquet_dir(output_path)
+    rows_in = 0
+    rows_out = 0
+    missing = None
+    chunks = iter_source(input_path, chunksize, reader, threads)
+    for i, chunk in enumerate(metrics.timed_iter('read_csv', chunks)):
+        rows_in += len(chunk)
+        chunk_missing = chunk.isnull().sum()
+        missing = chunk_missing if missing is None else missing + chunk_missing
+
+        cleaned = clean_chunk(chunk, metrics, quality)
+        rows_out += len(cleaned)
+        with metrics.stage('write_output', rows=len(cleaned)):
+            if output_format == 'parquet':
+                write_parquet_part(cleaned, output_path, i)
+            else:
+                # Prvi dio stvara datoteku sa zaglavljem, ostali se dodaju na kraj
+                cleaned.to_csv(output_path, index=False, mode='w' if i == 0 else 'a', header=(i == 0))
+        print(f"Chunk {i + 1}: {len(chunk)} rows read, {len(cleaned)} rows written.")
+
+    print("Missing values:\n", missing)
+    print(f"CSV rows before: {rows_in}, after processing: {rows_out}")
+    quality.print_summary()
+    print(f"\nProcessed data saved to {output_path}")
+    metrics.print_summary()
+    return rows_out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocess the Bank Transaction Fraud Detection CSV.")
+    parser.add_argument('--input', default=CSV_FILE_PATH, help="Raw source CSV file")
+    parser.add_argument('--output', default=None,
+                        help=f"Processed output (default: {PROCESSED_CSV_PATH} or {PROCESSED_PARQUET_PATH})")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help="csv: single CSV file; parquet: zstd-compressed Parquet directory, one part per chunk")
+    parser.add_argument('--mode', choices=['full', 'streaming'], default='full',
+                        help="full: whole file in memory; streaming: chunked, bounded memory")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Rows per chunk in streaming mode")
+    parser.add_argument('--reader', choices=READERS, default='pandas',
+                        help="pandas: single-threaded pd.read_csv; arrow: multithreaded block parser "
+                             "(.gz/.zst inputs are decompressed as a stream by both)")
+    parser.add_argument('--threads', type=int, default=None, help="Parser threads for the arrow reader (default: all cores)")
+    parser.add_argument('--metrics-report', default=None, help="Write per-stage timings and memory to this JSON file")
+    parser.add_argument('--quarantine', default=None,
+                        help=f"CSV for rejected rows with their reason codes (default: output name + {QUARANTINE_SUFFIX})")
+    parser.add_argument('--quality-report', default=None, help="Write per-rule rejection counts to this JSON file")
+    args = parser.parse_args(argv)
+
+    output_path = args.output
+    if output_path is None:
+        output_path = PROCESSED_PARQUET_PATH if args.format == 'parquet' else PROCESSED_CSV_PATH
+    quarantine_path = args.quarantine or os.path.splitext(os.path.normpath(output_path))[0] + QUARANTINE_SUFFIX
+
+    metrics = PipelineMetrics(f"preprocess_{args.mode}")
+    quality = QualityStage(quarantine_path=quarantine_path)
+    if args.mode == 'streaming':
+        preprocess_streaming(args.input, output_path, args.chunksize, args.format, metrics, quality,
+                             args.reader, args.threads)
+    else:
+        preprocess_full(args.input, output_path, args.format, metrics, quality, args.reader, args.threads)
+    if args.metrics_report:
+        metrics.write_report(args.metrics_report)
+    if args.quality_report:
+        quality.write_report(args.quality_report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import IntegrityError
+
+from instrumentacija import PipelineMetrics
+from kvaliteta_podataka import KNOWN_VALUES, QualityStage, default_rules
+from predprocesiranje_skupa import DATETIME_FORMAT, SOURCE_DTYPES
+from stvaranje_i_popunjavanje_baze import (
+    DATABASE_URL, LOOKUP_TABLES, Base, Customer, Device, DeviceType, Merchant, Transaction,
+    _bulk_insert, _customer_rows, _merchant_rows, _transaction_rows,
+)
+
+# Servis prima transakcije u obliku izvornog CSV-a (jedan JSON objekt po retku) na lokalnom TCP socketu
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Mikro-serija se upisuje kad skupi BATCH_SIZE transakcija ili FLUSH_INTERVAL sekundi nakon prve
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.05
+# Broj konekcija prema bazi (i istovremenih upisa serija)
+POOL_SIZE = 4
+# Najviše transakcija koje čekaju na upis; kad je red pun, čitanje s klijentskih konekcija staje (backpressure)
+QUEUE_SIZE = 10000
+# Latencije zadnjih LATENCY_WINDOW upisanih transakcija (za p50/p99)
+LATENCY_WINDOW = 100000
+
+SOURCE_COLUMNS = list(SOURCE_DTYPES)
+# Polja koja se provjeravaju već pri primitku (bez njih se transakcija ne može ni smjestiti u seriju)
+REQUIRED_FIELDS = ['Transaction_ID', 'Customer_ID', 'Merchant_ID', 'Transaction_Date', 'Transaction_Time']
+
+
+def ingestion_engine(db_url, pool_size=POOL_SIZE):
+    # SQLite zaključava cijelu datoteku pri pisanju, pa istovremeni upisi čekaju jedan drugoga
+    connect_args = {'timeout': 300} if db_url.startswith('sqlite') else {}
+    return create_engine(db_url, pool_size=pool_size, max_overflow=0, connect_args=connect_args)
+
+
+# Provjera strukture jedne transakcije; vraća zapis sa svim izvornim stupcima kao tekstom ili ValueError.
+# Numerička pravila (iznosi, dob, Is_Fraud) provjerava faza kvalitete (QualityStage) nad cijelom serijom,
+# kao u predprocesiranju.
+def parse_record(record):
+    if not isinstance(record, dict):
+        raise ValueError("transaction must be a JSON object")
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    row = {column: None if record.get(column) is None else str(record[column]) for column in SOURCE_COLUMNS}
+    try:
+        datetime.strptime(f"{row['Transaction_Date']} {row['Transaction_Time']}", DATETIME_FORMAT)
+    except ValueError:
+        raise ValueError(f"Transaction_Date/Transaction_Time do not match {DATETIME_FORMAT}") from None
+    return row
+
+
+# Id-evi šifarnika, uređaja, kupaca i trgovaca iz baze, držani u memoriji. Nove vrijednosti se unose
+# u bazu pri razrješavanju serije. Očekuje se jedan servis po bazi (cache se ne usklađuje s drugim piscima).
+class LookupCache:
+    def __init__(self):
+        self.lookups = {}
+        self.devices = {}
+        self.customers = set()
+        self.merchants = set()
+
+    def load(self, conn):
+        for model, attr, column, _ in LOOKUP_TABLES:
+            self._load_lookup(conn, model, attr, column)
+        self._load_devices(conn)
+        self.customers = set(conn.execute(select(Customer.customer_id_pk)).scalars())
+        self.merchants = set(conn.execute(select(Merchant.merchant_id_pk)).scalars())
+
+    def _load_lookup(self, conn, model, attr, column):
+        table = model.__table__
+        self.lookups[column] = dict(conn.execute(select(table.c[attr], table.c.id)).all())
+
+    def _load_devices(self, conn):
+        rows = conn.execute(select(Device.name, DeviceType.name, Device.id).join(DeviceType)).all()
+        self.devices = {(name, type_name): device_id for name, type_name, device_id in rows}
+
+    # Strani ključevi serije (isti stupci kao resolve_lookup_keys); nepoznati članovi se prvo unose u bazu
+    def resolve(self, conn, df):
+        keys = pd.DataFrame(index=df.index)
+        for model, attr, column, fk_name in LOOKUP_TABLES:
+            cached = self.lookups[column]
+            new = [value for value in pd.unique(df[column].dropna()) if value not in cached]
+            if new:
+                _bulk_insert(conn, model.__table__, {attr: pd.Series(new, dtype=object)}, log=False)
+                self._load_lookup(conn, model, attr, column)
+            keys[fk_name] = pd.array(df[column].map(self.lookups[column]), dtype='Int64')
+
+        pairs = list(zip(df['Transaction_Device'], df['Device_Type']))
+        new = list(dict.fromkeys(pair for pair in pairs if pair not in self.devices and pd.notna(pair[0]) and pd.notna(pair[1])))
+        if new:
+            type_ids = self.lookups['Device_Type']
+            _bulk_insert(conn, Device.__table__, {
+                'name': pd.Series([name for name, _ in new], dtype=object),
+                'device_type_id': pd.Series([type_ids[type_name] for _, type_name in new]),
+            }, log=False)
+            self._load_devices(conn)
+        keys['device_id'] = pd.array([self.devices.get(pair) for pair in pairs], dtype='Int64')
+
+        customers = _customer_rows(df, keys)
+        new = self._unknown(customers['customer_id_pk'], self.customers)
+        if new.any():
+            _bulk_insert(conn, Customer.__table__, {name: col[new] for name, col in customers.items()}, log=False)
+            self.customers.update(customers['customer_id_pk'][new])
+        merchants = _merchant_rows(df, keys)
+        new = self._unknown(merchants['merchant_id_pk'], self.merchants)
+        if new.any():
+            _bulk_insert(conn, Merchant.__table__, {name: col[new] for name, col in merchants.items()}, log=False)
+            self.merchants.update(merchants['merchant_id_pk'][new])
+        return keys
+
+    # Provjera članstva izravno u skupu (isin bi za svaku seriju gradio hash tablicu cijelog skupa)
+    @staticmethod
+    def _unknown(ids, known):
+        return np.fromiter((value not in known for value in ids), dtype=bool, count=len(ids))
+
+
+# Dugotrajni asyncio servis: transakcije se skupljaju u mikro-serije, razrješavaju preko LookupCache
+# i upisuju u tablicu transaction s najviše pool_size serija istovremeno (svaka u svojoj konekciji i dretvi).
+# Kad baza kasni, zauzeti su svi upisi, red se puni i submit čeka (backpressure do klijenta).
+# Pravila kvalitete su ista kao u predprocesiranju, osim popisa poznatih vrijednosti šifarnika (known_values):
+# bez njega novi članovi (kategorija, tip uređaja, valuta...) ulaze u šifarnike preko LookupCache.
+class IngestionService:
+    def __init__(self, engine, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, pool_size=POOL_SIZE,
+                 queue_size=QUEUE_SIZE, metrics=None, known_values=None):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pool_size = pool_size
+        self.queue_size = queue_size
+        self.metrics = metrics if metrics is not None else PipelineMetrics('ingest_service')
+        self.metrics.track_engine(engine)
+        self.cache = LookupCache()
+        self.quality = QualityStage(default_rules(known_values or {}), track_duplicates=False)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {'accepted': 0, 'rejected': 0, 'written': 0, 'failed': 0, 'batches': 0}
+        self.first_received = None
+        self.last_written = None
+        self._executor = ThreadPoolExecutor(max_workers=pool_size + 1, thread_name_prefix='ingest')
+        self._queue = None
+        self._slots = None
+        self._writes = set()
+        self._batcher = None
+
+    async def start(self):
+        Base.metadata.create_all(self.engine)
+        await self._run(self._load_cache)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slots = asyncio.Semaphore(self.pool_size)
+        self._batcher = asyncio.create_task(self._collect_batches())
+
+    def _load_cache(self):
+        with self.engine.connect() as conn:
+            self.cache.load(conn)
+
+    def _run(self, function, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    # Stavlja transakciju u red i vraća future s rezultatom upisa ({'status': 'ok' | 'rejected' | 'failed', ...})
+    async def submit(self, record):
+        received = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            row = parse_record(record)
+        except ValueError as error:
+            self.counts['rejected'] += 1
+            transaction_id = record.get('Transaction_ID') if isinstance(record, dict) else None
+            future.set_result({'transaction_id': transaction_id, 'status': 'rejected', 'error': str(error)})
+            return future
+        if self.first_received is None:
+            self.first_received = received
+        self.counts['accepted'] += 1
+        await self._queue.put((received, row, future))
+        return future
+
+    async def ingest(self, record):
+        return await (await self.submit(record))
+
+    async def _collect_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            closing = False
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            try:
+                await self._flush(batch)
+            except Exception as error:
+                # Greška izvan obrade pojedinih redaka ne zaustavlja skupljanje serija; klijenti serije dobivaju
+                # 'failed' umjesto da čekaju odgovor zauvijek
+                print(f"Batch of {len(batch)} transactions failed: {error!r}")
+                pending = [item for item in batch if not item[2].done()]
+                self._finish(pending, [f"batch failed: {error}"] * len(pending))
+            if closing:
+                break
+
+    # Razrješavanje ključeva ide serijski (cache mijenja samo ova korutina), a upisi transakcija paralelno
+    async def _flush(self, batch):
+        try:
+            rows, positions, reasons = await self._run(self._prepare, [row for _, row, _ in batch])
+        except Exception as error:
+            # Serija se odbacuje, ali servis nastavlja primati nove transakcije
+            self._finish(batch, [f"key resolution failed: {error}"] * len(batch))
+            return
+        for i, reason in reasons.items():
+            _, row, future = batch[i]
+            self.counts['rejected'] += 1
+            if not future.done():
+                future.set_result({'transaction_id': row['Transaction_ID'], 'status': 'rejected',
+                                   'error': f"quality rules failed: {reason}"})
+        if not positions:
+            return
+        await self._slots.acquire()
+        task = asyncio.create_task(self._write([batch[i] for i in positions], rows))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def _prepare(self, records):
+        start = time.perf_counter()
+        chunk = pd.DataFrame.from_records(records, columns=SOURCE_COLUMNS)
+        # Kao clean_chunk, ali uz odbačene retke i njihove razloge (Reject_Reason) za odgovor klijentu
+        cleaned, bad = self.quality.apply(chunk)
+        cleaned = cleaned.drop(columns=['Transaction_Date', 'Transaction_Time'])
+        rejected = bad['Reject_Reason'].to_dict() if len(bad) else {}
+        with self.engine.begin() as conn:
+            keys = self.cache.resolve(conn, cleaned)
+        rows = _transaction_rows(cleaned, keys)
+        self.metrics.add('resolve_keys', time.perf_counter() - start, len(records))
+        return rows, cleaned.index.tolist(), rejected
+
+    async def _write(self, batch, rows):
+        try:
+            errors = await self._run(self._insert, rows)
+        except Exception as error:
+            errors = [f"write failed: {error}"] * len(batch)
+        finally:
+            self._slots.release()
+        self._finish(batch, errors)
+
+    # Cijela serija u jednoj transakciji; ako je neki redak neispravan (npr. postojeći Transaction_ID),
+    # serija se ponavlja redak po redak da bi se odbili samo neispravni
+    def _insert(self, rows):
+        start = time.perf_counter()
+        columns = dict(rows.items())
+        try:
+            with self.engine.begin() as conn:
+                _bulk_insert(conn, Transaction.__table__, columns, log=False)
+            errors = [None] * len(rows)
+        except IntegrityError:
+            errors = []
+            for i in range(len(rows)):
+                try:
+                    with self.engine.begin() as conn:
+                        _bulk_insert(conn, Transaction.__table__, {name: col.iloc[i:i + 1] for name, col in columns.items()},
+                                     log=False)
+                    errors.append(None)
+                except IntegrityError as error:
+                    errors.append(f"integrity error: {error.orig}")
+        self.metrics.add('write_batch', time.perf_counter() - start, len(rows))
+        return errors
+
+    def _finish(self, batch, errors):
+        done = time.perf_counter()
+        self.counts['batches'] += 1
+        for (received, row, future), error in zip(batch, errors):
+            if error is None:
+                self.counts['written'] += 1
+                self.latencies.append(done - received)
+                result = {'transaction_id': row['Transaction_ID'], 'status': 'ok'}
+            else:
+                self.counts['failed'] += 1
+                result = {'transaction_id': row['Transaction_ID'], 'status': 'failed', 'error': error}
+            if not future.done():
+                future.set_result(result)
+        self.last_written = done
+
+    # Upisuje sve što je već u redu i čeka završetak upisa
+    async def stop(self):
+        if self._batcher is not None:
+            await self._queue.put(None)
+            await self._batcher
+            self._batcher = None
+        if self._writes:
+            await asyncio.gather(*self._writes)
+        self._executor.shutdown(wait=True)
+
+    # Latencija od primitka do potvrđenog upisa (ms) i propusnost upisanih transakcija
+    def report(self):
+        latencies = np.array(self.latencies) * 1000
+        elapsed = (self.last_written - self.first_received) if self.last_written and self.first_received else 0
+        report = dict(self.counts)
+        report.update({
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+            'pool_size': self.pool_size,
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+            'p99_ms': round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+            'max_ms': round(float(latencies.max()), 2) if len(latencies) else None,
+            'rows_per_sec': round(self.counts['written'] / elapsed, 1) if elapsed > 0 else None,
+        })
+        return report
+
+    def print_report(self):
+        report = self.report()
+        print(f"Ingested {report['written']} transactions ({report['rejected']} rejected, {report['failed']} failed) "
+              f"in {report['batches']} batches: p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, "
+              f"{report['rows_per_sec']} rows/sec")
+
+    # --- Socket protokol: JSON objekt po retku, odgovor po retku istim redoslijedom ---
+
+    async def handle_client(self, reader, writer):
+        responses = asyncio.Queue()
+        sender = asyncio.create_task(self._send_responses(responses, writer))
+        try:
+            async for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = 'invalid JSON'
+                await responses.put(await self.submit(record))
+        finally:
+            await responses.put(None)
+            await sender
+            writer.close()
+
+    async def _send_responses(self, responses, writer):
+        while True:
+            future = await responses.get()
+            if future is None:
+                break
+            writer.write(json.dumps(await future).encode() + b'\n')
+            if responses.empty():
+                await writer.drain()
+
+    async def serve(self, host=HOST, port=PORT):
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+# Klijent za mjerenje: šalje transakcije jednom konekcijom (bez čekanja odgovora) i vraća odgovore.
+# Uz rate (transakcija/s) slanje je ravnomjerno; bez njega se šalje najbrže što servis prima.
+async def send_transactions(records, host=HOST, port=PORT, rate=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+
+    async def send():
+        start = loop.time()
+        for i, record in enumerate(records):
+            if rate:
+                delay = start + i / rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            writer.write(json.dumps(record).encode() + b'\n')
+            await writer.drain()
+        writer.write_eof()
+
+    sender = asyncio.create_task(send())
+    responses = [json.loads(line) async for line in reader]
+    await sender
+    writer.close()
+    return responses
+
+
+# Transakcije izvornog CSV-a kao JSON zapisi (nedostajuće vrijednosti kao null)
+def read_source_records(path, rows=None):
+    df = pd.read_csv(path, delimiter=',', dtype=SOURCE_DTYPES, nrows=rows)
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+async def run_benchmark(args):
+    records = read_source_records(args.csv, args.rows)
+    engine = ingestion_engine(args.db_url, args.pool_size)
+    service = IngestionService(engine, args.batch_size, args.flush_interval, args.pool_size, args.queue_size,
+                               known_values=KNOWN_VALUES if args.known_values else None)
+    await service.start()
+    server = await service.serve(args.host, 0)
+    port = server.sockets[0].getsockname()[1]
+    start = time.perf_counter()
+    parts = [records[i::args.connections] for i in range(args.connections)]
+    rate = args.rate / args.connections if args.rate else None
+    await asyncio.gather(*(send_transactions(part, args.host, port, rate) for part in parts))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    await service.stop()
+    engine.dispose()
+    print(f"{len(records)} transactions sent over {args.connections} connections in {elapsed:.2f}s")
+    return service
+
+
+async def run_server(args):
+    engine = ingestion_engine(args.db_url, args.pool_size)
+    service = IngestionService(engine, args.batch_size, args.flush_interval, args.pool_size, args.queue_size,
+                               known_values=KNOWN_VALUES if args.known_values else None)
+    await service.start()
+    server = await service.serve(args.host, args.port)
+    print(f"Ingestion service listening on {args.host}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+        engine.dispose()
+        service.print_report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching ingestion service for live transactions.")
+    parser.add_argument('command', choices=['serve', 'benchmark'],
+                        help="serve: accept newline-delimited JSON transactions on a TCP socket; "
+                             "benchmark: replay a source CSV through the service and report latency")
+    parser.add_argument('--db-url', default=DATABASE_URL, help="SQLAlchemy database URL (tables are created if missing)")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Transactions per micro-batch")
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL,
+                        help="Seconds to wait for a micro-batch to fill before writing it")
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE, help="Database connections / concurrent batch writes")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help="Pending transactions before clients are slowed down")
+    parser.add_argument('--known-values', action='store_true',
+                        help="Reject transactions whose lookup values (category, device type, currency...) are not in "
+                             "the preprocessing known-values list; by default new values are added to the lookup tables")
+    parser.add_argument('--csv', help="Source-format CSV to replay (benchmark)")
+    parser.add_argument('--rows', type=int, default=None, help="Replay only the first ROWS transactions (benchmark)")
+    parser.add_argument('--connections', type=int, default=4, help="Concurrent client connections (benchmark)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Offered load in transactions/sec across all connections (benchmark; default: as fast as possible)")
+    parser.add_argument('--metrics-report', default=None, help="Write latency, throughput and stage timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == 'benchmark':
+        if not args.csv:
+            parser.error("benchmark requires --csv")
+        service = asyncio.run(run_benchmark(args))
+        service.print_report()
+        service.metrics.print_summary()
+        if args.metrics_report:
+            report = service.metrics.report()
+            report['ingest'] = service.report()
+            with open(args.metrics_report, 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, indent=2)
+            print(f"Metrics report saved to {args.metrics_report}")
+    else:
+        try:
+            asyncio.run(run_server(args))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
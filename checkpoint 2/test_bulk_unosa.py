@@ -0,0 +1,240 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+
+from instrumentacija import PipelineMetrics
+from kodiranje_nizova import StringPool, encode_frame, with_pool_dtypes
+from stvaranje_i_popunjavanje_baze import (
+    AccountType, Base, Customer, Device, DeviceType, LoadCheckpoint, Transaction, populate_orm, populate_bulk,
+    populate_parallel, populate_resumable, read_checkpoints, resolve_lookup_keys,
+)
+
+
+def make_processed_df():
+    # Mali skup podataka u obliku Bank_Transaction_Fraud_Detection_PROCESSED.csv
+    return pd.DataFrame({
+        'Customer_ID': ['C1', 'C2', 'C1', 'C3'],
+        'Customer_Name': ['Ana', 'Ivo', 'Ana', 'Maja'],
+        'Gender': ['Female', 'Male', 'Female', 'Female'],
+        'Age': [34, 51, 34, 27],
+        'State': ['Kerala', 'Goa', 'Kerala', 'Delhi'],
+        'City': ['Kochi', 'Panaji', 'Kochi', 'New Delhi'],
+        'Bank_Branch': ['Kochi Branch', 'Panaji Branch', 'Kochi Branch', 'Delhi Branch'],
+        'Account_Type': ['Savings', 'Business', 'Savings', 'Checking'],
+        'Transaction_ID': ['T3', 'T1', 'T2', 'T4'],
+        'Transaction_Amount': [100.5, 2500.0, 13.99, 870.25],
+        'Merchant_ID': ['M1', 'M2', 'M1', 'M3'],
+        'Transaction_Type': ['Debit', 'Transfer', 'Debit', 'Credit'],
+        'Merchant_Category': ['Groceries', 'Electronics', 'Groceries', 'Health'],
+        'Account_Balance': [5000.0, 12000.75, 4986.01, 300.0],
+        'Transaction_Device': ['POS Terminal', 'Mobile App', 'POS Terminal', 'Mobile App'],
+        'Transaction_Location': ['Kochi, Kerala', 'Panaji, Goa', 'Kochi, Kerala', 'New Delhi, Delhi'],
+        'Device_Type': ['POS', 'Mobile', 'POS', 'Desktop'],
+        'Is_Fraud': [0, 1, 0, 0],
+        'Transaction_Currency': ['INR', 'INR', 'INR', 'INR'],
+        'Customer_Contact': ['+9111', '+9122', '+9111', '+9133'],
+        'Transaction_Description': ['Groceries', 'Laptop', 'Milk', 'Pharmacy'],
+        'Customer_Email': ['ana@x.com', 'ivo@x.com', 'ana@x.com', 'maja@x.com'],
+        'Transaction_DateTime': pd.to_datetime([
+            '2025-01-23 16:04:07', '2025-01-11 17:14:53', '2025-01-25 03:09:52', '2025-02-01 10:00:00',
+        ]),
+    })
+
+
+def dump_tables(engine):
+    tables = {}
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            rows = conn.execute(sqlalchemy.select(table).order_by(*table.primary_key.columns)).all()
+            tables[table.name] = [tuple(row) for row in rows]
+    return tables
+
+
+class TestBulkLoad(unittest.TestCase):
+    def setUp(self):
+        self.df = make_processed_df()
+
+        self.orm_engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.orm_engine)
+        session = sessionmaker(bind=self.orm_engine)()
+        populate_orm(session, self.df.copy())
+        session.close()
+
+        self.bulk_engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.bulk_engine)
+        populate_bulk(self.bulk_engine, self.df.copy(), batch_size=2)
+
+    def test_same_table_contents(self):
+        orm_tables = dump_tables(self.orm_engine)
+        bulk_tables = dump_tables(self.bulk_engine)
+        for name, rows in orm_tables.items():
+            self.assertEqual(rows, bulk_tables[name], f"Table '{name}' differs between ORM and bulk load.")
+
+    def test_row_counts(self):
+        bulk_tables = dump_tables(self.bulk_engine)
+        self.assertEqual(len(bulk_tables['transaction']), 4)
+        self.assertEqual(len(bulk_tables['customer']), 3)
+        self.assertEqual(len(bulk_tables['merchant']), 3)
+        self.assertEqual(len(bulk_tables['device']), 3)
+
+    def test_parallel_load(self):
+        for partition in ['hash', 'date']:
+            with tempfile.TemporaryDirectory() as tmp:
+                db_url = 'sqlite:///' + os.path.join(tmp, 'parallel.db')
+                engine = sqlalchemy.create_engine(db_url)
+                Base.metadata.create_all(engine)
+                populate_parallel(db_url, self.df.copy(), workers=2, partition=partition)
+                self.assertEqual(dump_tables(engine), dump_tables(self.orm_engine))
+                engine.dispose()
+
+    def test_resolved_keys(self):
+        lookup_rows, keys = resolve_lookup_keys(self.df)
+        self.assertEqual(list(lookup_rows[DeviceType]['name']), ['POS', 'Mobile', 'Desktop'])
+        self.assertEqual(keys['device_type_id'].tolist(), [1, 2, 1, 3])
+        self.assertEqual(keys['device_id'].tolist(), [1, 2, 1, 3])
+        self.assertEqual(lookup_rows[Device]['device_type_id'].tolist(), [1, 2, 3])
+        self.assertFalse(keys.isna().any().any())
+
+    def test_stage_metrics(self):
+        engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        metrics = PipelineMetrics('populate_bulk')
+        populate_bulk(engine, self.df.copy(), batch_size=2, metrics=metrics)
+        stages = {stage['stage']: stage for stage in metrics.report()['stages']}
+        self.assertListEqual(list(stages), ['resolve_keys', 'lookup_tables', 'customer', 'merchant', 'device', 'transaction'])
+        self.assertEqual(stages['transaction']['rows'], 4)
+        self.assertEqual(stages['customer']['rows'], 3)
+        # batch_size=2: po dvije INSERT naredbe za 4 transakcije i 3 kupca
+        self.assertEqual(stages['transaction']['db_round_trips'], 2)
+        self.assertEqual(stages['customer']['db_round_trips'], 2)
+        self.assertEqual(metrics.round_trips, sum(stage['db_round_trips'] for stage in stages.values()))
+        engine.dispose()
+
+    def test_encoded_strings(self):
+        # Isti sadržaj baze kad su ID-evi i opisi kodirani u rječnik nizova (ORM i bulk)
+        encoded = encode_frame(self.df.copy())
+        self.assertEqual(encoded['Transaction_ID'].dtype.name, 'category')
+        for populate in ['orm', 'bulk']:
+            engine = sqlalchemy.create_engine('sqlite://')
+            Base.metadata.create_all(engine)
+            if populate == 'orm':
+                session = sessionmaker(bind=engine)()
+                populate_orm(session, encoded.copy())
+                session.close()
+            else:
+                populate_bulk(engine, encoded.copy(), batch_size=2)
+            self.assertEqual(dump_tables(engine), dump_tables(self.orm_engine))
+            engine.dispose()
+
+    def tearDown(self):
+        self.orm_engine.dispose()
+        self.bulk_engine.dispose()
+
+
+class TestResumableLoad(unittest.TestCase):
+    def setUp(self):
+        self.df = make_processed_df()
+        self.expected_engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.expected_engine)
+        populate_bulk(self.expected_engine, self.df.copy())
+        self.expected = dump_tables(self.expected_engine)
+        del self.expected[LoadCheckpoint.__tablename__]
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.expected_engine.dispose()
+        self.engine.dispose()
+
+    def loaded_tables(self):
+        tables = dump_tables(self.engine)
+        del tables[LoadCheckpoint.__tablename__]
+        return tables
+
+    def test_resume_after_failure(self):
+        # Unos transakcije T4 (treća serija od po jednog retka) prekida punjenje
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TRIGGER fail_t4 BEFORE INSERT ON \"transaction\" WHEN NEW.transaction_id_pk = 'T4' "
+                "BEGIN SELECT RAISE(ABORT, 'simulated failure'); END")
+        with self.assertRaises(sqlalchemy.exc.IntegrityError):
+            populate_resumable(self.engine, self.df.copy(), 'test-load', batch_size=1)
+        with self.engine.connect() as conn:
+            self.assertEqual(read_checkpoints(conn, 'test-load')['transaction'], 3)
+            self.assertEqual(read_checkpoints(conn, 'test-load')['customer'], 3)
+
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TRIGGER fail_t4")
+        metrics = PipelineMetrics('populate_resumable')
+        populate_resumable(self.engine, self.df.copy(), 'test-load', batch_size=1, metrics=metrics)
+        stages = {stage['stage']: stage for stage in metrics.report()['stages']}
+        # Nastavak unosi samo zadnju transakciju (i njezin checkpoint u istoj transakciji)
+        self.assertEqual(stages['transaction']['rows'], 1)
+        self.assertEqual(stages['customer']['rows'], 0)
+        self.assertEqual(stages['transaction']['db_round_trips'], 2)
+        self.assertEqual(self.loaded_tables(), self.expected)
+
+    def test_rerun_is_idempotent(self):
+        populate_resumable(self.engine, self.df.copy(), 'first', batch_size=2)
+        self.assertEqual(populate_resumable(self.engine, self.df.copy(), 'first', batch_size=2), 0)
+        # Novi load_id ponovno unosi sve retke, ali upsert ne stvara duplikate
+        changed = self.df.copy()
+        changed.loc[0, 'Transaction_Amount'] = 999.0
+        populate_resumable(self.engine, changed, 'second', batch_size=3)
+        tables = self.loaded_tables()
+        self.assertEqual(len(tables['transaction']), 4)
+        self.assertEqual(len(tables['customer']), 3)
+        amounts = {row[0]: row[3] for row in tables['transaction']}
+        self.assertEqual(amounts['T3'], 999.0)
+
+    def account_types(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(sqlalchemy.select(Customer.customer_id_pk, AccountType.name, Device.name, DeviceType.name)
+                                .select_from(Transaction).join(Customer).join(AccountType).join(Device).join(DeviceType)
+                                .order_by(Customer.customer_id_pk).distinct()).all()
+        return [tuple(row) for row in rows]
+
+    def test_second_extract_keeps_existing_members(self):
+        populate_resumable(self.engine, self.df.copy(), 'first')
+        before = self.account_types()
+        ids = {name: id_ for id_, name in self.loaded_tables()['account_type']}
+        # Drugi izvod: samo 'Checking' (u prvom izvodu treći član), novi član 'Premium' i novi uređaj
+        second = self.df.iloc[[3, 3]].reset_index(drop=True)
+        second['Transaction_ID'] = ['T5', 'T6']
+        second['Customer_ID'] = ['C4', 'C5']
+        second['Account_Type'] = ['Checking', 'Premium']
+        second['Transaction_Device'] = ['Mobile App', 'Web Browser']
+        populate_resumable(self.engine, second, 'second')
+
+        tables = self.loaded_tables()
+        self.assertEqual({name: id_ for id_, name in tables['account_type']}, dict(ids, Premium=4))
+        self.assertEqual(len(tables['device']), 4)
+        self.assertEqual(len(tables['transaction']), 6)
+        self.assertEqual(self.account_types(), before + [('C4', 'Checking', 'Mobile App', 'Desktop'),
+                                                         ('C5', 'Premium', 'Web Browser', 'Desktop')])
+
+
+class TestStringPool(unittest.TestCase):
+    def test_stable_codes(self):
+        pool = StringPool()
+        first = pool.encode(pd.Series(['C2', 'C1', None, 'C2']))
+        second = pool.encode(pd.Series(['C3', 'C1'], dtype='category'))
+        self.assertEqual(first.tolist(), [0, 1, -1, 0])
+        self.assertEqual(second.tolist(), [2, 1])
+        self.assertEqual(list(pool.decode([2, -1, 0])), ['C3', None, 'C2'])
+
+    def test_shared_pools(self):
+        pools = {}
+        left = encode_frame(pd.DataFrame({'Customer_ID': ['C1', 'C2'], 'Age': [30, 40]}), pools)
+        right = encode_frame(pd.DataFrame({'Customer_ID': ['C3', 'C2']}), pools)
+        left, right = with_pool_dtypes(left, pools), with_pool_dtypes(right, pools)
+        self.assertEqual(left['Customer_ID'].dtype, right['Customer_ID'].dtype)
+        self.assertEqual((left['Customer_ID'] == right['Customer_ID']).tolist(), [False, True])
+        self.assertEqual(left['Age'].tolist(), [30, 40])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
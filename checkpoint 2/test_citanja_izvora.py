@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import pyarrow as pa
+
+from citanje_izvora import SCHEMA_SUFFIX, infer_schema, iter_csv_arrow, read_csv_arrow
+from predprocesiranje_skupa import SOURCE_DTYPES, preprocess_streaming
+from test_kvalitete_podataka import raw_rows
+
+
+def source_rows(count):
+    return raw_rows([{
+        'Transaction_ID': f"T{i}", 'Customer_ID': f"C{i % 7}", 'Age': str(20 + i % 50),
+        'Transaction_Amount': f"{i * 1.5:.2f}", 'Transaction_Time': f"10:{i % 60:02d}:00",
+        'Customer_Contact': '+9198765' if i % 3 else None,
+    } for i in range(count)])
+
+
+def write_compressed(df, path, compression):
+    with pa.output_stream(path, compression=compression) as stream:
+        stream.write(df.to_csv(index=False).encode('utf-8'))
+
+
+class TestArrowReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = source_rows(1000)
+        self.paths = {'none': os.path.join(self.tmp.name, 'raw.csv')}
+        self.df.to_csv(self.paths['none'], index=False)
+        for compression, suffix in [('gzip', '.csv.gz'), ('zstd', '.csv.zst')]:
+            self.paths[compression] = os.path.join(self.tmp.name, 'raw' + suffix)
+            write_compressed(self.df, self.paths[compression], compression)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunks_match_pandas(self):
+        expected = list(pd.read_csv(self.paths['none'], dtype=SOURCE_DTYPES, chunksize=300))
+        for compression, path in self.paths.items():
+            # Mali blokovi: dijelovi se slažu iz više Arrow blokova i režu na granici od 300 redaka
+            chunks = list(iter_csv_arrow(path, 300, string_columns=SOURCE_DTYPES, block_size=4096))
+            self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100], compression)
+            for chunk, pandas_chunk in zip(chunks, expected):
+                pd.testing.assert_frame_equal(chunk.astype(object).reset_index(drop=True),
+                                              pandas_chunk.astype(object).reset_index(drop=True), check_dtype=False)
+
+    def test_schema_inferred_once_and_cached(self):
+        path = self.paths['gzip']
+        schema = infer_schema(path, block_size=4096)
+        self.assertEqual(schema.field('Age').type, pa.int64())
+        self.assertTrue(os.path.exists(path + SCHEMA_SUFFIX))
+        # Typed columns without string_columns; string_columns keep the source text
+        self.assertEqual(read_csv_arrow(path)['Age'].dtype, 'int64')
+        self.assertEqual(read_csv_arrow(path, string_columns=['Age'])['Age'].iloc[1], '21')
+        # Changed source invalidates the cached schema
+        write_compressed(self.df.assign(Age='x'), path, 'gzip')
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(infer_schema(path, block_size=4096).field('Age').type, pa.string())
+
+    def test_bad_value_after_first_block(self):
+        # Shema se zaključuje iz prvog bloka od 4 KB; 'abc' u zadnjem retku ne odgovara tipu int64
+        path = os.path.join(self.tmp.name, 'late_error.csv')
+        self.df.assign(Age=self.df['Age'].where(self.df.index < 999, 'abc')).to_csv(path, index=False)
+        self.assertEqual(infer_schema(path, block_size=4096).field('Age').type, pa.int64())
+
+        chunks = list(iter_csv_arrow(path, 300, block_size=4096))
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+        self.assertEqual(chunks[0]['Age'].dtype, 'int64')
+        self.assertEqual(chunks[-1]['Age'].iloc[-2:].tolist(), ['68', 'abc'])
+        self.assertEqual(pd.concat(chunks)['Transaction_ID'].tolist(), self.df['Transaction_ID'].tolist())
+        # Proširena shema se pamti, pa sljedeće čitanje odmah čita stupac kao tekst
+        self.assertEqual(infer_schema(path, block_size=4096).field('Age').type, pa.string())
+        self.assertEqual(read_csv_arrow(path, block_size=4096)['Age'].iloc[-1], 'abc')
+
+    def test_preprocess_readers_agree(self):
+        outputs = {}
+        for reader in ['pandas', 'arrow']:
+            output = os.path.join(self.tmp.name, f"processed_{reader}.csv")
+            preprocess_streaming(self.paths['zstd'], output, chunksize=400, reader=reader, threads=2)
+            with open(output, encoding='utf-8') as output_file:
+                outputs[reader] = output_file.read()
+        self.assertEqual(outputs['pandas'], outputs['arrow'])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from kvaliteta_podataka import QualityStage
+from predprocesiranje_skupa import SOURCE_DTYPES, clean_chunk
+
+
+def raw_rows(rows):
+    base = {
+        'Customer_ID': 'C1', 'Customer_Name': 'Ana', 'Gender': 'Female', 'Age': '34', 'State': 'Kerala',
+        'City': 'Kochi', 'Bank_Branch': 'Kochi Branch', 'Account_Type': 'Savings', 'Transaction_ID': 'T1',
+        'Transaction_Date': '23-01-2025', 'Transaction_Time': '16:04:07', 'Transaction_Amount': '$1,200.50',
+        'Merchant_ID': 'M1', 'Transaction_Type': 'Debit', 'Merchant_Category': 'Groceries',
+        'Account_Balance': '5000', 'Transaction_Device': 'POS Terminal', 'Transaction_Location': 'Kochi, Kerala',
+        'Device_Type': 'POS', 'Is_Fraud': '0', 'Transaction_Currency': 'INR', 'Customer_Contact': '+9111',
+        'Transaction_Description': 'Groceries', 'Customer_Email': 'ana@x.com',
+    }
+    return pd.DataFrame([dict(base, **row) for row in rows], columns=list(SOURCE_DTYPES))
+
+
+class TestQualityStage(unittest.TestCase):
+    def test_rules_and_quarantine(self):
+        chunks = [
+            raw_rows([
+                {'Transaction_ID': 'T1'},
+                # Prvi redak s neispravnim iznosom ne zaustavlja čišćenje '$' u ostalima (nema provjere samo iloc[0])
+                {'Transaction_ID': 'T2', 'Transaction_Amount': 'abc', 'Age': '250'},
+                {'Transaction_ID': 'T3', 'Transaction_Description': None},
+                {'Transaction_ID': 'T4', 'Merchant_ID': None},
+                {'Transaction_ID': 'T1'},
+            ]),
+            raw_rows([
+                {'Transaction_ID': 'T5', 'Transaction_Date': '2025-01-23', 'Device_Type': 'Fax'},
+                {'Transaction_ID': 'T3'},
+                {'Transaction_ID': 'T6', 'Is_Fraud': '2', 'Account_Balance': '1,000'},
+                # Prazan uređaj dao bi NULL strani ključ u OLTP bazi
+                {'Transaction_ID': 'T7', 'Transaction_Device': None},
+            ]),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            quarantine_path = os.path.join(tmp, 'quarantine.csv')
+            quality = QualityStage(quarantine_path=quarantine_path)
+            cleaned = pd.concat([clean_chunk(chunk, quality=quality) for chunk in chunks])
+            quarantine = pd.read_csv(quarantine_path)
+
+        self.assertEqual(cleaned['Transaction_ID'].tolist(), ['T1', 'T3'])
+        self.assertEqual(cleaned['Transaction_Amount'].tolist(), [1200.5, 1200.5])
+        self.assertEqual(cleaned['Transaction_DateTime'].iloc[0], pd.Timestamp('2025-01-23 16:04:07'))
+        self.assertEqual(quarantine['Transaction_ID'].tolist(), ['T2', 'T4', 'T1', 'T5', 'T3', 'T6', 'T7'])
+        self.assertEqual(quarantine['Reject_Reason'].tolist(), [
+            'bad_number;age_out_of_range', 'missing_value', 'duplicate_transaction_id',
+            'bad_datetime;unknown_device_type', 'duplicate_transaction_id', 'bad_fraud_flag', 'missing_value',
+        ])
+        report = quality.report()
+        self.assertEqual((report['rows_in'], report['rows_rejected']), (9, 7))
+        self.assertEqual(report['rules']['duplicate_transaction_id'], 2)
+        self.assertEqual(report['rules']['amount_out_of_range'], 0)
+
+    def test_duplicates_within_chunk_only(self):
+        cleaned = clean_chunk(raw_rows([{'Transaction_ID': 'T1'}, {'Transaction_ID': 'T1'}]))
+        self.assertEqual(len(cleaned), 1)
+        self.assertEqual(len(clean_chunk(raw_rows([{'Transaction_ID': 'T1'}]))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
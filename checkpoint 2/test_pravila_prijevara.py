@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import sqlalchemy
+
+from pravila_prijevara import ANY_RULE, FraudRule, RuleEngine, run_scoring
+from stvaranje_i_popunjavanje_baze import Base, FraudRuleHit, populate_bulk
+from test_bulk_unosa import make_processed_df
+
+RULES = [
+    FraudRule('big_share', "amount_to_balance > 0.2"),
+    FraudRule('electronics_mobile', "merchant_category == 'Electronics' and device_type in ['Mobile', 'ATM']"),
+    FraudRule('night_pos', "3 <= hour < 5 and not device_type != 'POS'"),
+    FraudRule('unknown_category', "merchant_category == 'Travel'"),
+]
+
+
+class TestFraudRules(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        populate_bulk(self.engine, make_processed_df())
+
+    def hits(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(sqlalchemy.select(FraudRuleHit.rule_name, FraudRuleHit.transaction_id_pk)
+                                .order_by(FraudRuleHit.rule_name, FraudRuleHit.transaction_id_pk)).all()
+        return [tuple(row) for row in rows]
+
+    def test_scoring_writes_hits_and_reports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'scores.csv')
+            scorer = run_scoring(self.engine, RULES, batch_size=3, output_path=output)
+            scores = pd.read_csv(output)
+        self.assertEqual(self.hits(), [('big_share', 'T1'), ('big_share', 'T4'), ('electronics_mobile', 'T1'),
+                                       ('night_pos', 'T2')])
+        self.assertEqual(scores['transaction_id_pk'].tolist(), ['T1', 'T2', 'T3', 'T4'])
+        self.assertEqual(scores['rules_hit'].tolist(), [2, 1, 0, 1])
+
+        report = {rule['rule']: rule for rule in scorer.report()['rules']}
+        self.assertEqual(scorer.report()['rows'], 4)
+        self.assertEqual((report['big_share']['precision'], report['big_share']['recall']), (0.5, 1.0))
+        self.assertEqual((report['night_pos']['precision'], report['night_pos']['recall']), (0.0, 0.0))
+        self.assertEqual((report['unknown_category']['hits'], report['unknown_category']['precision']), (0, None))
+        self.assertEqual((report[ANY_RULE]['hits'], report[ANY_RULE]['true_positives']), (3, 1))
+
+        # Ponovno bodovanje istih pravila zamjenjuje pogotke, ne dodaje ih
+        run_scoring(self.engine, [FraudRule('big_share', "amount_to_balance > 2")])
+        self.assertEqual(self.hits()[:1], [('big_share', 'T4')])
+        self.assertEqual(len(self.hits()), 3)
+
+    def test_invalid_rules_rejected_at_compile_time(self):
+        for expression in ["amount.real > 1", "merchant_category > 'A'", "unknown > 1", "open('x')",
+                           "device_type == 3", "amount == 'x'", "amount >"]:
+            with self.assertRaises(ValueError, msg=expression):
+                RuleEngine([FraudRule('bad', expression)])
+        with self.assertRaises(ValueError):
+            RuleEngine([FraudRule('a', "amount > 1"), FraudRule('a', "amount > 2")])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,79 @@
+import glob
+import os
+import tempfile
+import unittest
+import pandas as pd
+import sqlalchemy
+
+from kvaliteta_podataka import QualityStage
+from predprocesiranje_skupa import iter_processed, preprocess_full, preprocess_streaming, read_processed
+from stvaranje_i_popunjavanje_baze import Base, load_processed_data, populate_bulk
+from test_bulk_unosa import dump_tables
+from test_citanja_izvora import source_rows
+
+
+def read_text(path):
+    with open(path, encoding='utf-8') as text_file:
+        return text_file.read()
+
+
+class TestPreprocessModes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Duplikati preko granice dijelova i retci koje pravila kvalitete odbacuju
+        df = source_rows(1000)
+        df.loc[[5, 650], 'Transaction_ID'] = 'T1'
+        df.loc[[10, 420], 'Transaction_Amount'] = ['abc', '-5']
+        df.loc[700, 'Transaction_Date'] = '2025-01-23'
+        self.source = os.path.join(self.tmp.name, 'raw.csv')
+        df.to_csv(self.source, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_streaming_matches_full(self):
+        preprocess_full(self.source, self.path('full.csv'), quality=QualityStage(quarantine_path=self.path('full_q.csv')))
+        rows = preprocess_streaming(self.source, self.path('streaming.csv'), chunksize=300,
+                                    quality=QualityStage(quarantine_path=self.path('streaming_q.csv')))
+        self.assertEqual(rows, 1000 - 5)
+        # Izlaz i karantena su jednaki do bajta, iako se skup u streaming načinu čita u četiri dijela
+        self.assertEqual(read_text(self.path('streaming.csv')), read_text(self.path('full.csv')))
+        self.assertEqual(read_text(self.path('streaming_q.csv')), read_text(self.path('full_q.csv')))
+
+    def loaded_tables(self, path):
+        engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        populate_bulk(engine, load_processed_data(path))
+        tables = dump_tables(engine)
+        engine.dispose()
+        return tables
+
+    def test_parquet_round_trip(self):
+        directory = self.path('processed.parquet')
+        preprocess_streaming(self.source, directory, chunksize=300, output_format='parquet')
+        preprocess_streaming(self.source, self.path('processed.csv'), chunksize=300)
+        self.assertEqual(len(glob.glob(os.path.join(directory, 'part-*.parquet'))), 4)
+
+        df = read_processed(directory)
+        expected = read_processed(self.path('processed.csv'), string_columns=['Customer_Contact'])
+        self.assertEqual(len(df), 995)
+        # Tipovi preživljavaju zapis: kontakti ostaju tekst s '+', datum je datetime, atributi su rječnički kodirani
+        self.assertEqual(df['Customer_Contact'].dropna().unique().tolist(), ['+9198765'])
+        self.assertEqual(int(df['Customer_Contact'].isna().sum()), int(expected['Customer_Contact'].isna().sum()))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['Transaction_DateTime']))
+        self.assertEqual(df['Device_Type'].dtype.name, 'category')
+        self.assertEqual(df['Age'].dtype, expected['Age'].dtype)
+        pd.testing.assert_frame_equal(df.astype({column: object for column in df.select_dtypes('category').columns}),
+                                      expected, check_dtype=False)
+        sizes = [len(chunk) for chunk in iter_processed(directory, chunksize=250)]
+        self.assertEqual((max(sizes), sum(sizes)), (250, 995))
+
+        # Punjenje baze prihvaća direktorij i daje iste tablice kao iz CSV-a
+        self.assertEqual(self.loaded_tables(directory), self.loaded_tables(self.path('processed.csv')))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
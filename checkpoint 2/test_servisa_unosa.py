@@ -0,0 +1,165 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import sqlalchemy
+
+from kvaliteta_podataka import KNOWN_VALUES, QualityStage
+from predprocesiranje_skupa import DATETIME_FORMAT
+from servis_unosa import IngestionService, ingestion_engine, send_transactions
+from stvaranje_i_popunjavanje_baze import Base, populate_bulk
+from test_bulk_unosa import dump_tables, make_processed_df
+from test_kvalitete_podataka import raw_rows
+
+
+# Transakcije iz make_processed_df u obliku izvornog CSV-a (odvojeni datum i vrijeme, brojevi kao tekst)
+def source_records(df):
+    records = []
+    for row in df.drop(columns=['Transaction_DateTime']).astype(object).to_dict('records'):
+        records.append({column: str(value) for column, value in row.items()})
+    stamps = df['Transaction_DateTime'].dt.strftime(DATETIME_FORMAT).str.split(' ')
+    for record, (date, time) in zip(records, stamps):
+        record.update({'Transaction_Date': date, 'Transaction_Time': time})
+    return records
+
+
+class TestIngestionService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = ingestion_engine('sqlite:///' + os.path.join(self.tmp.name, 'ingest.db'), pool_size=2)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def run_service(self, scenario, **options):
+        async def run():
+            service = IngestionService(self.engine, pool_size=2, **options)
+            await service.start()
+            try:
+                result = await scenario(service)
+            finally:
+                await service.stop()
+            return service, result
+        return asyncio.run(run())
+
+    def test_matches_bulk_load(self):
+        df = make_processed_df()
+
+        async def over_socket(service):
+            server = await service.serve(port=0)
+            port = server.sockets[0].getsockname()[1]
+            responses = await send_transactions(source_records(df), port=port)
+            server.close()
+            await server.wait_closed()
+            return responses
+
+        service, responses = self.run_service(over_socket, batch_size=2, flush_interval=0.01)
+        self.assertEqual([response['status'] for response in responses], ['ok'] * 4)
+        self.assertEqual([response['transaction_id'] for response in responses], df['Transaction_ID'].tolist())
+
+        # Isti sadržaj (i id-evi šifarnika) kao bulk punjenje predprocesiranog skupa
+        bulk_engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(bulk_engine)
+        populate_bulk(bulk_engine, df.copy())
+        self.assertEqual(dump_tables(self.engine), dump_tables(bulk_engine))
+        bulk_engine.dispose()
+
+        report = service.report()
+        self.assertEqual(report['written'], 4)
+        self.assertEqual(report['batches'], 2)
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+
+    def test_rejected_and_duplicate_transactions(self):
+        records = source_records(make_processed_df())
+        bad_amount = dict(records[1], Transaction_ID='T9', Transaction_Amount='abc')
+        no_customer = dict(records[2], Transaction_ID='T8', Customer_ID='')
+        bad_date = dict(records[3], Transaction_ID='T7', Transaction_Date='2025-01-01')
+
+        async def ingest(service):
+            first = await asyncio.gather(*(service.ingest(record) for record in records[:2] + [bad_amount, no_customer, bad_date]))
+            # Postojeći Transaction_ID odbija se samo za taj redak, ostatak serije se upisuje
+            second = await asyncio.gather(*(service.ingest(record) for record in [records[0], records[2]]))
+            return first + second
+
+        service, results = self.run_service(ingest, batch_size=10, flush_interval=0.01)
+        self.assertEqual([result['status'] for result in results],
+                         ['ok', 'ok', 'rejected', 'rejected', 'rejected', 'failed', 'ok'])
+        self.assertIn('Customer_ID', results[3]['error'])
+        with self.engine.connect() as conn:
+            ids = conn.execute(sqlalchemy.text("SELECT transaction_id_pk FROM \"transaction\" ORDER BY 1")).scalars().all()
+        self.assertEqual(ids, ['T1', 'T2', 'T3'])
+        self.assertEqual(service.report()['rejected'], 3)
+
+    def test_restart_keeps_data(self):
+        records = source_records(make_processed_df())
+        self.run_service(lambda service: ingest_part(service, records[:2]))
+        # Drugo pokretanje učitava postojeće šifarnike i kupce iz baze (nema drop_all ni duplikata)
+        service, _ = self.run_service(lambda service: ingest_part(service, records[2:]))
+        tables = dump_tables(self.engine)
+        self.assertEqual(len(tables['transaction']), 4)
+        self.assertEqual(len(tables['customer']), 3)
+        self.assertEqual(len(tables['device_type']), 3)
+        self.assertIn('Mobile', service.cache.lookups['Device_Type'])
+
+
+    def test_bad_record_rejected_alone(self):
+        records = source_records(make_processed_df())
+        half_fraud = dict(records[1], Transaction_ID='T9', Is_Fraud='0.5')
+        word_fraud = dict(records[2], Transaction_ID='T8', Is_Fraud='yes')
+
+        # Neispravan Is_Fraud odbija samo taj redak, s istim kodom razloga kao u predprocesiranju
+        _, results = self.run_service(lambda service: ingest_part(service, records[:2] + [half_fraud, word_fraud] + records[2:]),
+                                      batch_size=10, flush_interval=0.05)
+        self.assertEqual([result['status'] for result in results], ['ok', 'ok', 'rejected', 'rejected', 'ok', 'ok'])
+        _, bad = QualityStage().apply(raw_rows([{'Transaction_ID': 'T9', 'Is_Fraud': '0.5'},
+                                                {'Transaction_ID': 'T8', 'Is_Fraud': 'yes'}]))
+        self.assertEqual(bad['Reject_Reason'].tolist(), ['bad_fraud_flag', 'bad_number;bad_fraud_flag'])
+        self.assertEqual([result['error'] for result in results[2:4]],
+                         [f"quality rules failed: {reason}" for reason in bad['Reject_Reason']])
+        self.assertEqual(len(dump_tables(self.engine)['transaction']), 4)
+
+    def test_new_lookup_values(self):
+        records = source_records(make_processed_df())
+        novel = dict(records[0], Transaction_ID='T9', Transaction_Currency='USD', Device_Type='Kiosk',
+                     Merchant_Category='Travel')
+
+        # Bez known_values novi članovi ulaze u šifarnike; s popisom iz predprocesiranja redak se odbija
+        _, results = self.run_service(lambda service: ingest_part(service, records + [novel]))
+        self.assertEqual([result['status'] for result in results], ['ok'] * 5)
+        tables = dump_tables(self.engine)
+        self.assertIn('USD', [row[1] for row in tables['currency']])
+        self.assertEqual(len(tables['device_type']), 4)
+
+        strict = dict(novel, Transaction_ID='T10')
+        _, results = self.run_service(lambda service: ingest_part(service, [strict]), known_values=KNOWN_VALUES)
+        self.assertEqual(results[0]['status'], 'rejected')
+        self.assertIn('quality rules failed', results[0]['error'])
+
+    def test_batcher_survives_flush_error(self):
+        records = source_records(make_processed_df())
+
+        async def failing_once(service):
+            flush = service._flush
+
+            async def broken(batch):
+                service._flush = flush
+                raise RuntimeError('boom')
+            service._flush = broken
+            first = await service.ingest(records[0])
+            # Skupljanje serija nastavlja raditi nakon greške
+            second = await service.ingest(records[1])
+            return first, second
+
+        _, (first, second) = self.run_service(failing_once, batch_size=1, flush_interval=0.01)
+        self.assertEqual(first['status'], 'failed')
+        self.assertIn('boom', first['error'])
+        self.assertEqual(second['status'], 'ok')
+
+
+async def ingest_part(service, records):
+    return await asyncio.gather(*(service.ingest(record) for record in records))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+import sqlalchemy
+
+from stvaranje_i_popunjavanje_baze import Base, populate_bulk
+from test_bulk_unosa import make_processed_df
+from uskladivanje import mismatched_partitions, partition_checksums, stream_database, stream_processed
+
+
+class TestStreamingReconciliation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        populate_bulk(self.engine, make_processed_df())
+
+    def test_csv_checksums_match_database(self):
+        # Kontakti '+91..' izgledaju kao brojevi; CSV se streama u dijelovima od dva retka
+        path = os.path.join(self.tmp.name, 'processed.csv')
+        make_processed_df().to_csv(path, index=False)
+        self.assertEqual(next(stream_processed(path, chunksize=2))['Customer_Contact'].tolist(), ['+9111', '+9122'])
+        csv_checksums = partition_checksums(stream_processed(path, chunksize=2))
+        with self.engine.connect() as conn:
+            db_checksums = partition_checksums(stream_database(conn, chunksize=2))
+        self.assertEqual(int(csv_checksums[0].sum()), 4)
+        self.assertEqual(len(mismatched_partitions(csv_checksums, db_checksums)), 0)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,142 @@
+# Usklađivanje predprocesiranog skupa s OLTP bazom (bank_fraud_db) bez učitavanja cijelih skupova: obje strane
+# se streamaju u dijelovima i uspoređuju se broj redaka i zbroj hasheva redaka po particiji Transaction_ID-a;
+# tek za particije koje se razlikuju traže se točni retci. Koriste ga test_importa.py i benchmark.
+import numpy as np
+import pandas as pd
+import sqlalchemy
+from predprocesiranje_skupa import iter_processed
+from kodiranje_nizova import ENCODED_COLUMNS
+
+# Usklađivanje: broj redaka po dijelu pri streamingu i broj hash particija po Transaction_ID
+RECONCILE_CHUNK_SIZE = 50000
+RECONCILE_PARTITIONS = 64
+
+# Upit na bazu koji dohvaća sve podatke i spaja tablice
+JOIN_QUERY = """
+SELECT
+    t.transaction_id_pk AS "Transaction_ID",
+    c.customer_id_pk AS "Customer_ID",
+    c.name AS "Customer_Name",
+    c.gender AS "Gender",
+    c.age AS "Age",
+    c.state AS "State",
+    c.city AS "City",
+    bb.name AS "Bank_Branch",
+    at.name AS "Account_Type",
+    t.transaction_datetime AS "Transaction_DateTime", -- Ili t.date, t.time ako su odvojeni
+    t.amount AS "Transaction_Amount",
+    m.merchant_id_pk AS "Merchant_ID",
+    mcat.name AS "Merchant_Category",
+    tt.name AS "Transaction_Type",
+    t.account_balance_after AS "Account_Balance",
+    dev.name AS "Transaction_Device", -- Ime uređaja
+    dt.name AS "Device_Type",
+    loc.description AS "Transaction_Location",
+    t.is_fraud AS "Is_Fraud",
+    cur.code AS "Transaction_Currency",
+    c.contact AS "Customer_Contact",
+    t.description AS "Transaction_Description",
+    c.email AS "Customer_Email"
+FROM {transaction} t
+JOIN customer c ON t.customer_id = c.customer_id_pk
+JOIN account_type at ON c.account_type_id = at.id
+JOIN bank_branch bb ON c.bank_branch_id = bb.id
+JOIN merchant m ON t.merchant_id = m.merchant_id_pk
+JOIN merchant_category mcat ON m.category_id = mcat.id
+JOIN transaction_type tt ON t.transaction_type_id = tt.id
+JOIN device dev ON t.device_id = dev.id
+JOIN device_type dt ON dev.device_type_id = dt.id
+JOIN location loc ON t.location_id = loc.id
+JOIN currency cur ON t.currency_id = cur.id
+ORDER BY t.transaction_id_pk ASC
+"""
+
+# Stupci koji se uspoređuju, redoslijedom iz JOIN_QUERY
+COMPARED_COLUMNS = [
+    'Transaction_ID', 'Customer_ID', 'Customer_Name', 'Gender', 'Age', 'State', 'City', 'Bank_Branch',
+    'Account_Type', 'Transaction_DateTime', 'Transaction_Amount', 'Merchant_ID', 'Merchant_Category',
+    'Transaction_Type', 'Account_Balance', 'Transaction_Device', 'Device_Type', 'Transaction_Location',
+    'Is_Fraud', 'Transaction_Currency', 'Customer_Contact', 'Transaction_Description', 'Customer_Email',
+]
+# Iznosi su u bazi Float stupci (u MySQL-u FLOAT), pa se uspoređuju s preciznošću float32
+FLOAT_COLUMNS = ['Transaction_Amount', 'Account_Balance']
+
+
+def joined_query(connection):
+    # "transaction" je rezervirana riječ u nekim bazama (npr. SQLite), pa se navodi kroz dijalekt
+    transaction = connection.dialect.identifier_preparer.quote('transaction')
+    return sqlalchemy.text(JOIN_QUERY.format(transaction=transaction))
+
+
+# Konverzija tipova da podaci iz CSV-a i iz baze budu usporedivi
+def normalize_types(df):
+    if 'Transaction_DateTime' in df.columns:
+        df['Transaction_DateTime'] = pd.to_datetime(df['Transaction_DateTime'])
+    df['Age'] = pd.to_numeric(df['Age'], errors='coerce').astype('Int64')
+    df['Transaction_Amount'] = pd.to_numeric(df['Transaction_Amount'], errors='coerce')
+    df['Account_Balance'] = pd.to_numeric(df['Account_Balance'], errors='coerce')
+    df['Is_Fraud'] = df['Is_Fraud'].astype(bool)
+    return df
+
+
+def stream_processed(path, chunksize=RECONCILE_CHUNK_SIZE):
+    for chunk in iter_processed(path, chunksize, as_category=False, string_columns=ENCODED_COLUMNS):
+        yield normalize_types(chunk)
+
+
+def stream_database(connection, chunksize=RECONCILE_CHUNK_SIZE):
+    result = connection.execution_options(stream_results=True).execute(joined_query(connection))
+    columns = list(result.keys())
+    for rows in result.partitions(chunksize):
+        yield normalize_types(pd.DataFrame(rows, columns=columns))
+
+
+def partition_ids(transaction_ids, partitions=RECONCILE_PARTITIONS):
+    return (pd.util.hash_array(transaction_ids.astype(str).to_numpy(dtype=object)) % partitions).astype(np.int64)
+
+
+# Kanonski tekstualni oblik svakog stupca (isti za CSV i bazu); nedostajuće vrijednosti postaju ''
+def canonical_frame(df):
+    canonical = pd.DataFrame(index=df.index)
+    for column in COMPARED_COLUMNS:
+        values = df[column]
+        text = values.astype(np.float32).astype(str) if column in FLOAT_COLUMNS else values.astype(str)
+        canonical[column] = text.where(values.notna(), '')
+    return canonical
+
+
+# Broj redaka i zbroj hasheva redaka (mod 2^64, neovisan o redoslijedu) po particiji, u jednom prolazu
+def partition_checksums(chunks, partitions=RECONCILE_PARTITIONS):
+    counts = np.zeros(partitions, dtype=np.int64)
+    sums = np.zeros(partitions, dtype=np.uint64)
+    for chunk in chunks:
+        parts = partition_ids(chunk['Transaction_ID'], partitions)
+        hashes = pd.util.hash_pandas_object(canonical_frame(chunk), index=False).to_numpy()
+        counts += np.bincount(parts, minlength=partitions)
+        np.add.at(sums, parts, hashes)
+    return counts, sums
+
+
+def rows_in_partitions(chunks, wanted, partitions=RECONCILE_PARTITIONS):
+    frames = [chunk[np.isin(partition_ids(chunk['Transaction_ID'], partitions), wanted)] for chunk in chunks]
+    frames = [frame for frame in frames if len(frame)]
+    return canonical_frame(pd.concat(frames)) if frames else pd.DataFrame(columns=COMPARED_COLUMNS)
+
+
+# Točni retci i stupci koji se razlikuju: (Transaction_ID, stupac, vrijednost u CSV-u, vrijednost u bazi)
+def diff_rows(csv_rows, db_rows):
+    merged = csv_rows.merge(db_rows, on='Transaction_ID', how='outer', suffixes=('_csv', '_db'), indicator=True)
+    differences = [(row, '<row>', 'present', 'missing') for row in merged.loc[merged['_merge'] == 'left_only', 'Transaction_ID']]
+    differences += [(row, '<row>', 'missing', 'present') for row in merged.loc[merged['_merge'] == 'right_only', 'Transaction_ID']]
+    both = merged[merged['_merge'] == 'both']
+    for column in COMPARED_COLUMNS[1:]:
+        differs = both[both[f'{column}_csv'] != both[f'{column}_db']]
+        differences += list(zip(differs['Transaction_ID'], [column] * len(differs),
+                                differs[f'{column}_csv'], differs[f'{column}_db']))
+    return differences
+
+
+# Particije u kojima se broj redaka ili zbroj hasheva razlikuje; checksums su parovi (counts, sums)
+def mismatched_partitions(csv_checksums, db_checksums):
+    (csv_counts, csv_sums), (db_counts, db_sums) = csv_checksums, db_checksums
+    return np.flatnonzero((csv_counts != db_counts) | (csv_sums != db_sums))
@@ -0,0 +1,193 @@
+import pandas as pd
+from sqlalchemy import select, func, case, delete, or_
+from dimenzijski_model import (AggFraudDay, AggFraudDayBranch, AggFraudDayDeviceType, AggFraudDayLocation,
+                               AggFraudMonthCategory, AggFraudMonthAll, FactTransaction, DimDate, DimDevice,
+                               DimLocation, DimOtherTransactionAttributes)
+from predmemorija_upita import advance_table_watermarks
+
+UNKNOWN_MEMBER = 'Unknown'
+MEASURES = ['transaction_count', 'fraud_count', 'transaction_amount', 'fraud_amount']
+
+# Atribut upita -> stupac u agregatnim tablicama
+ATTRIBUTES = {
+    'date': 'date_skey',
+    'month': 'month_skey',
+    'bank_branch': 'bank_branch_name',
+    'merchant_category': 'merchant_category_name',
+    'device_type': 'device_type_name',
+    'location': 'transaction_location_description',
+}
+
+
+class Rollup:
+    def __init__(self, model, attributes):
+        self.model = model
+        self.table = model.__table__
+        self.name = self.table.name
+        # Atributi po kojima tablica može grupirati i filtrirati
+        self.attributes = attributes
+        self.key_columns = [ATTRIBUTES[attribute] for attribute in attributes]
+        # Stupac po kojem se pri inkrementalnom ažuriranju mijenja samo zahvaćeni vremenski raspon
+        self.range_column = 'date_skey' if 'date' in attributes else 'month_skey'
+
+
+ROLLUPS = [
+    Rollup(AggFraudDay, ['date', 'month']),
+    Rollup(AggFraudDayBranch, ['date', 'month', 'bank_branch']),
+    Rollup(AggFraudDayDeviceType, ['date', 'month', 'device_type']),
+    Rollup(AggFraudDayLocation, ['date', 'month', 'location']),
+    Rollup(AggFraudMonthCategory, ['month', 'merchant_category']),
+    Rollup(AggFraudMonthAll, ['month', 'bank_branch', 'merchant_category', 'device_type', 'location']),
+]
+
+
+# Retci za rollupe iz jedne serije činjenica: date_skey iz činjenica, opisni atributi iz serije transakcija
+def rollup_rows(date_skeys, batch):
+    is_fraud = batch['is_fraud'].astype(int).to_numpy()
+    amount = batch['amount'].astype(float).to_numpy()
+    date_skeys = pd.Series(date_skeys).astype('int64').to_numpy()
+    return pd.DataFrame({
+        'date_skey': date_skeys,
+        'month_skey': date_skeys // 100,
+        'bank_branch_name': batch['bank_branch_name'].fillna(UNKNOWN_MEMBER).to_numpy(),
+        'merchant_category_name': batch['merchant_category_name'].fillna(UNKNOWN_MEMBER).to_numpy(),
+        'device_type_name': batch['device_type_name'].fillna(UNKNOWN_MEMBER).to_numpy(),
+        'transaction_location_description': batch['location_description'].fillna(UNKNOWN_MEMBER).to_numpy(),
+        'transaction_count': 1,
+        'fraud_count': is_fraud,
+        'transaction_amount': amount,
+        'fraud_amount': amount * is_fraud,
+    })
+
+
+# Inkrementalno ažuriranje: za svaki rollup čitaju se postojeći retci zahvaćenog vremenskog raspona
+# (serije su poredane po vremenu, pa je raspon mali), zbrajaju se s novima i raspon se ponovno upisuje.
+def apply_rollups(conn, rows):
+    if not len(rows):
+        return
+    for rollup in ROLLUPS:
+        columns = [column.name for column in rollup.table.columns]
+        keys = [column for column in columns if column not in MEASURES]
+        delta = rows.groupby(keys, as_index=False)[MEASURES].sum()
+        range_column = rollup.table.c[rollup.range_column]
+        in_range = range_column.between(int(delta[rollup.range_column].min()), int(delta[rollup.range_column].max()))
+        existing = pd.DataFrame(conn.execute(select(rollup.table).where(in_range)).all(), columns=columns)
+        merged = pd.concat([existing, delta], ignore_index=True).groupby(keys, as_index=False)[MEASURES].sum()
+        conn.execute(delete(rollup.table).where(in_range))
+        conn.execute(rollup.table.insert(), merged[columns].to_dict('records'))
+    advance_table_watermarks(conn, [rollup.name for rollup in ROLLUPS])
+
+
+# Izrazi nad fact_transaction i dimenzijama s istim nazivima kao u rollupima
+def fact_columns():
+    return {
+        'date_skey': FactTransaction.date_skey_fk,
+        'month_skey': DimDate.year * 100 + DimDate.month_of_year,
+        'bank_branch_name': func.coalesce(DimOtherTransactionAttributes.bank_branch_name, UNKNOWN_MEMBER),
+        'merchant_category_name': func.coalesce(DimOtherTransactionAttributes.merchant_category_name, UNKNOWN_MEMBER),
+        'device_type_name': func.coalesce(DimDevice.device_type_name, UNKNOWN_MEMBER),
+        'transaction_location_description': func.coalesce(DimLocation.transaction_location_description, UNKNOWN_MEMBER),
+        'transaction_count': FactTransaction.transaction_count,
+        'fraud_count': FactTransaction.is_fraud_indicator,
+        'transaction_amount': FactTransaction.transaction_amount,
+        'fraud_amount': case((FactTransaction.is_fraud_indicator == 1, FactTransaction.transaction_amount), else_=0.0),
+    }
+
+
+def fact_source():
+    fact = FactTransaction.__table__
+    return (fact
+            .join(DimDate.__table__, fact.c.date_skey_fk == DimDate.date_skey)
+            .outerjoin(DimOtherTransactionAttributes.__table__,
+                       fact.c.other_attributes_skey_fk == DimOtherTransactionAttributes.other_attributes_skey)
+            .outerjoin(DimDevice.__table__, fact.c.device_skey_fk == DimDevice.device_skey)
+            .outerjoin(DimLocation.__table__, fact.c.location_skey_fk == DimLocation.location_skey))
+
+
+# Potpuna izgradnja rollupa iz fact_transaction (npr. za skladište napunjeno prije uvođenja rollupa)
+def rebuild_rollups(conn):
+    expressions = fact_columns()
+    for rollup in ROLLUPS:
+        columns = [column.name for column in rollup.table.columns]
+        keys = [expressions[column] for column in columns if column not in MEASURES]
+        values = [expressions[column] if column not in MEASURES else func.sum(expressions[column]) for column in columns]
+        conn.execute(delete(rollup.table))
+        conn.execute(rollup.table.insert().from_select(
+            columns, select(*values).select_from(fact_source()).group_by(*keys)))
+    advance_table_watermarks(conn, [rollup.name for rollup in ROLLUPS])
+
+
+def rollups_missing(conn):
+    has_facts = conn.execute(select(FactTransaction.fact_transaction_skey).limit(1)).first() is not None
+    has_rollups = conn.execute(select(AggFraudDay.date_skey).limit(1)).first() is not None
+    return has_facts and not has_rollups
+
+
+def _filter(expression, value):
+    if isinstance(value, tuple):
+        return expression.between(*value)
+    if isinstance(value, (list, set)):
+        return expression.in_(list(value))
+    return expression == value
+
+
+# Mjesečni filtar kao raspon date_skey_fk: uvjet nad stupcem tablice činjenica omogućuje odbacivanje
+# mjesečnih particija (particije.py), dok izraz nad dim_date ne
+def _fact_month_filter(value):
+    if isinstance(value, tuple):
+        return FactTransaction.date_skey_fk.between(value[0] * 100 + 1, value[1] * 100 + 31)
+    months = list(value) if isinstance(value, (list, set)) else [value]
+    return or_(*(FactTransaction.date_skey_fk.between(month * 100 + 1, month * 100 + 31) for month in months))
+
+
+def _summary(conn, columns, source, group_by, filters, conditions=(), cache=None):
+    groups = [columns[ATTRIBUTES[attribute]].label(attribute) for attribute in group_by]
+    stmt = select(*groups, *(func.sum(columns[measure]).label(measure) for measure in MEASURES)).select_from(source)
+    for attribute, value in filters.items():
+        stmt = stmt.where(_filter(columns[ATTRIBUTES[attribute]], value))
+    for condition in conditions:
+        stmt = stmt.where(condition)
+    if groups:
+        stmt = stmt.group_by(*groups).order_by(*groups)
+    if cache is not None:
+        result = cache.query(conn, stmt)
+    else:
+        result = pd.DataFrame(conn.execute(stmt).all(), columns=list(group_by) + MEASURES)
+    result[MEASURES] = result[MEASURES].fillna(0)
+    result['fraud_rate'] = (result['fraud_count'] / result['transaction_count'].where(result['transaction_count'] > 0)).fillna(0.0)
+    return result
+
+
+# Usmjeravanje upita na najmanji rollup (po broju redaka) koji sadrži sve tražene atribute;
+# ako ga nema, upit ide na fact_transaction s dimenzijama. S cache (predmemorija_upita.QueryCache)
+# se rezultati ponovljenih upita čitaju iz predmemorije dok učitavanje ne pomakne watermark njihovih tablica.
+class RollupRouter:
+    def __init__(self, cache=None):
+        self.sizes = None
+        self.cache = cache
+
+    def invalidate(self):
+        self.sizes = None
+
+    def choose(self, conn, attributes):
+        candidates = [rollup for rollup in ROLLUPS if set(attributes) <= set(rollup.attributes)]
+        if not candidates:
+            return None
+        if self.sizes is None:
+            self.sizes = {rollup.name: conn.execute(select(func.count()).select_from(rollup.table)).scalar_one()
+                          for rollup in ROLLUPS}
+        return min(candidates, key=lambda rollup: self.sizes[rollup.name])
+
+    # group_by: lista atributa iz ATTRIBUTES; filters: atribut -> vrijednost, lista (IN) ili (od, do) (BETWEEN).
+    # Vraća (DataFrame s mjerama i fraud_rate, naziv izvorne tablice).
+    def fraud_summary(self, conn, group_by, filters=None):
+        filters = filters or {}
+        unknown = (set(group_by) | set(filters)) - set(ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown attributes: {sorted(unknown)}")
+        rollup = self.choose(conn, list(group_by) + list(filters))
+        if rollup is None:
+            conditions = [_fact_month_filter(filters['month'])] if 'month' in filters else []
+            return (_summary(conn, fact_columns(), fact_source(), group_by, filters, conditions, self.cache),
+                    FactTransaction.__tablename__)
+        return _summary(conn, rollup.table.c, rollup.table, group_by, filters, cache=self.cache), rollup.name
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+
+# Predmemorija prirodni ključ -> surogat ključ. Bez kapaciteta (None) drži sve članove dimenzije;
+# s kapacitetom izbacuje najdulje nekorištene ključeve (LRU). Izbacivanje je odvojeno od unosa (evict),
+# pa ključevi serije koja se upravo razrješava ostaju dostupni dok se serija ne obradi do kraja.
+class LruKeyCache:
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Vraća (pronađeni ključ -> vrijednost, popis nepronađenih ključeva); pronađeni postaju najsvježiji
+    def lookup(self, keys):
+        found = {}
+        missing = []
+        for key in keys:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                found[key] = self.entries[key]
+            else:
+                missing.append(key)
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def update(self, mapping):
+        for key, value in mapping.items():
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+    # Skraćuje predmemoriju na kapacitet; vraća izbačene ključeve
+    def evict(self):
+        evicted = []
+        if self.capacity is not None:
+            while len(self.entries) > self.capacity:
+                evicted.append(self.entries.popitem(last=False)[0])
+        self.evictions += len(evicted)
+        return evicted
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
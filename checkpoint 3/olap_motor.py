@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+from dimenzijski_model import (DimDate, DimCustomer, DimLocation, DimMerchant, DimDevice,
+                               DimOtherTransactionAttributes, FactTransaction, DATABASE_URL as DW_DATABASE_URL)
+
+# Naziv dimenzije -> (model, surogat ključ, strani ključ u fact_transaction)
+DIMENSIONS = {
+    'date': (DimDate, 'date_skey', 'date_skey_fk'),
+    'customer': (DimCustomer, 'customer_skey', 'customer_skey_fk'),
+    'location': (DimLocation, 'location_skey', 'location_skey_fk'),
+    'merchant': (DimMerchant, 'merchant_skey', 'merchant_skey_fk'),
+    'device': (DimDevice, 'device_skey', 'device_skey_fk'),
+    'other': (DimOtherTransactionAttributes, 'other_attributes_skey', 'other_attributes_skey_fk'),
+}
+MEASURE_COLUMNS = ['transaction_amount', 'is_fraud_indicator', 'transaction_count']
+# Hijerarhije iz dizajna dimenzijskog modela (od grube prema finoj razini)
+HIERARCHIES = {
+    'date': ['year', 'quarter', 'month_of_year', 'day_of_month'],
+    'customer': ['state', 'city'],
+    'location': ['transaction_state', 'transaction_city'],
+    'device': ['device_type_name', 'device_name'],
+}
+DEFAULT_MEASURES = {
+    'transaction_count': ('transaction_count', 'sum'),
+    'fraud_count': ('is_fraud_indicator', 'sum'),
+    'transaction_amount': ('transaction_amount', 'sum'),
+}
+# Atributi s najviše ovoliko različitih vrijednosti dobivaju bitmap indeks (po jedan bitmap po vrijednosti)
+BITMAP_MAX_VALUES = 32
+# Najveći broj kombinacija grupa za izravno indeksiranje (bincount); iznad toga grupe se sažimaju preko np.unique
+DENSE_GROUPS_LIMIT = 1 << 24
+LOAD_CHUNK_SIZE = 500000
+
+
+def _smallest_uint(max_value):
+    return np.min_scalar_type(max(int(max_value), 0))
+
+
+# Uvjet nad vrijednostima: skalar (==), lista/skup (IN) ili (od, do) (BETWEEN, uključivo)
+def _matches(values, condition):
+    values = pd.Series(values)
+    if isinstance(condition, tuple):
+        low, high = condition
+        return ((values >= low) & (values <= high)).fillna(False).to_numpy(dtype=bool)
+    if isinstance(condition, (list, set, frozenset)):
+        return values.isin(list(condition)).to_numpy()
+    return (values == condition).fillna(False).to_numpy(dtype=bool)
+
+
+# Dimenzija u memoriji: članovi i rječnički kodirani atributi. Zadnja pozicija je "nepoznati" član
+# (strani ključ NULL ili ključ kojeg nema u dimenziji), čiji su atributi nedostajući.
+class Dimension:
+    def __init__(self, name, members, skey):
+        self.name = name
+        self.skey = skey
+        self.members = members.reset_index(drop=True)
+        self.unknown = len(self.members)
+        self._index = pd.Index(self.members[skey])
+        self._attributes = {}
+
+    # Surogat ključevi činjenica -> pozicije članova (najmanji cjelobrojni tip)
+    def positions(self, skeys):
+        skeys = pd.array(skeys, dtype='Int64')
+        positions = self._index.get_indexer(skeys.fillna(-1).to_numpy(dtype=np.int64))
+        positions[(positions < 0) | skeys.isna()] = self.unknown
+        return positions.astype(_smallest_uint(self.unknown))
+
+    # Kodovi atributa po poziciji člana (0 = nedostajuća vrijednost) i popis vrijednosti po kodu
+    def attribute(self, attribute):
+        if attribute not in self._attributes:
+            if attribute not in self.members.columns:
+                raise KeyError(f"Dimension '{self.name}' has no attribute '{attribute}'")
+            codes, uniques = pd.factorize(self.members[attribute], sort=True)
+            codes = np.append(codes + 1, 0).astype(_smallest_uint(len(uniques)))
+            values = np.empty(len(uniques) + 1, dtype=object)
+            values[0] = None
+            values[1:] = np.asarray(uniques, dtype=object)
+            self._attributes[attribute] = (codes, values)
+        return self._attributes[attribute]
+
+
+# Tablica činjenica kao stupci NumPy polja: pozicije članova dimenzija (umjesto surogat ključeva) i mjere
+class StarCube:
+    def __init__(self, facts, dimensions):
+        self.dimensions = dimensions
+        self.rows = len(facts)
+        self.keys = {name: dimension.positions(facts[DIMENSIONS[name][2]]) for name, dimension in dimensions.items()}
+        self.measures = {
+            'transaction_amount': facts['transaction_amount'].to_numpy(dtype=np.float64),
+            'is_fraud_indicator': facts['is_fraud_indicator'].to_numpy().astype(np.uint8),
+            'transaction_count': facts['transaction_count'].to_numpy().astype(
+                _smallest_uint(facts['transaction_count'].max() if self.rows else 1)),
+        }
+        self._bitmaps = {}
+
+    @classmethod
+    def from_database(cls, conn, chunk_size=LOAD_CHUNK_SIZE):
+        dimensions = {}
+        for name, (model, skey, _) in DIMENSIONS.items():
+            table = model.__table__
+            members = pd.DataFrame(conn.execute(select(table)).all(), columns=[column.name for column in table.columns])
+            dimensions[name] = Dimension(name, members, skey)
+
+        columns = [fk for _, _, fk in DIMENSIONS.values()] + MEASURE_COLUMNS
+        fact = FactTransaction.__table__
+        result = conn.execution_options(stream_results=True).execute(select(*(fact.c[column] for column in columns)))
+        parts = [pd.DataFrame(rows, columns=columns) for rows in result.partitions(chunk_size)]
+        facts = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+        return cls(facts, dimensions)
+
+    def memory_bytes(self):
+        return sum(array.nbytes for array in list(self.keys.values()) + list(self.measures.values()))
+
+    # "dimenzija.atribut" -> kodovi atributa po činjenici i vrijednosti po kodu
+    def _fact_codes(self, qualified):
+        name, attribute = self._split(qualified)
+        codes, values = self.dimensions[name].attribute(attribute)
+        return codes[self.keys[name]], values
+
+    def _split(self, qualified):
+        name, _, attribute = qualified.partition('.')
+        if name not in self.dimensions or not attribute:
+            raise KeyError(f"Unknown attribute '{qualified}', expected 'dimension.attribute' "
+                           f"with dimension in {list(self.dimensions)}")
+        return name, attribute
+
+    # Bitmap indeks atributa niskog kardinaliteta: po jedan zapakirani bitmap (np.packbits) po kodu
+    def _bitmap_index(self, qualified):
+        if qualified not in self._bitmaps:
+            name, attribute = self._split(qualified)
+            _, values = self.dimensions[name].attribute(attribute)
+            if len(values) > BITMAP_MAX_VALUES:
+                self._bitmaps[qualified] = None
+            else:
+                fact_codes, _ = self._fact_codes(qualified)
+                self._bitmaps[qualified] = [np.packbits(fact_codes == code) for code in range(len(values))]
+        return self._bitmaps[qualified]
+
+    # Zapakirani bitmap činjenica koje zadovoljavaju uvjet; uvjet se prvo računa nad (malim) popisom vrijednosti
+    def _predicate(self, qualified, condition):
+        name, attribute = self._split(qualified)
+        _, values = self.dimensions[name].attribute(attribute)
+        # Kod 0 (nedostajuća vrijednost) ne zadovoljava nijedan uvjet
+        matching = np.zeros(len(values), dtype=bool)
+        matching[1:] = _matches(values[1:].tolist(), condition)
+        bitmaps = self._bitmap_index(qualified)
+        if bitmaps is not None:
+            selected = np.flatnonzero(matching)
+            if not len(selected):
+                return np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+            return np.bitwise_or.reduce([bitmaps[code] for code in selected])
+        fact_codes, _ = self._fact_codes(qualified)
+        return np.packbits(matching[fact_codes])
+
+    def filter_mask(self, filters):
+        packed = None
+        for qualified, condition in (filters or {}).items():
+            bitmap = self._predicate(qualified, condition)
+            packed = bitmap if packed is None else np.bitwise_and(packed, bitmap)
+        if packed is None:
+            return None
+        return np.unpackbits(packed, count=self.rows).view(bool)
+
+    # group_by: lista "dimenzija.atribut"; filters: "dimenzija.atribut" -> uvjet (vidi _matches);
+    # measures: naziv izlaza -> (stupac mjere, 'sum' | 'count' | 'mean'). Vraća DataFrame po nepraznoj grupi.
+    def query(self, group_by=(), filters=None, measures=None):
+        add_fraud_rate = measures is None
+        measures = measures or DEFAULT_MEASURES
+        mask = self.filter_mask(filters)
+
+        group_ids = np.zeros(self.rows if mask is None else int(mask.sum()), dtype=np.int64)
+        labels = []
+        cardinality = 1
+        for qualified in group_by:
+            fact_codes, values = self._fact_codes(qualified)
+            if mask is not None:
+                fact_codes = fact_codes[mask]
+            group_ids = group_ids * len(values) + fact_codes
+            cardinality *= len(values)
+            labels.append((qualified, values))
+
+        if cardinality <= DENSE_GROUPS_LIMIT:
+            group_count = cardinality
+        else:
+            unique_ids, group_ids = np.unique(group_ids, return_inverse=True)
+            group_count = len(unique_ids)
+        counts = np.bincount(group_ids, minlength=group_count)
+        present = np.flatnonzero(counts)
+        ids = present if cardinality <= DENSE_GROUPS_LIMIT else unique_ids[present]
+
+        result = {}
+        for qualified, values in reversed(labels):
+            result[qualified] = values[ids % len(values)]
+            ids = ids // len(values)
+        result = pd.DataFrame(dict(reversed(list(result.items()))))
+
+        for output, (column, aggregate) in measures.items():
+            if column not in self.measures:
+                raise KeyError(f"Unknown measure '{column}', expected one of {MEASURE_COLUMNS}")
+            values = self.measures[column] if mask is None else self.measures[column][mask]
+            if aggregate == 'count':
+                result[output] = counts[present]
+                continue
+            sums = np.bincount(group_ids, weights=values, minlength=group_count)[present]
+            if aggregate == 'sum':
+                result[output] = sums
+            elif aggregate == 'mean':
+                result[output] = sums / counts[present]
+            else:
+                raise ValueError(f"Unsupported aggregate '{aggregate}', expected 'sum', 'count' or 'mean'")
+        if add_fraud_rate:
+            result['fraud_rate'] = result['fraud_count'] / result['transaction_count']
+        return result
+
+    # Spremanje na disk: stupci činjenica u komprimiranom .npz, dimenzije kao pickle
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(os.path.join(directory, 'facts.npz'),
+                            **{f"key_{name}": keys for name, keys in self.keys.items()}, **self.measures)
+        for name, dimension in self.dimensions.items():
+            dimension.members.to_pickle(os.path.join(directory, f"dim_{name}.pkl"))
+
+    @classmethod
+    def load(cls, directory):
+        cube = cls.__new__(cls)
+        cube.dimensions = {name: Dimension(name, pd.read_pickle(os.path.join(directory, f"dim_{name}.pkl")), skey)
+                           for name, (_, skey, _) in DIMENSIONS.items()}
+        with np.load(os.path.join(directory, 'facts.npz')) as arrays:
+            cube.keys = {name: arrays[f"key_{name}"] for name in DIMENSIONS}
+            cube.measures = {column: arrays[column] for column in MEASURE_COLUMNS}
+        cube.rows = len(cube.measures['transaction_amount'])
+        cube._bitmaps = {}
+        return cube
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load bank_fraud_dw into an in-memory columnar cube and run a query.")
+    parser.add_argument('--dw-url', default=DW_DATABASE_URL, help="SQLAlchemy URL of bank_fraud_dw")
+    parser.add_argument('--cache-dir', default=None, help="Load the cube from / save it to this directory")
+    parser.add_argument('--group-by', nargs='*', default=['date.month_of_year'], help="e.g. date.year other.bank_branch_name")
+    parser.add_argument('--filters', default='{}',
+                        help='JSON object, e.g. \'{"device.device_type_name": ["POS"], "date.date_skey": [20250101, 20250131]}\' '
+                             '(a two-element list under "date.date_skey" or any *_skey is a range)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.cache_dir and os.path.exists(os.path.join(args.cache_dir, 'facts.npz')):
+        cube = StarCube.load(args.cache_dir)
+    else:
+        engine = create_engine(args.dw_url)
+        with engine.connect() as conn:
+            cube = StarCube.from_database(conn)
+        engine.dispose()
+        if args.cache_dir:
+            cube.save(args.cache_dir)
+    print(f"Cube: {cube.rows} facts, {cube.memory_bytes() / 2 ** 20:.1f} MB of fact columns, "
+          f"loaded in {time.perf_counter() - start:.2f}s")
+
+    filters = {key: tuple(value) if key.endswith('_skey') and isinstance(value, list) and len(value) == 2 else value
+               for key, value in json.loads(args.filters).items()}
+    start = time.perf_counter()
+    result = cube.query(args.group_by, filters)
+    print(result.to_string(index=False))
+    print(f"Query answered in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
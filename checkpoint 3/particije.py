@@ -0,0 +1,249 @@
+import argparse
+import os
+import re
+import time
+import pandas as pd
+from sqlalchemy import create_engine, delete, select, text
+from dimenzijski_model import FactTransaction, DATABASE_URL as DW_DATABASE_URL
+from predmemorija_upita import advance_table_watermarks
+
+# fact_transaction se particionira po rasponu date_skey_fk (YYYYMMDD), jedna particija po mjesecu (pYYYYMM),
+# uz zadnju particiju pmax za datume za koje još nema mjesečne particije. Particioniranje je MySQL-ovo:
+# u drugim bazama tablica ostaje neparticionirana, a arhiviranje briše retke po rasponu ključeva.
+FACT_TABLE = FactTransaction.__tablename__
+MAXVALUE_PARTITION = 'pmax'
+PARTITION_NAME = re.compile(r'^p(\d{6})$')
+ARCHIVE_DIR = 'fact_archive'
+ARCHIVE_COMPRESSION = 'zstd'
+ARCHIVE_CHUNK_SIZE = 500000
+BENCHMARK_REPEAT = 5
+
+# Mjesečni upit o prijevarama po kategoriji trgovca; filtar je izravno na date_skey_fk da bi se particije odbacile
+BENCHMARK_QUERY = """
+SELECT o.merchant_category_name, COUNT(*), SUM(f.is_fraud_indicator),
+       SUM(CASE WHEN f.is_fraud_indicator = 1 THEN f.transaction_amount ELSE 0 END)
+FROM {table} f
+LEFT JOIN dim_other_transaction_attributes o ON f.other_attributes_skey_fk = o.other_attributes_skey
+WHERE f.date_skey_fk BETWEEN :start AND :end
+GROUP BY o.merchant_category_name
+"""
+
+
+def partition_name(month_skey):
+    return f"p{month_skey}"
+
+
+def next_month(month_skey):
+    year, month = divmod(int(month_skey), 100)
+    return (year + 1) * 100 + 1 if month == 12 else month_skey + 1
+
+
+# Raspon date_skey (uključivo) jednog mjeseca YYYYMM
+def month_date_range(month_skey):
+    return int(month_skey) * 100 + 1, int(month_skey) * 100 + 31
+
+
+def partition_definitions(months):
+    definitions = [f"PARTITION {partition_name(month)} VALUES LESS THAN ({next_month(month) * 100})"
+                   for month in sorted(months)]
+    return definitions + [f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE"]
+
+
+def _is_mysql(conn):
+    return conn.dialect.name in ('mysql', 'mariadb')
+
+
+# Mjeseci (YYYYMM) postojećih particija; None ako tablica nije particionirana (ili baza nije MySQL)
+def existing_partitions(conn):
+    if not _is_mysql(conn):
+        return None
+    names = conn.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL"
+    ), {'table': FACT_TABLE}).scalars().all()
+    if not names:
+        return None
+    return sorted(int(match.group(1)) for match in map(PARTITION_NAME.match, names) if match)
+
+
+def fact_months(conn):
+    column = FactTransaction.date_skey_fk
+    months = conn.execute(select(column // 100).where(column.isnot(None)).distinct()).scalars().all()
+    return sorted({int(month) for month in months})
+
+
+# Pretvara neparticioniranu fact_transaction u mjesečne particije (jednom, nad postojećim podacima).
+# MySQL ne dopušta strane ključeve u particioniranim tablicama i traži stupac particioniranja u primarnom
+# ključu, pa se FK ograničenja uklanjaju (indeksi na FK stupcima ostaju, lokalni po particiji), a primarni
+# ključ postaje (fact_transaction_skey, date_skey_fk). Vraća broj mjesečnih particija.
+def partition_fact_table(conn):
+    if not _is_mysql(conn):
+        raise NotImplementedError(f"Partitioning is not implemented for the '{conn.dialect.name}' dialect.")
+    partitions = existing_partitions(conn)
+    if partitions is not None:
+        return len(partitions)
+
+    foreign_keys = conn.execute(text(
+        "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+    ), {'table': FACT_TABLE}).scalars().all()
+    for name in foreign_keys:
+        conn.execute(text(f"ALTER TABLE {FACT_TABLE} DROP FOREIGN KEY `{name}`"))
+    conn.execute(text(f"ALTER TABLE {FACT_TABLE} MODIFY date_skey_fk INT NOT NULL, "
+                      f"DROP PRIMARY KEY, ADD PRIMARY KEY (fact_transaction_skey, date_skey_fk)"))
+    months = fact_months(conn)
+    conn.execute(text(f"ALTER TABLE {FACT_TABLE} PARTITION BY RANGE (date_skey_fk) "
+                      f"({', '.join(partition_definitions(months))})"))
+    return len(months)
+
+
+# Prije unosa serije dodaje particije za nove mjesece tako da se pmax podijeli (REORGANIZE PARTITION).
+# Mjeseci stariji od zadnje particije ne dobivaju svoju, nego padaju u prvu particiju iznad njih.
+# ALTER TABLE u MySQL-u implicitno potvrđuje transakciju, pa se ensure poziva izvan transakcije serije.
+class FactPartitions:
+    def __init__(self):
+        self.months = None
+        self.checked = False
+        self.added = 0
+
+    def ensure(self, conn, date_skeys):
+        if not self.checked:
+            self.months = existing_partitions(conn)
+            self.checked = True
+        if self.months is None or not len(date_skeys):
+            return []
+        last = self.months[-1] if self.months else 0
+        new_months = sorted({int(month) for month in pd.unique(pd.Series(date_skeys) // 100)} - set(self.months))
+        new_months = [month for month in new_months if month > last]
+        if new_months:
+            conn.execute(text(f"ALTER TABLE {FACT_TABLE} REORGANIZE PARTITION {MAXVALUE_PARTITION} "
+                              f"INTO ({', '.join(partition_definitions(new_months))})"))
+            self.months = sorted(self.months + new_months)
+            self.added += len(new_months)
+        return new_months
+
+
+def _archive_month(conn, month, directory, partitioned):
+    output_dir = os.path.join(directory, f"{FACT_TABLE}_{month}")
+    os.makedirs(output_dir, exist_ok=True)
+    if partitioned:
+        query = text(f"SELECT * FROM {FACT_TABLE} PARTITION ({partition_name(month)})")
+        params = {}
+    else:
+        start, end = month_date_range(month)
+        query = text(f"SELECT * FROM {FACT_TABLE} WHERE date_skey_fk BETWEEN :start AND :end")
+        params = {'start': start, 'end': end}
+    rows = 0
+    for part, chunk in enumerate(pd.read_sql(query, conn, params=params, chunksize=ARCHIVE_CHUNK_SIZE)):
+        if chunk.empty:
+            continue
+        chunk.to_parquet(os.path.join(output_dir, f"part-{part:05d}.parquet"), index=False, compression=ARCHIVE_COMPRESSION)
+        rows += len(chunk)
+    return rows, output_dir
+
+
+# Premješta particiju u zasebnu tablicu fact_transaction_pYYYYMM (EXCHANGE PARTITION) i briše praznu particiju
+def _detach_month(conn, month):
+    archive_table = f"{FACT_TABLE}_{partition_name(month)}"
+    conn.execute(text(f"CREATE TABLE {archive_table} LIKE {FACT_TABLE}"))
+    conn.execute(text(f"ALTER TABLE {archive_table} REMOVE PARTITIONING"))
+    conn.execute(text(f"ALTER TABLE {FACT_TABLE} EXCHANGE PARTITION {partition_name(month)} WITH TABLE {archive_table}"))
+    rows = conn.execute(text(f"SELECT COUNT(*) FROM {archive_table}")).scalar_one()
+    return rows, archive_table
+
+
+# Zadržavanje podataka: mjeseci stariji od before_month (YYYYMM) uklanjaju se iz fact_transaction kao cijele
+# particije. archive: zapis u Parquet direktorij po mjesecu pa DROP PARTITION; detach: EXCHANGE u zasebnu tablicu.
+# Neparticionirana tablica (npr. SQLite) arhivira se u Parquet i briše po rasponu date_skey_fk.
+# Rollupi se ne mijenjaju, pa zbrojevi starih mjeseci ostaju dostupni. Vraća [(mjesec, redaka, odredište)].
+def archive_partitions(conn, before_month, directory=ARCHIVE_DIR, detach=False):
+    partitions = existing_partitions(conn)
+    if detach and partitions is None:
+        raise NotImplementedError("Detaching requires a partitioned fact_transaction (MySQL).")
+    months = [month for month in (partitions if partitions is not None else fact_months(conn)) if month < before_month]
+    archived = []
+    for month in months:
+        if detach:
+            rows, target = _detach_month(conn, month)
+        else:
+            rows, target = _archive_month(conn, month, directory, partitions is not None)
+        if partitions is not None:
+            conn.execute(text(f"ALTER TABLE {FACT_TABLE} DROP PARTITION {partition_name(month)}"))
+        else:
+            start, end = month_date_range(month)
+            conn.execute(delete(FactTransaction.__table__).where(FactTransaction.date_skey_fk.between(start, end)))
+        print(f"{partition_name(month)}: {rows} facts -> {target}")
+        archived.append((month, rows, target))
+    # Arhivirane činjenice više nisu u rezultatima upita: zapisi predmemorije nad fact_transaction se poništavaju
+    if archived:
+        advance_table_watermarks(conn, [FACT_TABLE])
+    return archived
+
+
+def _best_time(conn, query, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(query, params).all()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+# Usporedba mjesečnih upita nad particioniranom tablicom i njezinom neparticioniranom kopijom (isti indeksi)
+def benchmark_pruning(conn, months=None, repeat=BENCHMARK_REPEAT):
+    partitions = existing_partitions(conn)
+    if partitions is None:
+        raise NotImplementedError("Partition pruning benchmark requires a partitioned fact_transaction (MySQL).")
+    months = months or partitions
+    flat = f"{FACT_TABLE}_flat"
+    conn.execute(text(f"DROP TABLE IF EXISTS {flat}"))
+    conn.execute(text(f"CREATE TABLE {flat} LIKE {FACT_TABLE}"))
+    conn.execute(text(f"ALTER TABLE {flat} REMOVE PARTITIONING"))
+    conn.execute(text(f"INSERT INTO {flat} SELECT * FROM {FACT_TABLE}"))
+
+    results = []
+    for month in months:
+        start, end = month_date_range(month)
+        params = {'start': start, 'end': end}
+        plan = conn.execute(text("EXPLAIN " + BENCHMARK_QUERY.format(table=FACT_TABLE)), params).mappings().first()
+        partitioned = _best_time(conn, text(BENCHMARK_QUERY.format(table=FACT_TABLE)), params, repeat)
+        unpartitioned = _best_time(conn, text(BENCHMARK_QUERY.format(table=flat)), params, repeat)
+        results.append({
+            'month': month,
+            'partitions_scanned': plan.get('partitions'),
+            'partitioned_ms': partitioned * 1000,
+            'unpartitioned_ms': unpartitioned * 1000,
+            'speedup': unpartitioned / partitioned if partitioned > 0 else float('inf'),
+        })
+    conn.execute(text(f"DROP TABLE {flat}"))
+    return pd.DataFrame(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monthly range partitioning, archival and pruning benchmark for fact_transaction.")
+    parser.add_argument('--dw-url', default=DW_DATABASE_URL, help="SQLAlchemy URL of bank_fraud_dw")
+    parser.add_argument('--partition', action='store_true', help="Convert fact_transaction into monthly partitions")
+    parser.add_argument('--archive-before', type=int, metavar='YYYYMM',
+                        help="Archive and drop all months before YYYYMM")
+    parser.add_argument('--detach', action='store_true',
+                        help="With --archive-before: exchange partitions into fact_transaction_pYYYYMM tables instead of Parquet")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="Directory for archived Parquet partitions")
+    parser.add_argument('--benchmark', nargs='*', type=int, metavar='YYYYMM',
+                        help="Time month-bounded fraud queries with and without partitioning (default: all months)")
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_REPEAT, help="Runs per benchmark query (best is reported)")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.dw_url)
+    with engine.begin() as conn:
+        if args.partition:
+            print(f"{FACT_TABLE}: {partition_fact_table(conn)} monthly partitions.")
+        if args.archive_before:
+            archived = archive_partitions(conn, args.archive_before, args.archive_dir, args.detach)
+            print(f"Archived {len(archived)} months, {sum(rows for _, rows, _ in archived)} facts.")
+        if args.benchmark is not None:
+            print(benchmark_pruning(conn, args.benchmark, args.repeat).to_string(index=False))
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
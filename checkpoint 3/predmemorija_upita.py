@@ -0,0 +1,309 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.sql import ClauseElement
+from dimenzijski_model import Base, EtlWatermark, DATABASE_URL as DW_DATABASE_URL
+
+CACHE_DIR = 'query_cache'
+# Granice veličine: rezultati u memoriji (procjena pandas memory_usage) i Parquet datoteke na disku
+MEMORY_LIMIT_BYTES = 64 * 2 ** 20
+DISK_LIMIT_BYTES = 1024 * 2 ** 20
+CACHE_COMPRESSION = 'zstd'
+# Zbirna statistika svih pokretanja nad istim direktorijem predmemorije
+STATS_FILE = 'stats.json'
+METADATA_KEY = b'query_cache'
+# Watermark tablice u etl_watermark: 'table:<naziv tablice>' (odvojen od watermarka učitavanja, npr. 'fact_transaction')
+TABLE_WATERMARK_PREFIX = 'table:'
+
+_QUOTED = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.)*"|`[^`]*`)""")
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_KEYWORDS = re.compile(r"\b(select|distinct|from|join|inner|left|right|outer|cross|on|where|and|or|not|in|is|null|"
+                       r"between|like|group|by|order|having|limit|offset|as|case|when|then|else|end|asc|desc|"
+                       r"sum|count|min|max|avg|coalesce|union|all|with)\b", re.IGNORECASE)
+_TABLE_REFERENCE = re.compile(r"\b(?:from|join)\s+[`\"]?(\w+)[`\"]?(?:\.[`\"]?(\w+)[`\"]?)?", re.IGNORECASE)
+
+
+# Normalizirani SQL za ključ predmemorije: bez komentara, razmaci sažeti, ključne riječi malim slovima;
+# literali u navodnicima i nazivi tablica/stupaca ostaju nepromijenjeni
+def normalize_sql(sql):
+    parts = _QUOTED.split(sql)
+    for i in range(0, len(parts), 2):
+        part = re.sub(r'--[^\n]*|/\*.*?\*/', ' ', parts[i], flags=re.DOTALL)
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([,()=<>+*/])\s*', r'\1', part)
+        parts[i] = _KEYWORDS.sub(lambda match: match.group(1).lower(), part)
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+# Ključ zapisa: baza (URL bez lozinke), normalizirani SQL i parametri
+def cache_key(sql, params=None, database=None):
+    payload = json.dumps({'database': database, 'sql': normalize_sql(sql), 'params': params or {}},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Tablice skladišta na koje se upit poziva (FROM/JOIN), među tablicama dimenzijskog modela
+def referenced_tables(sql, known=None):
+    known = set(known if known is not None else Base.metadata.tables)
+    return sorted({table or schema_or_table
+                   for schema_or_table, table in _TABLE_REFERENCE.findall(_LITERAL.sub("''", sql))} & known)
+
+
+# Trenutni watermark tablica (None ako ih nijedno učitavanje još nije pomaknulo)
+def read_table_watermarks(conn, tables):
+    names = [TABLE_WATERMARK_PREFIX + table for table in tables]
+    rows = conn.execute(select(EtlWatermark.load_name, EtlWatermark.watermark_datetime)
+                        .where(EtlWatermark.load_name.in_(names))).all() if names else []
+    found = {name[len(TABLE_WATERMARK_PREFIX):]: value for name, value in rows}
+    return {table: found.get(table) for table in tables}
+
+
+# Pomiče watermark tablica koje je učitavanje promijenilo. Novi watermark je uvijek veći od prethodnog
+# (najmanje za jednu sekundu, jer DATETIME u MySQL-u nema dijelove sekunde), pa ga predmemorija sigurno primijeti.
+def advance_table_watermarks(conn, tables):
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    table = EtlWatermark.__table__
+    now = datetime.now().replace(microsecond=0)
+    for name, previous in read_table_watermarks(conn, tables).items():
+        value = max(now, previous + timedelta(seconds=1)) if previous is not None else now
+        load_name = TABLE_WATERMARK_PREFIX + name
+        values = {'watermark_datetime': value, 'updated_at': datetime.now()}
+        if previous is not None:
+            conn.execute(table.update().where(table.c.load_name == load_name).values(**values))
+        else:
+            conn.execute(table.insert().values(load_name=load_name, **values))
+
+
+def _versions(watermarks):
+    return {table: value.isoformat() if value is not None else None for table, value in watermarks.items()}
+
+
+class CacheEntry:
+    def __init__(self, result, sql, params, versions, compute_seconds):
+        self.result = result
+        self.sql = sql
+        self.params = params
+        self.versions = versions
+        self.compute_seconds = compute_seconds
+        self.size = int(result.memory_usage(index=True, deep=True).sum())
+
+    def metadata(self):
+        return {'sql': self.sql, 'params': self.params, 'versions': self.versions,
+                'compute_seconds': self.compute_seconds, 'created_at': datetime.now().isoformat(timespec='seconds')}
+
+
+# Predmemorija rezultata analitičkih upita nad bank_fraud_dw. Ključ je normalizirani SQL s parametrima; svaki
+# zapis pamti watermark tablica o kojima ovisi i vrijedi dok ih učitavanje ne pomakne. Dvije razine, obje LRU
+# s ograničenom veličinom: rezultati u memoriji procesa i Parquet datoteke u directory (dijele ih pokretanja).
+class QueryCache:
+    def __init__(self, directory=CACHE_DIR, memory_limit=MEMORY_LIMIT_BYTES, disk_limit=DISK_LIMIT_BYTES):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.disk = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            paths = sorted(glob.glob(os.path.join(directory, '*.parquet')), key=os.path.getmtime)
+            self.disk.update((os.path.splitext(os.path.basename(path))[0], os.path.getsize(path)) for path in paths)
+        self.counts = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'invalidations': 0,
+                       'memory_evictions': 0, 'disk_evictions': 0}
+        self.time_saved_seconds = 0.0
+        self.query_seconds = 0.0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    # Rezultat upita (DataFrame) iz predmemorije ili iz baze. sql je SQL niz ili SQLAlchemy izraz; tables su
+    # tablice o kojima rezultat ovisi (zadano: tablice iz FROM/JOIN dijelova upita).
+    def query(self, conn, sql, params=None, tables=None):
+        start = time.perf_counter()
+        statement = None
+        if isinstance(sql, ClauseElement):
+            compiled = sql.compile(dialect=conn.dialect)
+            statement, sql, params = sql, str(compiled), dict(compiled.params)
+        params = params or {}
+        tables = sorted(tables) if tables is not None else referenced_tables(sql)
+        key = cache_key(sql, params, conn.engine.url.render_as_string(hide_password=True))
+        versions = _versions(read_table_watermarks(conn, tables))
+
+        entry, tier = self._lookup(key)
+        if entry is not None and entry.versions != versions:
+            self.counts['invalidations'] += 1
+            self._remove(key)
+            entry = None
+        if entry is not None:
+            self.counts[f"{tier}_hits"] += 1
+            if tier == 'disk':
+                self._remember(key, entry)
+            elapsed = time.perf_counter() - start
+            self.query_seconds += elapsed
+            self.time_saved_seconds += max(entry.compute_seconds - elapsed, 0.0)
+            return entry.result.copy()
+
+        self.counts['misses'] += 1
+        query_start = time.perf_counter()
+        result = conn.execute(statement) if statement is not None else conn.execute(text(sql), params)
+        frame = pd.DataFrame(result.all(), columns=list(result.keys()))
+        entry = CacheEntry(frame, normalize_sql(sql), {name: str(value) for name, value in params.items()}, versions,
+                           time.perf_counter() - query_start)
+        self._remember(key, entry)
+        self._store(key, entry)
+        self.query_seconds += time.perf_counter() - start
+        return frame.copy()
+
+    def _lookup(self, key):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key], 'memory'
+        if key in self.disk:
+            try:
+                table = pq.read_table(self._path(key))
+            except (OSError, pa.ArrowInvalid):
+                self._remove(key)
+                return None, None
+            metadata = json.loads(table.schema.metadata[METADATA_KEY])
+            os.utime(self._path(key))
+            self.disk.move_to_end(key)
+            return CacheEntry(table.to_pandas(), metadata['sql'], metadata['params'], metadata['versions'],
+                              metadata['compute_seconds']), 'disk'
+        return None, None
+
+    def _remember(self, key, entry):
+        if entry.size > self.memory_limit:
+            return
+        if key in self.memory:
+            self.memory_bytes -= self.memory.pop(key).size
+        self.memory[key] = entry
+        self.memory_bytes += entry.size
+        while self.memory_bytes > self.memory_limit:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted.size
+            self.counts['memory_evictions'] += 1
+
+    def _store(self, key, entry):
+        if self.directory is None:
+            return
+        table = pa.Table.from_pandas(entry.result, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               METADATA_KEY: json.dumps(entry.metadata()).encode('utf-8')})
+        pq.write_table(table, self._path(key), compression=CACHE_COMPRESSION)
+        size = os.path.getsize(self._path(key))
+        if size > self.disk_limit:
+            os.remove(self._path(key))
+            return
+        self.disk[key] = size
+        self.disk.move_to_end(key)
+        while sum(self.disk.values()) > self.disk_limit:
+            evicted, _ = self.disk.popitem(last=False)
+            os.remove(self._path(evicted))
+            self.counts['disk_evictions'] += 1
+
+    def _remove(self, key):
+        if key in self.memory:
+            self.memory_bytes -= self.memory.pop(key).size
+        if self.disk.pop(key, None) is not None and os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def clear(self):
+        for key in list(self.memory) + list(self.disk):
+            self._remove(key)
+
+    def stats(self):
+        hits = self.counts['memory_hits'] + self.counts['disk_hits']
+        lookups = hits + self.counts['misses']
+        return {
+            **self.counts,
+            'hits': hits,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'time_saved_seconds': round(self.time_saved_seconds, 6),
+            'query_seconds': round(self.query_seconds, 6),
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory_bytes,
+            'disk_entries': len(self.disk),
+            'disk_bytes': sum(self.disk.values()),
+        }
+
+    # Dodaje brojače ovog pokretanja zbirnoj statistici u direktoriju predmemorije i vraća zbroj
+    def save_stats(self):
+        stats = self.stats()
+        if self.directory is None:
+            return stats
+        path = os.path.join(self.directory, STATS_FILE)
+        totals = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as stats_file:
+                totals = json.load(stats_file)
+        for name in list(self.counts) + ['hits', 'time_saved_seconds', 'query_seconds']:
+            totals[name] = totals.get(name, 0) + stats[name]
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = totals['hits'] / lookups if lookups else 0.0
+        with open(path, 'w', encoding='utf-8') as stats_file:
+            json.dump(totals, stats_file, indent=2)
+        return totals
+
+    def print_summary(self):
+        stats = self.stats()
+        print(f"Query cache: {stats['hits']} hits ({stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+              f"{stats['misses']} misses, {stats['hit_rate']:.1%} hit rate, {stats['invalidations']} invalidated, "
+              f"{stats['time_saved_seconds']:.3f}s saved")
+        print(f"  memory: {stats['memory_entries']} entries, {stats['memory_bytes'] / 2 ** 20:.1f} MB; "
+              f"disk: {stats['disk_entries']} entries, {stats['disk_bytes'] / 2 ** 20:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an analytical SQL query against bank_fraud_dw through the "
+                                                 "watermark-invalidated result cache.")
+    parser.add_argument('--dw-url', default=DW_DATABASE_URL, help="SQLAlchemy URL of bank_fraud_dw")
+    parser.add_argument('--sql', default=None, help="SQL text of the query")
+    parser.add_argument('--sql-file', default=None, help="File with the SQL query")
+    parser.add_argument('--params', default='{}', help="JSON object with bind parameters, e.g. '{\"month\": 202501}'")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Directory of the on-disk cache tier")
+    parser.add_argument('--memory-limit-mb', type=float, default=MEMORY_LIMIT_BYTES / 2 ** 20)
+    parser.add_argument('--disk-limit-mb', type=float, default=DISK_LIMIT_BYTES / 2 ** 20)
+    parser.add_argument('--repeat', type=int, default=1, help="Run the query this many times (shows memory hits)")
+    parser.add_argument('--clear', action='store_true', help="Empty the cache and exit")
+    parser.add_argument('--stats', action='store_true', help="Print cumulative cache statistics and exit")
+    args = parser.parse_args(argv)
+
+    cache = QueryCache(args.cache_dir, int(args.memory_limit_mb * 2 ** 20), int(args.disk_limit_mb * 2 ** 20))
+    if args.clear:
+        cache.clear()
+        print(f"Query cache {args.cache_dir} cleared.")
+        return
+    if args.stats:
+        print(json.dumps(cache.save_stats(), indent=2))
+        return
+    if args.sql_file:
+        with open(args.sql_file, encoding='utf-8') as sql_file:
+            args.sql = sql_file.read()
+    if not args.sql:
+        parser.error("--sql or --sql-file is required")
+
+    engine = create_engine(args.dw_url)
+    with engine.connect() as conn:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = cache.query(conn, args.sql, json.loads(args.params))
+            print(f"{len(result)} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+    engine.dispose()
+    print(result.to_string(index=False))
+    cache.print_summary()
+    cache.save_stats()
+
+
+if __name__ == '__main__':
+    main()
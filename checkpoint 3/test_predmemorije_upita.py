@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+import pandas as pd
+import sqlalchemy
+
+from agregacije import RollupRouter, apply_rollups, rollup_rows
+from dimenzijski_model import Base
+from predmemorija_upita import QueryCache, advance_table_watermarks, normalize_sql, referenced_tables
+from test_punjenja_skladista import transactions
+
+MONTH_QUERY = """
+SELECT month_skey, SUM(fraud_count) AS fraud_count
+FROM agg_fraud_day
+WHERE month_skey = :month
+GROUP BY month_skey
+"""
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.load([(20250130, 'B1', 'Health', 100.0, 0), (20250131, 'B1', 'Health', 50.0, 1),
+                   (20250201, 'B2', 'Groceries', 10.0, 1)])
+
+    def load(self, rows):
+        batch = transactions(rows)
+        with self.engine.begin() as conn:
+            apply_rollups(conn, rollup_rows(batch['date_skey'], batch))
+
+    def test_normalized_key(self):
+        self.assertEqual(normalize_sql("SELECT  a ,b\n  FROM t -- note\nWHERE x = 'A  B' AND y IN (1, 2);"),
+                         "select a,b from t where x='A  B' and y in(1,2)")
+        self.assertEqual(referenced_tables("select * from agg_fraud_day d join `dim_date` on 1 where n = 'from x'"),
+                         ['agg_fraud_day', 'dim_date'])
+
+    def test_hits_and_watermark_invalidation(self):
+        cache = QueryCache(self.tmp.name)
+        router = RollupRouter(cache)
+        with self.engine.connect() as conn:
+            first, source = router.fraud_summary(conn, ['month', 'merchant_category'])
+            self.assertEqual(source, 'agg_fraud_month_category')
+            pd.testing.assert_frame_equal(router.fraud_summary(conn, ['month', 'merchant_category'])[0], first)
+            # Nova instanca (drugi proces): rezultat dolazi s diska
+            disk_cache = QueryCache(self.tmp.name)
+            pd.testing.assert_frame_equal(RollupRouter(disk_cache).fraud_summary(conn, ['month', 'merchant_category'])[0],
+                                          first)
+        self.assertEqual((cache.counts['misses'], cache.counts['memory_hits']), (1, 1))
+        self.assertEqual((disk_cache.counts['disk_hits'], disk_cache.counts['misses']), (1, 0))
+
+        # Učitavanje koje ne dira rollupe ne poništava zapis
+        with self.engine.begin() as conn:
+            advance_table_watermarks(conn, ['dim_customer'])
+        with self.engine.connect() as conn:
+            router.fraud_summary(conn, ['month', 'merchant_category'])
+        self.assertEqual((cache.counts['memory_hits'], cache.counts['invalidations']), (2, 0))
+
+        self.load([(20250201, 'B2', 'Groceries', 5.0, 1)])
+        with self.engine.connect() as conn:
+            updated, _ = router.fraud_summary(conn, ['month', 'merchant_category'])
+        self.assertEqual(updated['fraud_count'].tolist(), [1, 2])
+        self.assertEqual((cache.counts['invalidations'], cache.counts['misses']), (1, 2))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['hit_rate']), (2, 0.5))
+        self.assertGreaterEqual(stats['time_saved_seconds'], 0.0)
+
+    def test_size_bounded_eviction(self):
+        cache = QueryCache(self.tmp.name)
+        with self.engine.connect() as conn:
+            january = cache.query(conn, MONTH_QUERY, {'month': 202501})
+            cache.memory_limit = int(cache.memory_bytes * 1.5)
+            cache.disk_limit = int(cache.stats()['disk_bytes'] * 1.5)
+            february = cache.query(conn, MONTH_QUERY, {'month': 202502})
+            # Parametri su dio ključa; siječanj je izbačen s obje razine i ponovno se računa
+            self.assertEqual((january['fraud_count'].tolist(), february['fraud_count'].tolist()), ([1], [1]))
+            cache.query(conn, MONTH_QUERY, {'month': 202501})
+        stats = cache.stats()
+        self.assertEqual((stats['memory_entries'], stats['disk_entries']), (1, 1))
+        self.assertEqual((stats['memory_evictions'], stats['disk_evictions'], stats['misses']), (2, 2, 3))
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
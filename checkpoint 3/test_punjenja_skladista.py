@@ -0,0 +1,420 @@
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import sqlalchemy
+
+from agregacije import RollupRouter, apply_rollups, rollup_rows
+from dimenzijski_model import (Base, DimCustomer, DimDate, DimDevice, DimLocation, DimMerchant,
+                               DimOtherTransactionAttributes, FactTransaction, AggFraudDay, AggFraudMonthCategory)
+from olap_motor import StarCube
+from particije import FactPartitions, archive_partitions, partition_definitions
+from kljucevi_dimenzija import LruKeyCache
+from punjenje_skladista import CustomerScd2, DimensionLoader, build_calendar, date_skeys, read_watermark, run_etl
+# punjenje_skladista dodaje checkpoint 2 na sys.path (OLTP shema i testni skup)
+from stvaranje_i_popunjavanje_baze import Base as OltpBase, Transaction, populate_bulk, populate_resumable
+from test_bulk_unosa import make_processed_df
+
+
+def customers(city_c1, valid_from):
+    return pd.DataFrame({
+        'original_customer_id': ['C1', 'C2'],
+        'customer_name': ['Ana', 'Ivo'],
+        'gender': ['Female', 'Male'],
+        'age': [34, 51],
+        'city': [city_c1, 'Panaji'],
+        'state': ['Kerala', 'Goa'],
+        'customer_contact': ['+9111', '+9122'],
+        'customer_email': ['ana@x.com', 'ivo@x.com'],
+        'valid_from_date': [valid_from, valid_from],
+    })
+
+
+class TestCustomerScd2(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.scd = CustomerScd2()
+        with self.engine.begin() as conn:
+            self.assertEqual(self.scd.merge(conn, customers('Kochi', datetime(2025, 1, 1))), (2, 0))
+            # Isti atributi: nema novih verzija
+            self.assertEqual(self.scd.merge(conn, customers('Kochi', datetime(2025, 1, 15))), (0, 0))
+            # Promjena grada za C1: stara verzija se zatvara, nova počinje 1.2.
+            self.assertEqual(self.scd.merge(conn, customers('Trivandrum', datetime(2025, 2, 1))), (0, 1))
+
+    def test_versions(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                sqlalchemy.select(DimCustomer.original_customer_id, DimCustomer.city, DimCustomer.row_version,
+                                  DimCustomer.valid_from_date, DimCustomer.valid_to_date)
+                .order_by(DimCustomer.original_customer_id, DimCustomer.row_version)
+            ).all()
+        self.assertEqual([tuple(row) for row in rows], [
+            ('C1', 'Kochi', 1, datetime(2025, 1, 1), datetime(2025, 2, 1)),
+            ('C1', 'Trivandrum', 2, datetime(2025, 2, 1), None),
+            ('C2', 'Panaji', 1, datetime(2025, 1, 1), None),
+        ])
+
+    def test_point_in_time_lookup(self):
+        skeys = self.scd.lookup(['C1', 'C1', 'C2', 'C1'], pd.to_datetime([
+            '2025-01-20 10:00', '2025-02-03 09:00', '2025-02-03 09:00', '2024-12-31 23:00',
+        ]))
+        versions = self.scd.versions.assign(original_customer_id=self.scd.customer_ids.decode(self.scd.versions['customer_code']))
+        versions = versions.set_index(['original_customer_id', 'row_version'])['customer_skey']
+        self.assertEqual(list(skeys), [versions[('C1', 1)], versions[('C1', 2)], versions[('C2', 1)], versions[('C1', 1)]])
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+class TestDimensionKeyCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+
+    def test_lru_eviction(self):
+        cache = LruKeyCache(2)
+        cache.update({'a': 1, 'b': 2})
+        self.assertEqual(cache.lookup(['a', 'c']), ({'a': 1}, ['c']))
+        cache.update({'c': 3})
+        # 'b' je najdulje nekorišten
+        self.assertEqual(cache.evict(), ['b'])
+        self.assertEqual((cache.hits, cache.misses, cache.evictions, len(cache)), (1, 1, 1, 2))
+
+    def test_bounded_matches_preloaded(self):
+        batches = [['M1', 'M2', 'M1'], ['M3', 'M1'], ['M2', 'M4', 'M3']]
+        results = {}
+        for capacity in [None, 1]:
+            engine = sqlalchemy.create_engine('sqlite://')
+            Base.metadata.create_all(engine)
+            loader = DimensionLoader(DimMerchant, 'merchant_skey', ['original_merchant_id'], capacity)
+            with engine.begin() as conn:
+                results[capacity] = [loader.resolve(conn, pd.DataFrame({'original_merchant_id': batch})).tolist()
+                                     for batch in batches]
+                self.assertEqual(conn.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(DimMerchant)).scalar(), 4)
+            self.assertEqual(loader.inserted, 4)
+            engine.dispose()
+        self.assertEqual(results[1], results[None])
+        # Izbačeni trgovci dohvaćaju se iz baze, ne unose se ponovno
+        self.assertEqual(results[1], [[1, 2, 1], [3, 1], [2, 4, 3]])
+        self.assertGreater(loader.cache.evictions, 0)
+
+    def test_junk_rows_with_nulls(self):
+        key = ['transaction_type_name', 'merchant_category_name', 'account_type_name', 'bank_branch_name', 'currency_code']
+        rows = pd.DataFrame([('Debit', 'Health', 'Savings', 'B1', 'INR'), (None, 'Health', None, 'B1', 'INR'),
+                             ('Debit', 'Health', 'Savings', 'B1', 'INR'), (None, 'Health', None, 'B1', 'INR')], columns=key)
+        loader = DimensionLoader(DimOtherTransactionAttributes, 'other_attributes_skey', key, capacity=10)
+        with self.engine.begin() as conn:
+            first = loader.resolve(conn, rows)
+            fresh = DimensionLoader(DimOtherTransactionAttributes, 'other_attributes_skey', key, capacity=10)
+            second = fresh.resolve(conn, rows)
+        self.assertEqual(first.tolist(), [1, 2, 1, 2])
+        self.assertEqual(second.tolist(), first.tolist())
+        # Kombinacije s NULL atributima pronalaze se u bazi, ne unose se ponovno
+        self.assertEqual((fresh.inserted, fresh.cache.misses), (0, 2))
+
+    def test_bounded_customer_versions(self):
+        scd = CustomerScd2(capacity=1)
+        with self.engine.begin() as conn:
+            scd.resolve(conn, customers('Kochi', datetime(2025, 1, 1)), pd.to_datetime(['2025-01-01'] * 2))
+            self.assertEqual(len(scd.versions), 1)
+            skeys = scd.resolve(conn, customers('Trivandrum', datetime(2025, 2, 1)), pd.to_datetime(['2025-02-01'] * 2))
+            rows = conn.execute(sqlalchemy.select(DimCustomer.customer_skey, DimCustomer.original_customer_id,
+                                                  DimCustomer.row_version)).all()
+        self.assertEqual(sorted(tuple(row) for row in rows), [(1, 'C1', 1), (2, 'C2', 1), (3, 'C1', 2)])
+        self.assertEqual(list(skeys), [3, 2])
+        self.assertEqual(scd.cache.evictions, 2)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+class TestDimDate(unittest.TestCase):
+    def test_calendar(self):
+        calendar = build_calendar('2024-12-30', '2025-01-05')
+        self.assertEqual(calendar['date_skey'].tolist()[:3], [20241230, 20241231, 20250101])
+        first_of_year = calendar[calendar['date_skey'] == 20250101].iloc[0]
+        self.assertEqual((first_of_year['quarter'], first_of_year['month_name'], first_of_year['day_of_week_name']),
+                         (1, 'January', 'Wednesday'))
+        self.assertEqual(calendar['is_weekend'].tolist(), [False, False, False, False, False, True, True])
+
+    def test_date_skeys(self):
+        keys = date_skeys(pd.to_datetime(['2025-01-23 16:04:07', '2024-02-29 00:00:00']))
+        self.assertEqual(keys.tolist(), [20250123, 20240229])
+
+
+def transactions(rows):
+    # (date_skey, bank_branch_name, merchant_category_name, amount, is_fraud)
+    df = pd.DataFrame(rows, columns=['date_skey', 'bank_branch_name', 'merchant_category_name', 'amount', 'is_fraud'])
+    df['device_type_name'] = 'POS'
+    df['location_description'] = None
+    return df
+
+
+class TestFraudRollups(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        first = transactions([(20250130, 'B1', 'Health', 100.0, 0), (20250131, 'B1', 'Health', 50.0, 1)])
+        # Druga serija preklapa zadnji dan prve i dodaje novi mjesec
+        second = transactions([(20250131, 'B2', 'Health', 20.0, 1), (20250201, None, 'Groceries', 10.0, 0)])
+        with self.engine.begin() as conn:
+            for batch in [first, second]:
+                apply_rollups(conn, rollup_rows(batch['date_skey'], batch))
+
+    def test_incremental_totals(self):
+        with self.engine.connect() as conn:
+            days = conn.execute(sqlalchemy.select(AggFraudDay.date_skey, AggFraudDay.transaction_count,
+                                                  AggFraudDay.fraud_count, AggFraudDay.fraud_amount)
+                                .order_by(AggFraudDay.date_skey)).all()
+            months = conn.execute(sqlalchemy.select(AggFraudMonthCategory.month_skey, AggFraudMonthCategory.merchant_category_name,
+                                                    AggFraudMonthCategory.transaction_amount)
+                                  .order_by(AggFraudMonthCategory.month_skey)).all()
+        self.assertEqual([tuple(row) for row in days], [(20250130, 1, 0, 0.0), (20250131, 2, 2, 70.0), (20250201, 1, 0, 0.0)])
+        self.assertEqual([tuple(row) for row in months], [(202501, 'Health', 170.0), (202502, 'Groceries', 10.0)])
+
+    def test_routing(self):
+        router = RollupRouter()
+        with self.engine.connect() as conn:
+            summary, source = router.fraud_summary(conn, ['month', 'bank_branch'], {'month': (202501, 202502)})
+            self.assertEqual(source, 'agg_fraud_month_all')
+            self.assertEqual(summary['bank_branch'].tolist(), ['B1', 'B2', 'Unknown'])
+            self.assertEqual(summary['fraud_rate'].tolist(), [0.5, 1.0, 0.0])
+            self.assertEqual(router.fraud_summary(conn, ['date'])[1], 'agg_fraud_day')
+            self.assertEqual(router.fraud_summary(conn, ['month', 'merchant_category'])[1], 'agg_fraud_month_category')
+            # Nijedan rollup nema dan x kategorija: upit ide na činjenice
+            self.assertEqual(router.fraud_summary(conn, ['date', 'merchant_category'])[1], 'fact_transaction')
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+class TestFactPartitions(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        calendar = build_calendar(pd.Timestamp('2024-12-01'), pd.Timestamp('2025-02-28'))
+        with self.engine.begin() as conn:
+            conn.execute(DimDate.__table__.insert(), calendar.to_dict('records'))
+            conn.execute(DimOtherTransactionAttributes.__table__.insert(), [
+                {'other_attributes_skey': 1, 'bank_branch_name': 'B1', 'merchant_category_name': 'Health'}])
+            conn.execute(FactTransaction.__table__.insert(), [
+                {'date_skey_fk': date_skey, 'other_attributes_skey_fk': 1, 'transaction_amount': amount,
+                 'is_fraud_indicator': fraud, 'transaction_count': 1, 'original_transaction_id': f"T{i}"}
+                for i, (date_skey, amount, fraud) in enumerate([(20241231, 10.0, 1), (20250101, 20.0, 0),
+                                                               (20250131, 30.0, 1), (20250201, 40.0, 1)])])
+
+    def test_partition_definitions(self):
+        self.assertEqual(partition_definitions([202501, 202412]), [
+            'PARTITION p202412 VALUES LESS THAN (20250100)',
+            'PARTITION p202501 VALUES LESS THAN (20250200)',
+            'PARTITION pmax VALUES LESS THAN MAXVALUE',
+        ])
+        # Neparticionirana tablica (SQLite): unos ne mijenja shemu
+        with self.engine.begin() as conn:
+            self.assertEqual(FactPartitions().ensure(conn, [20250301]), [])
+
+    def test_month_filter_on_facts(self):
+        with self.engine.connect() as conn:
+            summary, source = RollupRouter().fraud_summary(conn, ['date', 'merchant_category'], {'month': 202501})
+        self.assertEqual(source, 'fact_transaction')
+        self.assertEqual(summary['date'].tolist(), [20250101, 20250131])
+        self.assertEqual(summary['fraud_amount'].tolist(), [0.0, 30.0])
+
+    def test_archive(self):
+        with tempfile.TemporaryDirectory() as tmp, self.engine.begin() as conn:
+            archived = archive_partitions(conn, 202502, tmp)
+            self.assertEqual([(month, rows) for month, rows, _ in archived], [(202412, 1), (202501, 2)])
+            restored = pd.read_parquet(archived[1][2])
+            remaining = conn.execute(sqlalchemy.select(FactTransaction.date_skey_fk)).scalars().all()
+        self.assertEqual(sorted(restored['original_transaction_id']), ['T1', 'T2'])
+        self.assertEqual(remaining, [20250201])
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+class TestStarCube(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        calendar = build_calendar(pd.Timestamp('2025-01-01'), pd.Timestamp('2025-03-31'))
+        rng = np.random.default_rng(3)
+        rows = 2000
+        facts = pd.DataFrame({
+            'date_skey_fk': rng.choice(calendar['date_skey'].to_numpy(), rows),
+            'customer_skey_fk': rng.integers(1, 4, rows),
+            'location_skey_fk': rng.integers(1, 3, rows),
+            'merchant_skey_fk': rng.integers(1, 3, rows),
+            'device_skey_fk': pd.array(rng.integers(1, 4, rows), dtype='Int64'),
+            'other_attributes_skey_fk': rng.integers(1, 3, rows),
+            'transaction_amount': rng.uniform(1, 500, rows).round(2),
+            'is_fraud_indicator': rng.integers(0, 2, rows),
+            'transaction_count': 1,
+            'original_transaction_id': [f"T{i}" for i in range(rows)],
+        })
+        # Činjenica bez uređaja pripada nepoznatom članu
+        facts.loc[:9, 'device_skey_fk'] = pd.NA
+        with self.engine.begin() as conn:
+            conn.execute(DimDate.__table__.insert(), calendar.to_dict('records'))
+            conn.execute(DimCustomer.__table__.insert(), [
+                {'customer_skey': skey, 'original_customer_id': 'C1', 'gender': gender, 'city': 'Zagreb',
+                 'state': 'Grad Zagreb', 'row_version': skey, 'valid_from_date': datetime(2024, 1, skey)}
+                for skey, gender in [(1, 'Male'), (2, 'Female'), (3, 'Female')]])
+            conn.execute(DimLocation.__table__.insert(), [
+                {'location_skey': 1, 'transaction_location_description': 'Split', 'transaction_city': 'Split'},
+                {'location_skey': 2, 'transaction_location_description': 'Rijeka', 'transaction_city': 'Rijeka'}])
+            conn.execute(DimMerchant.__table__.insert(), [{'merchant_skey': 1, 'original_merchant_id': 'M1'},
+                                                          {'merchant_skey': 2, 'original_merchant_id': 'M2'}])
+            conn.execute(DimDevice.__table__.insert(), [
+                {'device_skey': 1, 'device_name': 'ATM 1', 'device_type_name': 'ATM'},
+                {'device_skey': 2, 'device_name': 'POS 1', 'device_type_name': 'POS'},
+                {'device_skey': 3, 'device_name': 'POS 2', 'device_type_name': 'POS'}])
+            conn.execute(DimOtherTransactionAttributes.__table__.insert(), [
+                {'other_attributes_skey': 1, 'bank_branch_name': 'B1', 'merchant_category_name': 'Health'},
+                {'other_attributes_skey': 2, 'bank_branch_name': 'B2', 'merchant_category_name': 'Health'}])
+            conn.execute(FactTransaction.__table__.insert(), facts.astype(object).where(facts.notna(), None).to_dict('records'))
+        with self.engine.connect() as conn:
+            self.cube = StarCube.from_database(conn, chunk_size=300)
+        self.facts = facts
+
+    def test_compressed_columns(self):
+        self.assertEqual(self.cube.rows, 2000)
+        self.assertEqual(self.cube.keys['date'].dtype, np.uint8)
+        self.assertEqual(self.cube.keys['device'].dtype, np.uint8)
+
+    def test_query_matches_sql(self):
+        # Filter po tipu uređaja koristi bitmap indeks, raspon datuma izravnu usporedbu kodova
+        filters = {'device.device_type_name': 'POS', 'date.date_skey': (20250115, 20250310)}
+        result = self.cube.query(['date.month_of_year', 'other.bank_branch_name'], filters)
+        self.assertIsNotNone(self.cube._bitmaps['device.device_type_name'])
+        self.assertIsNone(self.cube._bitmaps['date.date_skey'])
+        stmt = (sqlalchemy.select(DimDate.month_of_year, DimOtherTransactionAttributes.bank_branch_name,
+                                  sqlalchemy.func.count(), sqlalchemy.func.sum(FactTransaction.is_fraud_indicator),
+                                  sqlalchemy.func.sum(FactTransaction.transaction_amount))
+                .join(DimDate, FactTransaction.date_skey_fk == DimDate.date_skey)
+                .join(DimDevice, FactTransaction.device_skey_fk == DimDevice.device_skey)
+                .join(DimOtherTransactionAttributes,
+                      FactTransaction.other_attributes_skey_fk == DimOtherTransactionAttributes.other_attributes_skey)
+                .where(DimDevice.device_type_name == 'POS', DimDate.date_skey.between(20250115, 20250310))
+                .group_by(DimDate.month_of_year, DimOtherTransactionAttributes.bank_branch_name)
+                .order_by(DimDate.month_of_year, DimOtherTransactionAttributes.bank_branch_name))
+        with self.engine.connect() as conn:
+            expected = conn.execute(stmt).all()
+        self.assertEqual(list(zip(result['date.month_of_year'], result['other.bank_branch_name'],
+                                  result['transaction_count'], result['fraud_count'])),
+                         [tuple(row[:4]) for row in expected])
+        np.testing.assert_allclose(result['transaction_amount'], [row[4] for row in expected])
+
+    def test_unknown_member_and_save(self):
+        result = self.cube.query(['device.device_type_name'], measures={'n': ('transaction_count', 'count')})
+        self.assertTrue(pd.isna(result['device.device_type_name'].iloc[0]))
+        self.assertEqual(result['device.device_type_name'].tolist()[1:], ['ATM', 'POS'])
+        self.assertEqual(result['n'].iloc[0], 10)
+        self.assertEqual(result['n'].sum(), 2000)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.cube.save(tmp)
+            loaded = StarCube.load(tmp)
+        pd.testing.assert_frame_equal(loaded.query(['customer.gender'], {'location.transaction_city': ['Split']}),
+                                      self.cube.query(['customer.gender'], {'location.transaction_city': ['Split']}))
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+# OLTP (SQLite) -> skladište: watermark, inkrementalno izdvajanje i ponovno pokretanje bez novih činjenica
+class TestIncrementalEtl(unittest.TestCase):
+    def setUp(self):
+        self.oltp = sqlalchemy.create_engine('sqlite://')
+        OltpBase.metadata.create_all(self.oltp)
+        populate_bulk(self.oltp, make_processed_df())
+        self.dw = sqlalchemy.create_engine('sqlite://')
+
+    def facts(self):
+        with self.dw.connect() as conn:
+            rows = conn.execute(sqlalchemy.select(FactTransaction.original_transaction_id, DimCustomer.original_customer_id,
+                                                  DimCustomer.city, DimCustomer.row_version)
+                                .join(DimCustomer, FactTransaction.customer_skey_fk == DimCustomer.customer_skey)
+                                .order_by(FactTransaction.original_transaction_id)).all()
+        return [tuple(row) for row in rows]
+
+    def test_rerun_and_increment(self):
+        self.assertEqual(run_etl(self.oltp, self.dw, batch_size=3), 4)
+        first = self.facts()
+        with self.dw.connect() as conn:
+            watermark = read_watermark(conn)
+        self.assertEqual(watermark, datetime(2025, 2, 1, 10, 0))
+
+        # Ponovno pokretanje čita samo transakcije od watermarka (T4) i ne unosi ništa
+        self.assertEqual(run_etl(self.oltp, self.dw, batch_size=3), 0)
+        self.assertEqual(self.facts(), first)
+
+        # Nove transakcije: C1 se preselio (nova SCD2 verzija), C4 je novi kupac
+        new = make_processed_df().iloc[[0, 3]].reset_index(drop=True)
+        new['Transaction_ID'] = ['T5', 'T6']
+        new['Customer_ID'] = ['C1', 'C4']
+        new['City'] = ['Trivandrum', 'New Delhi']
+        new['Transaction_DateTime'] = pd.to_datetime(['2025-02-10 09:00:00', '2025-02-11 12:00:00'])
+        populate_resumable(self.oltp, new, 'increment')
+        self.assertEqual(run_etl(self.oltp, self.dw, batch_size=3), 2)
+
+        self.assertEqual(self.facts(), first + [('T5', 'C1', 'Trivandrum', 2), ('T6', 'C4', 'New Delhi', 1)])
+        with self.dw.connect() as conn:
+            versions = conn.execute(sqlalchemy.select(DimCustomer.original_customer_id, DimCustomer.row_version,
+                                                      DimCustomer.valid_to_date)
+                                    .order_by(DimCustomer.original_customer_id, DimCustomer.row_version)).all()
+            self.assertEqual(read_watermark(conn), datetime(2025, 2, 11, 12, 0))
+        self.assertEqual([tuple(row) for row in versions], [
+            ('C1', 1, datetime(2025, 2, 10, 9, 0)), ('C1', 2, None), ('C2', 1, None), ('C3', 1, None), ('C4', 1, None),
+        ])
+
+    def test_null_members_load_as_unknown(self):
+        self.assertEqual(run_etl(self.oltp, self.dw), 4)
+        # OLTP dopušta transakcije bez uređaja i lokacije (npr. iz servisa unosa)
+        with self.oltp.begin() as conn:
+            conn.execute(Transaction.__table__.insert(), [
+                {'transaction_id_pk': transaction_id, 'customer_id': 'C2', 'merchant_id': 'M1', 'amount': 10.0,
+                 'is_fraud': False, 'transaction_datetime': datetime(2025, 2, day, 9, 0)}
+                for transaction_id, day in [('T5', 10), ('T6', 11)]])
+        self.assertEqual(run_etl(self.oltp, self.dw), 2)
+
+        with self.dw.connect() as conn:
+            rows = conn.execute(sqlalchemy.select(FactTransaction.original_transaction_id, DimDevice.device_name,
+                                                  DimDevice.device_type_name, DimLocation.transaction_location_description)
+                                .join(DimDevice, FactTransaction.device_skey_fk == DimDevice.device_skey)
+                                .join(DimLocation, FactTransaction.location_skey_fk == DimLocation.location_skey)
+                                .where(FactTransaction.original_transaction_id.in_(['T5', 'T6']))
+                                .order_by(FactTransaction.original_transaction_id)).all()
+            devices = conn.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(DimDevice)).scalar()
+        self.assertEqual([tuple(row) for row in rows],
+                         [('T5', 'Unknown', 'Unknown', 'Unknown'), ('T6', 'Unknown', 'Unknown', 'Unknown')])
+        # Obje transakcije dijele istog člana 'Unknown'
+        self.assertEqual(devices, 4)
+
+    def test_upgrades_dim_customer_without_attribute_hash(self):
+        self.assertEqual(run_etl(self.oltp, self.dw), 4)
+        # Skladište izgrađeno prije uvođenja attribute_hash
+        with self.dw.begin() as conn:
+            conn.execute(sqlalchemy.text("ALTER TABLE dim_customer DROP COLUMN attribute_hash"))
+
+        new = make_processed_df().iloc[[1]].reset_index(drop=True)
+        new['Transaction_ID'] = ['T5']
+        new['Transaction_DateTime'] = pd.to_datetime(['2025-02-10 09:00:00'])
+        populate_resumable(self.oltp, new, 'increment')
+        self.assertEqual(run_etl(self.oltp, self.dw), 1)
+
+        # Stupac je dodan i popunjen; nepromijenjeni kupac nije dobio novu verziju
+        with self.dw.connect() as conn:
+            versions = conn.execute(sqlalchemy.select(DimCustomer.original_customer_id, DimCustomer.row_version,
+                                                      DimCustomer.attribute_hash.is_not(None))
+                                    .order_by(DimCustomer.original_customer_id)).all()
+        self.assertEqual([tuple(row) for row in versions], [('C1', 1, True), ('C2', 1, True), ('C3', 1, True)])
+
+    def tearDown(self):
+        self.oltp.dispose()
+        self.dw.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from znacajke_brzine import VelocityFeatureStore, backfill_features, feature_columns
+
+
+def transactions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, 20 * 24 * 3600, rows))
+    df = pd.DataFrame({
+        'Transaction_ID': [f"T{i}" for i in range(rows)],
+        'Transaction_DateTime': pd.Timestamp('2025-01-01') + pd.to_timedelta(seconds, unit='s'),
+        'Transaction_Amount': rng.uniform(1, 1000, rows).round(2),
+        'Transaction_Location': rng.choice(['Mumbai', 'Pune', 'Surat', None], rows),
+        'Customer_ID': rng.choice([f"C{i}" for i in range(15)], rows),
+        'Merchant_ID': rng.choice(['M1', 'M2', None], rows),
+        'Transaction_Device': rng.choice(['ATM', 'POS', 'Mobile'], rows),
+    })
+    # Više transakcija u istoj sekundi
+    df.loc[10:30, 'Transaction_DateTime'] = df.loc[10, 'Transaction_DateTime']
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+class TestVelocityFeatures(unittest.TestCase):
+    def test_windows(self):
+        df = pd.DataFrame({
+            'Transaction_ID': ['a', 'b', 'c', 'd'],
+            'Transaction_DateTime': pd.to_datetime(['2025-01-01 00:00', '2025-01-01 00:30', '2025-01-01 01:00',
+                                                    '2025-01-02 00:30']),
+            'Transaction_Amount': [10.0, 30.0, 20.0, 5.0],
+            'Transaction_Location': ['Pune', 'Surat', 'Pune', 'Pune'],
+            'Customer_ID': ['C1'] * 4,
+            'Merchant_ID': ['M1', 'M2', 'M1', 'M1'],
+            'Transaction_Device': ['POS'] * 4,
+        })
+        features = backfill_features(df).set_index('transaction_id_pk')
+        # Prozor (t - 1h, t]: transakcija točno sat ranije više nije u prozoru
+        self.assertEqual(features['customer_1h_count'].tolist(), [1, 2, 2, 1])
+        self.assertEqual(features['customer_1h_amount_sum'].tolist(), [10.0, 40.0, 50.0, 5.0])
+        self.assertEqual(features['customer_24h_amount_max'].tolist(), [10.0, 30.0, 30.0, 20.0])
+        self.assertEqual(features['customer_24h_distinct_locations'].tolist(), [1, 2, 2, 1])
+        self.assertEqual(features['merchant_7d_count'].tolist(), [1, 1, 2, 3])
+
+    def test_streaming_matches_backfill(self):
+        df = transactions(1500)
+        backfilled = backfill_features(df).set_index('transaction_id_pk')
+        streamed = VelocityFeatureStore().update_batch(df).set_index('transaction_id_pk').loc[backfilled.index]
+        for column in feature_columns():
+            expected = pd.to_numeric(backfilled[column].astype(object).where(backfilled[column].notna(), np.nan))
+            np.testing.assert_allclose(pd.to_numeric(streamed[column]).astype(float), expected.astype(float),
+                                       err_msg=column)
+
+    def test_warm_up(self):
+        df = transactions(800, seed=1).sort_values('Transaction_DateTime', kind='stable')
+        history, new = df.iloc[:600], df.iloc[600:]
+        store = VelocityFeatureStore()
+        store.warm_up(history)
+        expected = backfill_features(df).set_index('transaction_id_pk').loc[new['Transaction_ID']]
+        streamed = store.update_batch(new).set_index('transaction_id_pk')
+        np.testing.assert_allclose(streamed['customer_7d_amount_sum'], expected['customer_7d_amount_sum'])
+        np.testing.assert_array_equal(streamed['device_24h_distinct_locations'], expected['device_24h_distinct_locations'])
+        with self.assertRaises(ValueError):
+            store.update(dict(new.iloc[0]))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,282 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Klizni prozori (sekunde); prozor završava transakcijom za koju se računaju značajke: (t - w, t]
+WINDOWS = {'1h': 3600, '24h': 24 * 3600, '7d': 7 * 24 * 3600}
+# Entitet -> stupac obrađenog skupa podataka
+ENTITIES = {'customer': 'Customer_ID', 'merchant': 'Merchant_ID', 'device': 'Transaction_Device'}
+TRANSACTION_ID = 'Transaction_ID'
+TIMESTAMP = 'Transaction_DateTime'
+AMOUNT = 'Transaction_Amount'
+LOCATION = 'Transaction_Location'
+STATISTICS = ['count', 'amount_sum', 'amount_max', 'distinct_locations']
+# Početni kapacitet prstenastog spremnika po entitetu (udvostručuje se po potrebi)
+INITIAL_CAPACITY = 8
+# Predprocesirani skup (CSV ili Parquet direktorij); mijenja se varijablom okruženja BANK_FRAUD_PROCESSED_PATH
+PROCESSED_PATH = os.environ.get('BANK_FRAUD_PROCESSED_PATH', "Bank_Transaction_Fraud_Detection_PROCESSED.csv")
+DEFAULT_OUTPUT = 'velocity_features.parquet'
+
+
+def feature_columns():
+    return [f"{entity}_{window}_{statistic}" for entity in ENTITIES for window in WINDOWS for statistic in STATISTICS]
+
+
+def _epoch_seconds(values):
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+# Najveći iznos u prozorima [lo, hi] (uključivo): rijetka tablica po razinama 2^k, u memoriji samo jedna razina
+def _window_max(values, lo, hi):
+    result = np.empty(len(values), dtype=np.float64)
+    lengths = hi - lo + 1
+    levels = np.floor(np.log2(np.maximum(lengths, 1))).astype(np.int64)
+    level_max = values.astype(np.float64)
+    span = 1
+    for level in range(int(levels.max()) + 1 if len(values) else 0):
+        rows = np.flatnonzero(levels == level)
+        result[rows] = np.maximum(level_max[lo[rows]], level_max[hi[rows] - span + 1])
+        shifted = np.full(len(level_max), -np.inf)
+        shifted[:len(level_max) - span] = level_max[span:]
+        level_max = np.maximum(level_max, shifted)
+        span *= 2
+    return result
+
+
+# Broj različitih lokacija u prozorima [lo, hi]: lokacija j se broji ako joj je prethodna pojava
+# (isti entitet i lokacija) prije lo, tj. distinct = #{j <= hi : prev[j] < lo} - lo. Brojanje po prefiksu
+# rastavlja se na poravnate blokove veličine 2^k čije su vrijednosti prev sortirane (searchsorted po bloku).
+# Sortirane razine ne ovise o prozoru pa se dijele između svih donjih granica iz lows.
+def _window_distinct(previous, lows, hi):
+    n = len(previous)
+    prefix = hi + 1
+    base = n + 2
+    positions = np.arange(n, dtype=np.int64)
+    results = [-lo.astype(np.int64) for lo in lows]
+    keys = positions * base + previous + 1
+    level = 0
+    while (1 << level) <= n:
+        rows = np.flatnonzero((prefix >> level) & 1)
+        starts = (prefix[rows] >> (level + 1)) << (level + 1)
+        blocks = (starts >> level) * base
+        for lo, result in zip(lows, results):
+            result[rows] += np.searchsorted(keys, blocks + lo[rows] + 1, side='left') - starts
+        level += 1
+        if (1 << level) <= n:
+            keys = np.sort((positions >> level) * base + (keys - (positions >> (level - 1)) * base), kind='stable')
+    return results
+
+
+# Vektorizirano izračunavanje značajki za cijelu povijest. Vraća DataFrame s transaction_id_pk
+# i značajkama, u redoslijedu ulaznih redaka.
+def backfill_features(transactions):
+    n = len(transactions)
+    seconds = _epoch_seconds(transactions[TIMESTAMP])
+    amounts = transactions[AMOUNT].to_numpy(dtype=np.float64)
+    locations, _ = pd.factorize(transactions[LOCATION])
+    features = {'transaction_id_pk': transactions[TRANSACTION_ID].to_numpy()}
+    offset = seconds - seconds.min() if n else seconds
+    span = (int(offset.max()) if n else 0) + max(WINDOWS.values()) + 1
+
+    for entity, column in ENTITIES.items():
+        codes, _ = pd.factorize(transactions[column])
+        valid = np.flatnonzero(codes >= 0)
+        # Redoslijed: entitet, vrijeme, izvorni redoslijed (isti kao kod obrade toka po vremenu)
+        order = valid[np.lexsort((valid, offset[valid], codes[valid]))]
+        group_time = codes[order].astype(np.int64) * span + offset[order]
+        sorted_amounts = amounts[order]
+        cumulative = np.concatenate([[0.0], np.cumsum(sorted_amounts)])
+        positions = np.arange(len(order), dtype=np.int64)
+
+        # Prethodna pojava iste lokacije kod istog entiteta; nedostajuća lokacija pokazuje na samu sebe (ne broji se)
+        sorted_locations = locations[order]
+        by_location = np.lexsort((positions, sorted_locations, codes[order]))
+        previous = np.full(len(order), -1, dtype=np.int64)
+        same = ((codes[order][by_location][1:] == codes[order][by_location][:-1])
+                & (sorted_locations[by_location][1:] == sorted_locations[by_location][:-1]))
+        previous[by_location[1:][same]] = by_location[:-1][same]
+        missing = np.flatnonzero(sorted_locations < 0)
+        previous[missing] = missing
+
+        lows = [np.searchsorted(group_time, group_time - seconds_back, side='right') for seconds_back in WINDOWS.values()]
+        distinct = _window_distinct(previous, lows, positions)
+        for window, lo, distinct_locations in zip(WINDOWS, lows, distinct):
+            prefix = f"{entity}_{window}_"
+            values = {
+                'count': positions - lo + 1,
+                'amount_sum': cumulative[positions + 1] - cumulative[lo],
+                'amount_max': _window_max(sorted_amounts, lo, positions),
+                'distinct_locations': distinct_locations,
+            }
+            for statistic, sorted_values in values.items():
+                integer = statistic in ('count', 'distinct_locations')
+                if len(valid) == n:
+                    output = np.empty(n, dtype=np.int32 if integer else np.float64)
+                    output[order] = sorted_values
+                else:
+                    output = np.full(n, np.nan)
+                    output[order] = sorted_values
+                    output = pd.array(output, dtype='Int32') if integer else output
+                features[prefix + statistic] = output
+    return pd.DataFrame(features)
+
+
+# Prstenasti spremnik događaja jednog entiteta (vrijeme, iznos, kod lokacije) sa stanjem svih prozora.
+# Događaji [start, end) su apsolutni indeksi; pozicija u spremniku je indeks % kapacitet.
+class _EntityWindows:
+    __slots__ = ('times', 'amounts', 'locations', 'start', 'end', 'heads', 'sums', 'location_counts',
+                 'max_queue', 'queue_heads', 'queue_tails')
+
+    def __init__(self, windows):
+        self.times = np.empty(INITIAL_CAPACITY, dtype=np.int64)
+        self.amounts = np.empty(INITIAL_CAPACITY, dtype=np.float64)
+        self.locations = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self.start = self.end = 0
+        self.heads = [0] * windows
+        self.sums = [0.0] * windows
+        self.location_counts = [{} for _ in range(windows)]
+        # Monotono padajući red indeksa događaja po prozoru (za najveći iznos), također prstenasti
+        self.max_queue = np.empty((windows, INITIAL_CAPACITY), dtype=np.int64)
+        self.queue_heads = [0] * windows
+        self.queue_tails = [0] * windows
+
+    def _grow(self):
+        capacity = len(self.times)
+        new_capacity = capacity * 2
+        events = np.arange(self.start, self.end)
+        for name in ('times', 'amounts', 'locations'):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[events % new_capacity] = old[events % capacity]
+            setattr(self, name, new)
+        queue = np.empty((len(self.heads), new_capacity), dtype=np.int64)
+        for w in range(len(self.heads)):
+            slots = np.arange(self.queue_heads[w], self.queue_tails[w])
+            queue[w, slots % new_capacity] = self.max_queue[w, slots % capacity]
+        self.max_queue = queue
+
+    # Dodaje događaj i vraća (count, amount_sum, amount_max, distinct_locations) po prozoru;
+    # amortizirano O(1) po događaju i prozoru
+    def add(self, timestamp, amount, location, windows):
+        if self.end > self.start and timestamp < self.times[(self.end - 1) % len(self.times)]:
+            raise ValueError("Transactions must be added in time order")
+        if self.end - self.start == len(self.times):
+            self._grow()
+        capacity = len(self.times)
+        slot = self.end % capacity
+        self.times[slot], self.amounts[slot], self.locations[slot] = timestamp, amount, location
+        event = self.end
+        self.end += 1
+
+        results = []
+        for w, seconds_back in enumerate(windows):
+            counts = self.location_counts[w]
+            head = self.heads[w]
+            while self.times[head % capacity] <= timestamp - seconds_back:
+                self.sums[w] -= self.amounts[head % capacity]
+                old_location = int(self.locations[head % capacity])
+                if old_location >= 0:
+                    counts[old_location] -= 1
+                    if not counts[old_location]:
+                        del counts[old_location]
+                head += 1
+            self.heads[w] = head
+            self.sums[w] += amount
+            if location >= 0:
+                counts[location] = counts.get(location, 0) + 1
+
+            queue = self.max_queue[w]
+            queue_head, queue_tail = self.queue_heads[w], self.queue_tails[w]
+            while queue_tail > queue_head and self.amounts[queue[(queue_tail - 1) % capacity] % capacity] <= amount:
+                queue_tail -= 1
+            queue[queue_tail % capacity] = event
+            queue_tail += 1
+            while queue[queue_head % capacity] < head:
+                queue_head += 1
+            self.queue_heads[w], self.queue_tails[w] = queue_head, queue_tail
+            results.append((self.end - head, self.sums[w], float(self.amounts[queue[queue_head % capacity] % capacity]),
+                            len(counts)))
+        # Događaji izvan najvećeg prozora više nisu potrebni
+        self.start = min(self.heads)
+        return results
+
+
+# Inkrementalno održavanje značajki nad tokom transakcija (poredanih po vremenu)
+class VelocityFeatureStore:
+    def __init__(self):
+        self.windows = list(WINDOWS.values())
+        self.entities = {entity: {} for entity in ENTITIES}
+        self.location_codes = {}
+
+    def _location_code(self, location):
+        if location is None or (isinstance(location, float) and np.isnan(location)):
+            return -1
+        return self.location_codes.setdefault(location, len(self.location_codes))
+
+    # transaction: mapiranje sa stupcima obrađenog skupa (Transaction_ID, Transaction_DateTime, ...)
+    def update(self, transaction):
+        timestamp = int(pd.Timestamp(transaction[TIMESTAMP]).timestamp())
+        amount = float(transaction[AMOUNT])
+        location = self._location_code(transaction[LOCATION])
+        features = {'transaction_id_pk': transaction[TRANSACTION_ID]}
+        for entity, column in ENTITIES.items():
+            key = transaction[column]
+            if pd.isna(key):
+                results = [(None, None, None, None)] * len(self.windows)
+            else:
+                state = self.entities[entity].get(key)
+                if state is None:
+                    state = self.entities[entity][key] = _EntityWindows(len(self.windows))
+                results = state.add(timestamp, amount, location, self.windows)
+            for window, values in zip(WINDOWS, results):
+                for statistic, value in zip(STATISTICS, values):
+                    features[f"{entity}_{window}_{statistic}"] = value
+        return features
+
+    def update_batch(self, transactions):
+        transactions = transactions.sort_values(TIMESTAMP, kind='stable')
+        return pd.DataFrame([self.update(row) for row in transactions.to_dict('records')])
+
+    # Stanje iz povijesti: dovoljno je ponovno obraditi transakcije unutar najvećeg prozora
+    def warm_up(self, history):
+        if not len(history):
+            return
+        timestamps = pd.to_datetime(history[TIMESTAMP])
+        recent = history[timestamps > timestamps.max() - pd.Timedelta(seconds=max(self.windows))]
+        self.update_batch(recent)
+
+
+def read_transactions(path):
+    columns = [TRANSACTION_ID, TIMESTAMP, AMOUNT, LOCATION] + list(ENTITIES.values())
+    if path.endswith('.parquet') or os.path.isdir(path):
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns, parse_dates=[TIMESTAMP])
+    return df
+
+
+def write_features(features, path):
+    if path.endswith('.parquet'):
+        features.to_parquet(path, index=False)
+    else:
+        features.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill per-customer/merchant/device velocity features.")
+    parser.add_argument('--input', default=PROCESSED_PATH, help="Processed transactions (CSV or Parquet)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Feature table keyed by transaction_id_pk (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    transactions = read_transactions(args.input)
+    features = backfill_features(transactions)
+    write_features(features, args.output)
+    print(f"Wrote {len(features.columns) - 1} features for {len(features)} transactions to '{args.output}' "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()